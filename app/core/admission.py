@@ -0,0 +1,160 @@
+import json
+import math
+import time
+from prometheus_client import Counter as PromCounter
+from app.core.config import settings
+
+ADMISSION = PromCounter(
+    "bookit_admission_requests_total",
+    "Requests seen by the admission controller by route class and outcome (admitted or shed)",
+    ["route_class", "outcome"],
+)
+
+# Never limited: probes, metrics and the admin API must answer while the app is overloaded
+EXEMPT_PREFIXES = ("/livez", "/readyz", "/health", "/metrics", "/admin", "/docs", "/redoc", "/openapi.json")
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+def route_class(method: str, path: str) -> str | None:
+    """The class a request is limited under, or None when it is exempt."""
+    if path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.endswith("/stream"):
+        # Long-lived event streams would hold a slot for their whole life; the hub caps them instead
+        return None
+    if path.startswith("/auth"):
+        return "auth"
+    if method in READ_METHODS:
+        if path.startswith(("/services", "/reviews")):
+            return "catalog_reads"
+        return "other"
+    if path.startswith("/bookings"):
+        return "booking_writes"
+    return "other"
+
+class AdaptiveLimit:
+    """
+    Gradient concurrency limit for one route class. The lowest latency seen over the last
+    `window` samples is the baseline; while smoothed latency stays within `tolerance` times it
+    the limit grows by about sqrt(limit) per sample, and beyond that it shrinks in proportion.
+    The baseline window rolls over, so a lasting shift in latency becomes the new baseline.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, tolerance: float, window: int = 500, smoothing: float = 0.2):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.window = window
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._rtt: float | None = None
+        self._baseline: float | None = None
+        self._window_min = math.inf
+        self._window_samples = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, rtt: float) -> None:
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        self._update(rtt, in_flight)
+
+    def _update(self, rtt: float, in_flight: int) -> None:
+        self._rtt = rtt if self._rtt is None else 0.9 * self._rtt + 0.1 * rtt
+        self._window_min = min(self._window_min, rtt)
+        self._window_samples += 1
+        if self._window_samples >= self.window:
+            self._baseline, self._window_min, self._window_samples = self._window_min, math.inf, 0
+        baseline = min(self._baseline or math.inf, self._window_min)
+        if in_flight < self.limit / 2 or self._rtt <= 0:
+            # Not using the limit we have, so latency says nothing about a higher one
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * baseline / self._rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = (1 - self.smoothing) * self.limit + self.smoothing * target
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+
+    def _baseline_ms(self) -> float:
+        return min(self._baseline or math.inf, self._window_min) * 1000
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "latency_ms": round(self._rtt * 1000, 2) if self._rtt is not None else None,
+            "baseline_ms": round(self._baseline_ms(), 2) if self._rtt is not None else None,
+        }
+
+class AdmissionController:
+    """Per-worker adaptive limits, one per route class, created on first use."""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, tolerance: float):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.limits: dict[str, AdaptiveLimit] = {}
+
+    def limit_for(self, cls: str) -> AdaptiveLimit:
+        limit = self.limits.get(cls)
+        if limit is None:
+            limit = self.limits[cls] = AdaptiveLimit(self.initial, self.min_limit, self.max_limit, self.tolerance)
+        return limit
+
+    def stats(self) -> dict:
+        return {cls: limit.stats() for cls, limit in sorted(self.limits.items())}
+
+admission = AdmissionController(
+    initial=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    tolerance=settings.admission_latency_tolerance,
+)
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware capping in-flight requests per route class. A request over its class's
+    limit is answered 503 with Retry-After at once instead of queueing for a connection.
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+        self._shed_body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+        self._shed_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self._shed_body)).encode()),
+            (b"retry-after", str(settings.admission_retry_after).encode()),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_control:
+            await self.app(scope, receive, send)
+            return
+        cls = route_class(scope["method"], scope["path"])
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.controller.limit_for(cls)
+        if not limit.try_acquire():
+            ADMISSION.labels(cls, "shed").inc()
+            await send({"type": "http.response.start", "status": 503, "headers": self._shed_headers})
+            await send({"type": "http.response.body", "body": self._shed_body})
+            return
+        ADMISSION.labels(cls, "admitted").inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release(time.perf_counter() - start)
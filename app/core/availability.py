@@ -0,0 +1,181 @@
+import asyncio
+import json
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.booking import Booking, BookingStatus
+
+CHANNEL = "bookit_availability"
+BUSY_STATUSES = frozenset({BookingStatus.pending.value, BookingStatus.confirmed.value})
+_PENDING = "availability_pending"
+
+def interval(booking: Booking) -> dict:
+    """What a calendar needs about a booking: its slot and whether it still blocks it. No user data."""
+    status = booking.status.value if isinstance(booking.status, BookingStatus) else booking.status
+    return {
+        "booking_id": booking.id,
+        "start_time": booking.start_time.isoformat(),
+        "end_time": booking.end_time.isoformat(),
+        "busy": status in BUSY_STATUSES,
+    }
+
+class Subscriber:
+    def __init__(self, service_id: int, maxsize: int):
+        self.service_id = service_id
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize)
+        self.evicted = False
+        self.reason: str | None = None
+
+    def evict(self, reason: str) -> None:
+        self.evicted = True
+        self.reason = reason
+        try:
+            # Wakes a stream waiting on an empty queue; a full one is awake already
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+class AvailabilityHub:
+    """
+    Per-worker fan-out of interval changes to stream subscribers. Each subscriber has a bounded
+    queue; one that falls behind is evicted rather than buffering without limit or slowing the rest.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: dict[int, set[Subscriber]] = {}
+        self.count = 0
+        self.published = 0
+        self.evictions = 0
+        self.resets = 0
+        self.listener_status = "in_process"
+        self._listener: asyncio.Task | None = None
+
+    def subscribe(self, service_id: int) -> Subscriber | None:
+        """A new subscriber, or None when this worker already serves `max_subscribers` streams."""
+        if self.count >= self.max_subscribers:
+            return None
+        sub = Subscriber(service_id, self.queue_size)
+        self._subscribers.setdefault(service_id, set()).add(sub)
+        self.count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        subs = self._subscribers.get(sub.service_id)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[sub.service_id]
+        self.count -= 1
+
+    def publish(self, service_id: int, message: dict) -> None:
+        self.published += 1
+        for sub in list(self._subscribers.get(service_id, ())):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                sub.evict("slow_consumer")
+                self.evictions += 1
+                self.unsubscribe(sub)
+
+    def reset_all(self, reason: str) -> None:
+        """Send every stream a reset, so its client reloads the snapshot."""
+        for subs in list(self._subscribers.values()):
+            for sub in list(subs):
+                sub.evict(reason)
+                self.resets += 1
+                self.unsubscribe(sub)
+
+    def stats(self) -> dict:
+        return {
+            "streams": self.count,
+            "services": len(self._subscribers),
+            "max_streams": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "evictions": self.evictions,
+            "resets": self.resets,
+            "listener": self.listener_status,
+        }
+
+    async def start(self) -> None:
+        """Start this worker's LISTEN loop when the primary is Postgres; otherwise changes are published in-process."""
+        if self._listener is not None or not settings.db_url_async.startswith("postgresql"):
+            return
+        self._listener = asyncio.create_task(self._listen(settings.db_url_async.replace("postgresql+asyncpg://", "postgresql://")))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        self.publish(message["service_id"], message)
+
+    async def _listen(self, dsn: str) -> None:
+        # Its own connection rather than a pooled one, held for the worker's lifetime
+        import asyncpg
+        backoff = 1.0
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                await conn.add_listener(CHANNEL, self._on_notify)
+                self.listener_status = "listening"
+                backoff = 1.0
+                if connected_before:
+                    # Notifications sent while the connection was down are gone; start clients over
+                    self.reset_all("listener_reconnected")
+                connected_before = True
+                # Notifications arrive via the callback; the ping notices a dead connection
+                while True:
+                    await asyncio.sleep(5)
+                    await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("availability_listener_failed", error=str(e), retry_in_s=backoff)
+            finally:
+                self.listener_status = "reconnecting"
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+hub = AvailabilityHub(settings.availability_queue_size, settings.availability_max_streams)
+
+def _is_postgres(session: AsyncSession) -> bool:
+    return session.bind.dialect.name == "postgresql"
+
+async def notify(session: AsyncSession, service_id: int, change: dict) -> None:
+    """
+    Announce an interval change once the session's transaction commits. On Postgres this is
+    NOTIFY, which every worker's listener receives; elsewhere it goes to this worker's hub.
+    """
+    message = {"service_id": service_id, **change}
+    if _is_postgres(session):
+        await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(message)})
+    else:
+        session.sync_session.info.setdefault(_PENDING, []).append(message)
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session):
+    for message in session.info.pop(_PENDING, ()):
+        hub.publish(message["service_id"], message)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(session: Session):
+    session.info.pop(_PENDING, None)
+
+def sse(event_name: str, data) -> bytes:
+    return f"event: {event_name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
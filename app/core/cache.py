@@ -0,0 +1,369 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+import msgpack
+from app.core.config import settings
+from app.core.encoding import preferred_format
+from app.core.logging import logger
+
+KEY_PREFIX = "bookit:rc:"
+TAG_PREFIX = "bookit:rct:"
+INVALIDATE_CHANNEL = "bookit:rc:invalidate"
+# After a Redis error the shared tier is skipped for this long (seconds) instead of failing every request
+REDIS_RETRY_AFTER = 5.0
+# Response headers that are per-request and must not be replayed from the cache
+UNCACHED_HEADERS = {b"content-length", b"date", b"server", b"set-cookie", b"server-timing"}
+
+def services_tag() -> str:
+    return "services"
+
+def service_tag(sid: int) -> str:
+    return f"service:{sid}"
+
+def reviews_tag(service_id: int) -> str:
+    return f"reviews:{service_id}"
+
+def request_key(scope) -> str:
+    """Path, sorted query and negotiated format; requests with equal keys get the same response."""
+    query = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+    accept = next((v for k, v in scope["headers"] if k == b"accept"), b"").decode("latin-1")
+    return f"{scope['path']}?{urlencode(query)}|{preferred_format(accept)}"
+
+class MarkedRoutes:
+    """The app's routes whose endpoint carries `attr`, matched without running the router."""
+
+    def __init__(self, attr: str):
+        self.attr = attr
+        self._routes: list | None = None
+
+    def match(self, scope):
+        from starlette.routing import Match
+        if self._routes is None:
+            self._routes = [r for r in scope["app"].routes if getattr(getattr(r, "endpoint", None), self.attr, None)]
+        for route in self._routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return route, child_scope
+        return None, None
+
+def reads_primary(scope) -> bool:
+    """Whether the request is pinned to the primary, so shared responses may be stale for it."""
+    from starlette.requests import Request
+    from app.db.session import reads_primary as session_reads_primary
+    return session_reads_primary(Request(scope))
+
+def cached(tags):
+    """Mark a GET endpoint as cacheable; `tags(path_params)` names what a write must invalidate."""
+    def decorator(endpoint):
+        endpoint.__cache_tags__ = tags
+        return endpoint
+    return decorator
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+    tags: tuple[str, ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+class LocalTier:
+    """In-process LRU bounded by total body bytes, with a tag index for invalidation."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags) -> int:
+        keys = set().union(*(self._tags.get(t, ()) for t in tags)) if tags else set()
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ResponseCache:
+    """
+    Two-tier cache of serialized GET responses: a per-worker LRU, plus a shared Redis tier
+    when REDIS_URL is set. Writes invalidate by tag in both tiers and broadcast to other workers.
+    For `replica_lag` seconds after a tag is invalidated, responses carrying it are not stored,
+    since a replica read in that window may not include the write yet.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entry_bytes: int, redis_url: str | None, replica_lag: float = 0):
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self.max_entry_bytes = max_entry_bytes
+        self.local = LocalTier(max_bytes)
+        self.redis_url = redis_url
+        self.redis = None
+        self.hits = {"local": 0, "redis": 0}
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped per tag on invalidation so a fill that raced a write is not stored
+        self._generations: dict[str, int] = {}
+        self._invalidated_at: dict[str, float] = {}
+        self._subscriber: asyncio.Task | None = None
+        self._redis_down_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, op: str, error: Exception) -> None:
+        # Logged once per outage, not once per request
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning("response_cache_redis_error", op=op, error=str(error), retry_in_s=REDIS_RETRY_AFTER)
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    async def start(self) -> None:
+        if not self.enabled or not self.redis_url or self.redis is not None:
+            return
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("response_cache_redis_unavailable", reason="redis package not installed")
+            return
+        timeout = settings.response_cache_redis_timeout
+        self.redis = aioredis.from_url(self.redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._subscriber = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            self._subscriber = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    def generation(self, tags) -> tuple[int, ...]:
+        return tuple(self._generations.get(t, 0) for t in tags)
+
+    def _bump(self, tags) -> None:
+        now = time.monotonic()
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._invalidated_at[tag] = now
+
+    def _recently_invalidated(self, tags) -> bool:
+        if not self.replica_lag:
+            return False
+        since = time.monotonic() - self.replica_lag
+        return any(self._invalidated_at.get(t, since) > since for t in tags)
+
+    async def get(self, key: str) -> tuple[CachedResponse | None, str | None]:
+        entry = self.local.get(key)
+        if entry is not None:
+            self.hits["local"] += 1
+            return entry, "local"
+        if self.redis_available:
+            entry = await self._redis_get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+                self.hits["redis"] += 1
+                return entry, "redis"
+        self.misses += 1
+        return None, None
+
+    async def set(self, key: str, status: int, headers, body: bytes, tags, generation) -> None:
+        if len(body) > self.max_entry_bytes or self.generation(tags) != generation or self._recently_invalidated(tags):
+            return
+        entry = CachedResponse(status, headers, body, time.monotonic() + self.ttl, tuple(tags))
+        self.local.set(key, entry)
+        if self.redis_available:
+            await self._redis_set(key, entry)
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every cached response carrying any of the tags, here, in Redis and on other workers."""
+        if not self.enabled:
+            return
+        self._bump(tags)
+        self.invalidations += 1
+        self.local.invalidate(tags)
+        if self.redis is not None:
+            await self._redis_invalidate(tags)
+
+    async def _redis_get(self, key: str) -> CachedResponse | None:
+        try:
+            raw = await self.redis.get(KEY_PREFIX + key)
+        except Exception as e:
+            self._redis_failed("get", e)
+            return None
+        if raw is None:
+            return None
+        d = msgpack.unpackb(raw)
+        ttl_left = d["expires_at"] - time.time()
+        if ttl_left <= 0:
+            return None
+        return CachedResponse(d["status"], [tuple(h) for h in d["headers"]], d["body"], time.monotonic() + ttl_left, tuple(d["tags"]))
+
+    async def _redis_set(self, key: str, entry: CachedResponse) -> None:
+        raw = msgpack.packb({
+            "status": entry.status,
+            "headers": entry.headers,
+            "body": entry.body,
+            "expires_at": time.time() + self.ttl,
+            "tags": list(entry.tags),
+        }, use_bin_type=True)
+        ttl = max(int(self.ttl), 1)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(KEY_PREFIX + key, raw, ex=ttl)
+                for tag in entry.tags:
+                    pipe.sadd(TAG_PREFIX + tag, key)
+                    pipe.expire(TAG_PREFIX + tag, ttl * 2)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed("set", e)
+
+    async def _redis_invalidate(self, tags) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.smembers(TAG_PREFIX + tag)
+                members = await pipe.execute()
+            keys = [KEY_PREFIX + k.decode() for ms in members for k in ms]
+            await self.redis.delete(*keys, *(TAG_PREFIX + t for t in tags))
+            await self.redis.publish(INVALIDATE_CHANNEL, json.dumps(list(tags)))
+        except Exception as e:
+            self._redis_failed("invalidate", e)
+
+    async def _listen(self) -> None:
+        # Other workers' invalidations; our own are applied twice, which is harmless
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                async for message in pubsub.listen():
+                    tags = json.loads(message["data"])
+                    self._bump(tags)
+                    self.local.invalidate(tags)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._redis_failed("subscribe", e)
+                await pubsub.aclose()
+                await asyncio.sleep(REDIS_RETRY_AFTER)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl_s": self.ttl,
+            "entries": len(self.local),
+            "bytes": self.local.bytes,
+            "max_bytes": self.local.max_bytes,
+            "redis": self.redis is not None,
+            "redis_available": self.redis_available,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+response_cache = ResponseCache(
+    ttl=settings.response_cache_ttl,
+    max_bytes=settings.response_cache_max_bytes,
+    max_entry_bytes=settings.response_cache_max_entry_bytes,
+    redis_url=settings.redis_url,
+    replica_lag=settings.read_your_writes_seconds if settings.db_replica_urls else 0,
+)
+
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI middleware serving `@cached` GET endpoints from the response cache. A hit replays
+    the stored status, headers and body without routing, touching the database or encoding JSON.
+    Requests pinned to the primary after a write skip the cache, which may predate the write.
+    """
+
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+        self.routes = MarkedRoutes("__cache_tags__")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+        route, child_scope = self.routes.match(scope)
+        if route is None or reads_primary(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        tags = route.endpoint.__cache_tags__(child_scope["path_params"])
+        key = request_key(scope)
+        bypass = b"no-cache" in headers.get(b"cache-control", b"")
+        entry, tier = (None, None) if bypass else await self.cache.get(key)
+        if entry is not None:
+            # Lets the metrics and access log label the hit with its route template
+            scope.update(child_scope)
+            await send({
+                "type": "http.response.start",
+                "status": entry.status,
+                "headers": [*entry.headers, (b"content-length", str(len(entry.body)).encode()), (b"x-cache", f"hit-{tier}".encode())],
+            })
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        generation = self.cache.generation(tags)
+        start: dict = {}
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": [*message.get("headers", []), (b"x-cache", b"miss")]}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        if start.get("status") == 200:
+            stored = [(k, v) for k, v in start.get("headers", []) if k.lower() not in UNCACHED_HEADERS]
+            await self.cache.set(key, 200, stored, b"".join(chunks), tags, generation)
@@ -13,9 +13,103 @@ class Settings(BaseModel):
     access_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
     refresh_minutes: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 43200))
     bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    hash_workers: int = int(os.getenv("HASH_WORKERS", 0))  # 0 = one per CPU
+    bulk_register_batch_size: int = int(os.getenv("BULK_REGISTER_BATCH_SIZE", 500))
 
     db_url_async: str = os.getenv("DATABASE_URL", "")
     db_url_sync: str = os.getenv("SYNC_DATABASE_URL", "")
+
+    # Connection pool and driver tuning
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", 5))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, -1 disables
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_wait_warn_ms: float = float(os.getenv("DB_POOL_WAIT_WARN_MS", 100))
+    db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))  # asyncpg, 0 for pgbouncer
+    db_command_timeout: float = float(os.getenv("DB_COMMAND_TIMEOUT", 0))  # seconds, 0 disables
+    # Primary connections across all workers; when set, replaces DB_POOL_SIZE/DB_MAX_OVERFLOW per worker
+    db_max_connections: int = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", 1))  # worker processes, set by gunicorn.conf.py
+    db_pool_warm_connections: int = int(os.getenv("DB_POOL_WARM_CONNECTIONS", 2))  # opened per engine at startup
+    startup_warmup: bool = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+    # SQLite single-node profile (file databases only)
+    sqlite_read_pool_size: int = int(os.getenv("SQLITE_READ_POOL_SIZE", 4))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # bytes
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", -65536))  # negative = KiB
+
+    # Read replicas (comma-separated async URLs); reads fall back to the primary when empty
+    db_replica_urls: list[str] = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    db_replica_eject_seconds: float = float(os.getenv("DB_REPLICA_EJECT_SECONDS", 30))
+    read_your_writes_seconds: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+    # Health probes
+    readiness_ttl_seconds: float = float(os.getenv("READINESS_TTL_SECONDS", 2))
+    readiness_timeout_seconds: float = float(os.getenv("READINESS_TIMEOUT_SECONDS", 2))
+
+    # Logging: records are queued and written in batches by a background thread
+    log_file: str = os.getenv("LOG_FILE", "app.log")  # prod only, "-" for stdout; other envs log to stderr
+    log_max_bytes: int = int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024))  # 0 disables size rotation
+    log_rotate_seconds: float = float(os.getenv("LOG_ROTATE_SECONDS", 86400))  # 0 disables time rotation
+    log_backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # records beyond this are dropped and counted
+    log_batch_size: int = int(os.getenv("LOG_BATCH_SIZE", 500))
+    # Fraction of DEBUG records kept, e.g. "/services=0.01,/bookings/{bid}=0.1"
+    log_debug_sample_rates: dict[str, float] = {
+        route.strip(): float(rate)
+        for route, rate in (p.rsplit("=", 1) for p in os.getenv("LOG_DEBUG_SAMPLE_RATES", "").split(",") if "=" in p)
+    }
+    log_debug_sample_default: float = float(os.getenv("LOG_DEBUG_SAMPLE_DEFAULT", 1.0))
+
+    # Per-request instrumentation
+    server_timing: bool = os.getenv("SERVER_TIMING", "true").lower() == "true"
+    n_plus_one_threshold: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))  # 0 disables
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", 250))  # 0 disables
+    slow_query_explain_sample: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", 0.1))  # fraction of slow queries
+    slow_query_buffer_size: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", 100))
+
+    # Response cache for public GETs; Redis is an optional tier shared by all workers
+    redis_url: str | None = os.getenv("REDIS_URL") or None
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", 30))  # seconds, 0 disables
+    response_cache_max_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # per worker
+    response_cache_max_entry_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", 1024 * 1024))
+    response_cache_redis_timeout: float = float(os.getenv("RESPONSE_CACHE_REDIS_TIMEOUT", 0.05))  # seconds
+    singleflight_timeout: float = float(os.getenv("SINGLEFLIGHT_TIMEOUT", 5))  # seconds waiters wait on a leader, 0 disables
+
+    # Adaptive per-route-class concurrency limits (per worker); excess requests get 503
+    admission_control: bool = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+    admission_initial_limit: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", 20))
+    admission_min_limit: int = int(os.getenv("ADMISSION_MIN_LIMIT", 4))
+    admission_max_limit: int = int(os.getenv("ADMISSION_MAX_LIMIT", 200))
+    admission_latency_tolerance: float = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", 2.0))  # x baseline before shrinking
+    admission_retry_after: int = int(os.getenv("ADMISSION_RETRY_AFTER", 1))  # seconds
+
+    # Idempotency-Key support on POST /bookings and POST /reviews
+    idempotency_key_ttl: int = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))  # seconds
+    idempotency_purge_interval: float = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", 600))  # seconds
+    idempotency_purge_batch: int = int(os.getenv("IDEMPOTENCY_PURGE_BATCH", 1000))
+
+    # GET /services/{sid}/availability/stream (Server-Sent Events), per worker
+    availability_max_streams: int = int(os.getenv("AVAILABILITY_MAX_STREAMS", 1000))
+    availability_queue_size: int = int(os.getenv("AVAILABILITY_QUEUE_SIZE", 64))  # undelivered messages before a client is evicted
+    availability_heartbeat: float = float(os.getenv("AVAILABILITY_HEARTBEAT", 15))  # seconds between keep-alive comments
+
+    # Transactional outbox for booking and review changes, and its relay to sinks
+    outbox_relay: bool = os.getenv("OUTBOX_RELAY", "true").lower() == "true"
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+    outbox_poll_interval: float = float(os.getenv("OUTBOX_POLL_INTERVAL", 1.0))  # seconds between empty polls
+    outbox_webhook_url: str | None = os.getenv("OUTBOX_WEBHOOK_URL") or None
+    outbox_webhook_timeout: float = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT", 5))  # seconds
+    outbox_file: str | None = os.getenv("OUTBOX_FILE") or None  # JSON lines
+    outbox_retention: float = float(os.getenv("OUTBOX_RETENTION", 7 * 24 * 3600))  # seconds published events stay in the change feed
+
+    # In-memory columnar copy of all bookings behind /admin/occupancy; each worker scans and holds its own
+    occupancy_snapshot: bool = os.getenv("OCCUPANCY_SNAPSHOT", "false").lower() == "true"
+    occupancy_refresh_interval: float = float(os.getenv("OCCUPANCY_REFRESH_INTERVAL", 300))  # seconds between reloads
+    occupancy_load_batch: int = int(os.getenv("OCCUPANCY_LOAD_BATCH", 50_000))  # rows fetched per round trip
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -23,6 +117,11 @@ class Settings(BaseModel):
             raise ValueError("DATABASE_URL environment variable is required")
         if not self.db_url_sync:
             self.db_url_sync = self.db_url_async.replace("postgresql+asyncpg://", "postgresql://")
+        if self.db_max_connections > 0:
+            # Half of each worker's share stays open, the rest is overflow for bursts
+            per_worker = max(1, self.db_max_connections // max(1, self.web_concurrency))
+            self.db_pool_size = max(1, per_worker // 2)
+            self.db_max_overflow = per_worker - self.db_pool_size
 
 settings = Settings()
 
@@ -0,0 +1,89 @@
+import enum
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable
+import msgpack
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.core.timing import segment
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.bookit.columnar+json"
+MSGPACK = "application/msgpack"
+# Accept values for the compact formats; anything else gets the regular JSON list
+FORMATS = {COLUMNAR_JSON: COLUMNAR_JSON, MSGPACK: MSGPACK, "application/x-msgpack": MSGPACK, JSON: JSON}
+# OpenAPI `responses=` entry advertising the extra list formats
+LIST_RESPONSES = {200: {"content": {COLUMNAR_JSON: {}, MSGPACK: {}}, "description": "JSON list, or columns by field when negotiated"}}
+
+def preferred_format(accept: str | None) -> str:
+    """Highest-q supported media type in an Accept header; JSON when none match."""
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        fmt = FORMATS.get(media.lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+def _epoch_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def _converter(sample):
+    if isinstance(sample, datetime):
+        return _epoch_ms
+    if isinstance(sample, date):
+        return date.isoformat
+    if isinstance(sample, Decimal):
+        return float
+    if isinstance(sample, enum.Enum):
+        return lambda v: v.value
+    return None
+
+def _column(values: list) -> list:
+    # Columns are homogeneous, so pick the conversion once from the first value
+    convert = _converter(next((v for v in values if v is not None), None))
+    if convert is None:
+        return values
+    return [None if v is None else convert(v) for v in values]
+
+def columns(rows: Iterable, schema: type[BaseModel]) -> dict:
+    """
+    Rows regrouped by field: field names appear once and datetimes become epoch milliseconds.
+    Reads attributes straight off the ORM rows the endpoint would otherwise validate one by one.
+    """
+    rows = list(rows)
+    return {
+        "count": len(rows),
+        "datetime": "epoch_ms",
+        "columns": {f: _column([getattr(r, f) for r in rows]) for f in schema.model_fields},
+    }
+
+def encode(doc: dict, fmt: str) -> bytes:
+    if fmt == MSGPACK:
+        return msgpack.packb(doc, use_bin_type=True)
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def list_response(request: Request, response: Response, rows: list, schema: type[BaseModel]):
+    """
+    Content negotiation for list endpoints: the rows unchanged for JSON (FastAPI applies the
+    response model as before), or a pre-encoded columnar JSON / MessagePack body.
+    """
+    fmt = preferred_format(request.headers.get("accept"))
+    if fmt == JSON:
+        response.headers["Vary"] = "Accept"
+        return rows
+    with segment("serialize"):
+        body = encode(columns(rows, schema), fmt)
+    return Response(body, media_type=fmt, headers={"Vary": "Accept"})
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, HTTPException, Request, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.core.logging import logger
+from app.db.session import get_primary_read_session, get_session
+from app.repositories.idempotency_repo import IdempotencyRepo
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# OpenAPI `responses=` entries for endpoints taking an Idempotency-Key
+IDEMPOTENT_RESPONSES = {
+    400: {"description": "Malformed Idempotency-Key"},
+    422: {"description": "Idempotency-Key already used for a different request"},
+}
+
+class _KeyLocks:
+    """Per-worker locks so duplicates arriving at this worker wait without holding a DB connection."""
+
+    def __init__(self):
+        self._locks: dict[tuple[int, str], tuple[asyncio.Lock, int]] = {}
+
+    async def acquire(self, k: tuple[int, str]) -> None:
+        lock, users = self._locks.get(k, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[k] = (lock, users + 1)
+        await lock.acquire()
+
+    def release(self, k: tuple[int, str]) -> None:
+        lock, users = self._locks[k]
+        lock.release()
+        if users == 1:
+            del self._locks[k]
+        else:
+            self._locks[k] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+_locks = _KeyLocks()
+
+class IdempotentRequest:
+    """
+    A request carrying an Idempotency-Key. Either `replay` holds the stored response, or the key
+    is claimed in the request's transaction and `record()` stores the response before commit.
+    """
+
+    def __init__(self, session: AsyncSession, schema: type[BaseModel], status_code: int):
+        self.session = session
+        self.schema = schema
+        self.status_code = status_code
+        self.replay: Response | None = None
+        self._kid: int | None = None
+
+    async def record(self, result) -> None:
+        """Store the response in the current transaction, so it commits with the write."""
+        body = self.schema.model_validate(result, from_attributes=True).model_dump_json().encode("utf-8")
+        await IdempotencyRepo(self.session).record(self._kid, self.status_code, body)
+
+def _fingerprint(request: Request, body: bytes) -> str:
+    h = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    h.update(body)
+    return h.hexdigest()
+
+def _replay(row, fingerprint: str) -> Response:
+    if row.fingerprint != fingerprint:
+        raise HTTPException(422, detail=f"{HEADER} was already used for a different request")
+    return Response(row.response_body, status_code=row.status_code, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+
+def idempotent(schema: type[BaseModel], status_code: int):
+    """
+    Dependency for a create endpoint: None without the header, else an IdempotentRequest.
+    The endpoint returns `replay` when set, and otherwise calls `record()` before committing.
+    """
+    async def _dependency(
+        request: Request,
+        payload=Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
+        read_session: AsyncSession = Depends(get_primary_read_session),
+    ):
+        key = request.headers.get(HEADER)
+        if key is None:
+            yield None
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(400, detail=f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+        user_id = int(payload["sub"])
+        fingerprint = _fingerprint(request, await request.body())
+        idem = IdempotentRequest(session, schema, status_code)
+        repo = IdempotencyRepo(session)
+        lock_key = (user_id, key)
+
+        await _locks.acquire(lock_key)
+        try:
+            now = datetime.now(timezone.utc)
+            # A replay only reads, so it never opens a transaction on the write session (on SQLite
+            # that would take the database-wide write lock)
+            row = await IdempotencyRepo(read_session).find(user_id, key, now)
+            # Hand the read connection back now rather than when the request ends
+            await read_session.rollback()
+            if row is None:
+                idem._kid = await repo.claim(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    now=now,
+                    expires_at=now + timedelta(seconds=settings.idempotency_key_ttl),
+                )
+                if idem._kid is None:
+                    # Another worker committed the same key while we waited on it
+                    row = await repo.find(user_id, key, now)
+            if row is not None:
+                idem.replay = _replay(row, fingerprint)
+                # Nothing to write; end the claim attempt so the connection goes back to the pool now
+                await session.rollback()
+            yield idem
+        finally:
+            _locks.release(lock_key)
+
+    return _dependency
+
+async def purge_expired_keys() -> None:
+    """Background task deleting expired keys in batches every IDEMPOTENCY_PURGE_INTERVAL seconds."""
+    from app.db.session import AsyncSessionLocal
+    while True:
+        await asyncio.sleep(settings.idempotency_purge_interval)
+        try:
+            purged = 0
+            while True:
+                async with AsyncSessionLocal() as session:
+                    n = await IdempotencyRepo(session).purge_expired(datetime.now(timezone.utc), settings.idempotency_purge_batch)
+                    await session.commit()
+                purged += n
+                if n < settings.idempotency_purge_batch:
+                    break
+            if purged:
+                logger.info("idempotency_keys_purged", count=purged)
+        except Exception as e:
+            logger.warning("idempotency_purge_failed", error=str(e))
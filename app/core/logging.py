@@ -1,10 +1,158 @@
+import atexit
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, RotatingFileHandler, WatchedFileHandler
 import structlog
 import logging
 from app.core.config import settings
 
+# ASGI scope of the request being handled, set by the request middleware; used to sample debug events per route
+request_scope: ContextVar[dict | None] = ContextVar("request_scope", default=None)
+
+_STOP = object()
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the background writer; never blocks the caller when the queue is full."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class DebugSampler(logging.Filter):
+    """Keeps only a configured fraction of DEBUG records, per route template."""
+
+    def __init__(self, rates: dict[str, float], default: float):
+        super().__init__()
+        self.rates = rates
+        self.default = default
+
+    def filter(self, record) -> bool:
+        if record.levelno != logging.DEBUG:
+            return True
+        scope = request_scope.get()
+        route = getattr(scope.get("route"), "path", None) if scope else None
+        rate = self.rates.get(route, self.default) if route else self.default
+        return rate >= 1 or random.random() < rate
+
+class BatchStreamHandler(logging.StreamHandler):
+    def emit_batch(self, records: list[logging.LogRecord]) -> None:
+        self.stream.write("".join(self.format(r) + self.terminator for r in records))
+        self.flush()
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """Writes a whole batch with one write and flush; rotates by size and/or age."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, rotate_seconds: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.rotate_seconds = rotate_seconds
+        self._opened_at = time.monotonic()
+
+    def _rollover_due(self, pending: int) -> bool:
+        if self.rotate_seconds and time.monotonic() - self._opened_at >= self.rotate_seconds:
+            return True
+        return bool(self.maxBytes) and self.stream.tell() + pending > self.maxBytes
+
+    def emit_batch(self, records: list[logging.LogRecord]) -> None:
+        text = "".join(self.format(r) + self.terminator for r in records)
+        if self.stream is None:
+            self.stream = self._open()
+        if self.backupCount and self._rollover_due(len(text.encode("utf-8"))):
+            self.doRollover()
+            self._opened_at = time.monotonic()
+        self.stream.write(text)
+        self.stream.flush()
+
+class BatchWatchedFileHandler(WatchedFileHandler):
+    """
+    Appends a whole batch with one write and never rotates; it reopens the file when something
+    else has rotated it. Safe for several processes sharing one file.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__(filename, encoding="utf-8")
+
+    def emit_batch(self, records: list[logging.LogRecord]) -> None:
+        text = "".join(self.format(r) + self.terminator for r in records)
+        self.reopenIfNeeded()
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.write(text)
+        self.stream.flush()
+
+class BatchingQueueListener:
+    """Background thread draining the log queue and writing whatever has accumulated as one batch."""
+
+    def __init__(self, q: queue.Queue, handler, source: DroppingQueueHandler, batch_size: int):
+        self.queue = q
+        self.handler = handler
+        self.source = source
+        self.batch_size = batch_size
+        self.written = 0
+        self._reported_drops = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=1)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                running = False
+                batch = [r for r in batch if r is not _STOP]
+            self._report_drops(batch)
+            if batch:
+                try:
+                    self.handler.emit_batch(batch)
+                    self.written += len(batch)
+                except Exception:
+                    self.handler.handleError(batch[-1])
+
+    def _report_drops(self, batch: list) -> None:
+        dropped = self.source.dropped
+        if dropped > self._reported_drops:
+            msg = f'{{"event": "log_records_dropped", "dropped": {dropped - self._reported_drops}, "dropped_total": {dropped}, "level": "warning"}}'
+            batch.append(logging.makeLogRecord({"msg": msg, "levelno": logging.WARNING, "levelname": "WARNING"}))
+            self._reported_drops = dropped
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "written": self.written,
+            "dropped": self.source.dropped,
+        }
+
+_listener: BatchingQueueListener | None = None
+
 def setup_logging():
     """Configure structured logging for the application."""
-    
+    global _listener
+
     # Configure structlog
     structlog.configure(
         processors=[
@@ -23,16 +171,53 @@ def setup_logging():
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
-    
-    # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=open("app.log", "a") if settings.app_env == "prod" else None,
-        level=logging.INFO if settings.app_env == "prod" else logging.DEBUG,
-    )
-    
+
+    if _listener is not None:
+        return
+
+    # Request handlers only enqueue; a background thread formats and writes in batches
+    if settings.app_env == "prod" and settings.log_file == "-":
+        handler = BatchStreamHandler(sys.stdout)
+    elif settings.app_env == "prod" and settings.web_concurrency > 1:
+        # Workers renaming the same file under each other lose records; rotate externally (logrotate)
+        handler = BatchWatchedFileHandler(settings.log_file)
+    elif settings.app_env == "prod":
+        handler = BatchRotatingFileHandler(
+            settings.log_file,
+            max_bytes=settings.log_max_bytes,
+            backup_count=settings.log_backup_count,
+            rotate_seconds=settings.log_rotate_seconds,
+        )
+    else:
+        handler = BatchStreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    q: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = DroppingQueueHandler(q)
+    queue_handler.addFilter(DebugSampler(settings.log_debug_sample_rates, settings.log_debug_sample_default))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging.INFO if settings.app_env == "prod" else logging.DEBUG)
+
+    _listener = BatchingQueueListener(q, handler, queue_handler, batch_size=settings.log_batch_size)
+    _listener.start()
+    atexit.register(stop_logging)
+
     # Set log levels for external libraries
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread; later records are written directly."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        root.handlers = [h for h in root.handlers if h is not _listener.source] + [_listener.handler]
+        _listener = None
+
+def logging_stats() -> dict:
+    return _listener.stats() if _listener is not None else {}
+
 logger = structlog.get_logger()
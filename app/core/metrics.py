@@ -0,0 +1,82 @@
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Seconds; covers cached reads through bcrypt-bound logins
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Paths that match no route share one label so scanners cannot blow up cardinality
+UNMATCHED = "<unmatched>"
+
+REQUESTS = Counter(
+    "bookit_http_requests_total", "HTTP requests by route template and status class", ["method", "route", "status"]
+)
+LATENCY = Histogram(
+    "bookit_http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "bookit_http_requests_in_progress", "HTTP requests being served", multiprocess_mode="livesum"
+)
+
+def multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus text exposition; under gunicorn, merges every worker's files in the multiprocess dir."""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        # Labelled children are resolved once per route instead of on every request
+        self._latency: dict[tuple[str, str], object] = {}
+        self._requests: dict[tuple[str, str, str], object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_PROGRESS.dec()
+            self._observe(scope, status, time.perf_counter() - start)
+
+    def _observe(self, scope, status: int, duration_s: float) -> None:
+        route = getattr(scope.get("route"), "path", None) or UNMATCHED
+        method = scope["method"]
+        key = (method, route)
+        latency = self._latency.get(key)
+        if latency is None:
+            latency = self._latency[key] = LATENCY.labels(method, route)
+        latency.observe(duration_s)
+        status_key = (method, route, f"{status // 100}xx")
+        requests = self._requests.get(status_key)
+        if requests is None:
+            requests = self._requests[status_key] = REQUESTS.labels(*status_key)
+        requests.inc()
@@ -0,0 +1,226 @@
+import asyncio
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.booking import BookingStatus
+from app.repositories.booking_repo import STATUS_CODES, BookingRepo
+from app.repositories.service_repo import ServiceRepo
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+OCCUPYING = (BookingStatus.pending, BookingStatus.confirmed, BookingStatus.completed)
+CHUNK = 1 << 20  # bookings binned per pass, bounding the temporaries of a large scan
+MAX_CELLS = 50_000_000  # service × day cells one utilization request may allocate
+
+class BookingSnapshot:
+    """
+    Every booking as parallel NumPy columns, one element per booking: service id, start and end
+    as epoch seconds, and a STATUS_CODES status; plus the sorted ids of all services. Never
+    changed once built: a refresh replaces the whole object, so readers need no locking.
+    """
+
+    def __init__(self, service_id: np.ndarray, start: np.ndarray, end: np.ndarray, status: np.ndarray,
+                 services: np.ndarray, loaded_at: datetime, load_ms: float):
+        self.service_id = service_id
+        self.start = start
+        self.end = end
+        self.status = status
+        self.services = services
+        self.loaded_at = loaded_at
+        self.load_ms = load_ms
+
+    @property
+    def rows(self) -> int:
+        return len(self.start)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.service_id, self.start, self.end, self.status, self.services))
+
+    def select(self, lo: int, hi: int, statuses: Iterable[BookingStatus], service_id: int | None = None) -> np.ndarray:
+        """Mask of bookings with one of `statuses` overlapping [lo, hi)."""
+        codes = [STATUS_CODES[BookingStatus(s).value] for s in statuses]
+        mask = (self.start < hi) & (self.end > lo) & np.isin(self.status, codes)
+        if service_id is not None:
+            mask &= self.service_id == service_id
+        return mask
+
+COLUMN_TYPES = (np.int32, np.int64, np.int64, np.int8)
+
+def _partition_columns(part: list[tuple]) -> list[np.ndarray]:
+    block = np.array(part, dtype=np.int64).reshape(-1, 4)
+    return [col.astype(dtype) for col, dtype in zip(block.T, COLUMN_TYPES)]
+
+def _join_columns(columns: list[list[np.ndarray]], services: np.ndarray) -> list[np.ndarray]:
+    joined = [np.concatenate(c) if c else np.empty(0, dtype) for c, dtype in zip(columns, COLUMN_TYPES)]
+    known = np.isin(joined[0], services)
+    return joined if known.all() else [c[known] for c in joined]
+
+async def load_snapshot(session, partition_size: int) -> BookingSnapshot:
+    started = time.perf_counter()
+    columns: list[list[np.ndarray]] = [[], [], [], []]
+    async for part in BookingRepo(session).slot_columns(partition_size):
+        # Converting a partition holds the GIL for a while; off the event loop, requests keep flowing
+        for out, col in zip(columns, await asyncio.to_thread(_partition_columns, part)):
+            out.append(col)
+    # Read after the bookings: a service created meanwhile has none yet, and bookings of one
+    # deleted meanwhile are dropped
+    services = np.array(await ServiceRepo(session).ids(), dtype=np.int32)
+    service_id, start, end, status = await asyncio.to_thread(_join_columns, columns, services)
+    return BookingSnapshot(
+        service_id, start, end, status, services,
+        loaded_at=datetime.now(timezone.utc),
+        load_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+def busy_seconds(start: np.ndarray, end: np.ndarray, lo: int, hi: int, width: int,
+                 group: np.ndarray | None = None, groups: int = 1) -> np.ndarray:
+    """
+    Seconds of the intervals [start, end) falling in each `width`-second bin of [lo, hi), as a
+    (groups, bins) array; `group` puts each interval in a row (all in row 0 by default). An
+    interval adds its head and tail to the bins they fall in and `width` to every bin between,
+    the latter via a difference array, so the cost is linear in intervals plus bins.
+    """
+    bins = -(-(hi - lo) // width)
+    cells = groups * bins
+    out = np.zeros(cells)
+    spans = np.zeros(cells + 1, dtype=np.int64)
+    for i in range(0, len(start), CHUNK):
+        s = np.clip(start[i:i + CHUNK], lo, hi)
+        e = np.clip(end[i:i + CHUNK], lo, hi)
+        keep = e > s
+        s, e = s[keep], e[keep]
+        offset = 0 if group is None else group[i:i + CHUNK][keep].astype(np.int64) * bins
+        first = (s - lo) // width
+        last = (e - 1 - lo) // width
+        out += np.bincount(offset + first, weights=np.minimum(e, lo + (first + 1) * width) - s, minlength=cells)
+        multi = last > first
+        if not multi.any():
+            continue
+        if group is not None:
+            offset = offset[multi]
+        first, last, e = first[multi], last[multi], e[multi]
+        out += np.bincount(offset + last, weights=e - (lo + last * width), minlength=cells)
+        # Whole bins strictly between head and tail: +1 after the head, -1 at the tail
+        spans += np.bincount(offset + first + 1, minlength=cells + 1)
+        spans -= np.bincount(offset + last, minlength=cells + 1)
+    # Running sums per row turn the difference array into whole-bin counts
+    out += spans[:cells].reshape(groups, bins).cumsum(axis=1).ravel() * width
+    return out.reshape(groups, bins)
+
+def heatmap(snap: BookingSnapshot, lo: int, hi: int, statuses: Iterable[BookingStatus] = OCCUPYING,
+            service_id: int | None = None) -> dict:
+    """
+    Booked hours and utilization per UTC hour of week (Monday first) over [lo, hi), which must
+    start on an hour. Utilization is booked time over the hours of that slot in the range
+    times the services counted: one for `service_id`, otherwise all of them.
+    """
+    mask = snap.select(lo, hi, statuses, service_id)
+    busy = busy_seconds(snap.start[mask], snap.end[mask], lo, hi, HOUR)[0]
+    hours = lo // HOUR + np.arange(len(busy))
+    slot = ((hours // 24 + EPOCH_WEEKDAY) % 7) * 24 + hours % 24
+    booked = np.bincount(slot, weights=busy, minlength=7 * 24)
+    capacity = np.bincount(slot, minlength=7 * 24) * HOUR * (1 if service_id is not None else len(snap.services))
+    utilization = np.divide(booked, capacity, out=np.zeros_like(booked), where=capacity > 0)
+    return {
+        "services": 1 if service_id is not None else len(snap.services),
+        "bookings": int(mask.sum()),
+        "booked_hours": np.round(booked / HOUR, 3).reshape(7, 24).tolist(),
+        "utilization": np.round(utilization, 4).reshape(7, 24).tolist(),
+    }
+
+def _percentiles(values: np.ndarray, ps: list[float]) -> dict[str, float | None]:
+    if not len(values):
+        return {f"p{p:g}": None for p in ps}
+    return {f"p{p:g}": round(float(v), 4) for p, v in zip(ps, np.percentile(values, ps))}
+
+def utilization(snap: BookingSnapshot, lo: int, hi: int, ps: list[float],
+                statuses: Iterable[BookingStatus] = OCCUPYING, top: int = 10) -> dict:
+    """
+    Percentiles of utilization (booked time over time in range) across services over [lo, hi),
+    and across service-days, which shows peaks a whole-range figure averages away. `lo` and
+    `hi` must fall on UTC midnights.
+    """
+    days = (hi - lo) // DAY
+    n = len(snap.services)
+    if n * days > MAX_CELLS:
+        raise ValueError(f"{n} services × {days} days exceeds {MAX_CELLS} cells; narrow the range")
+    mask = snap.select(lo, hi, statuses)
+    row = np.searchsorted(snap.services, snap.service_id[mask])
+    per_day = busy_seconds(snap.start[mask], snap.end[mask], lo, hi, DAY, group=row, groups=n) / DAY
+    per_service = per_day.mean(axis=1) if days else np.zeros(n)
+    busiest = np.argsort(-per_service, kind="stable")[:top]
+    return {
+        "services": n,
+        "days": int(days),
+        "bookings": int(mask.sum()),
+        "mean": round(float(per_service.mean()), 4) if n else None,
+        "per_service": _percentiles(per_service, ps),
+        "per_service_day": _percentiles(per_day.ravel(), ps),
+        "busiest": [
+            {"service_id": int(snap.services[i]), "utilization": round(float(per_service[i]), 4)}
+            for i in busiest
+        ],
+    }
+
+def _reader():
+    # The full scan goes to a replica when one is configured
+    from app.db.session import AsyncSessionLocal, replicas
+    for i in replicas.candidates():
+        return replicas.sessionmakers[i]
+    return AsyncSessionLocal
+
+class OccupancySnapshots:
+    """
+    This worker's current BookingSnapshot, reloaded in the background every `interval` seconds.
+    Every worker that runs it scans all bookings and holds its own copy.
+    """
+
+    def __init__(self, interval: float, partition_size: int):
+        self.interval = interval
+        self.partition_size = partition_size
+        self.snapshot: BookingSnapshot | None = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: str | None = None
+
+    async def refresh(self, session_factory=None) -> BookingSnapshot:
+        async with (session_factory or _reader())() as session:
+            snap = await load_snapshot(session, self.partition_size)
+        self.snapshot = snap
+        self.refreshes += 1
+        logger.info("occupancy_snapshot_loaded", rows=snap.rows, bytes=snap.nbytes, duration_ms=snap.load_ms)
+        return snap
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning("occupancy_snapshot_failed", error=str(e), retry_in_s=self.interval)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        snap = self.snapshot
+        return {
+            "loaded_at": snap.loaded_at.isoformat() if snap else None,
+            "rows": snap.rows if snap else 0,
+            "services": len(snap.services) if snap else 0,
+            "bytes": snap.nbytes if snap else 0,
+            "load_ms": snap.load_ms if snap else None,
+            "refresh_interval_s": self.interval,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+snapshots = OccupancySnapshots(settings.occupancy_refresh_interval, settings.occupancy_load_batch)
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.outbox_event import OutboxEvent
+from app.repositories.outbox_repo import OutboxRepo
+
+PURGE_INTERVAL = 600  # seconds between deletes of events past OUTBOX_RETENTION
+
+async def record(session: AsyncSession, event_type: str, aggregate_id: int, user_id: int | None, data: BaseModel | dict) -> None:
+    """Queue `<aggregate>.<action>` in the session's transaction, so it commits or rolls back with the change."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    await OutboxRepo(session).add(
+        event_type=event_type,
+        aggregate=event_type.split(".", 1)[0],
+        aggregate_id=aggregate_id,
+        user_id=user_id,
+        data=data,
+    )
+
+def event_dict(e: OutboxEvent) -> dict:
+    """The wire form of an event, shared by sinks and the change feed."""
+    return {
+        "id": e.id,
+        "type": e.event_type,
+        "aggregate_id": e.aggregate_id,
+        "occurred_at": e.created_at.isoformat() if e.created_at else None,
+        "data": e.data,
+    }
+
+class OutboxSink:
+    """A destination for relayed events. Raising leaves the batch unpublished to be retried."""
+
+    name = "sink"
+
+    async def publish(self, events: list[dict]) -> None:
+        raise NotImplementedError
+
+class WebhookSink(OutboxSink):
+    """POSTs each batch as `{"events": [...]}`; any non-2xx answer fails the batch."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, body: bytes) -> None:
+        req = urllib.request.Request(self.url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+    async def publish(self, events: list[dict]) -> None:
+        # urlopen raises HTTPError for non-2xx responses
+        await asyncio.to_thread(self._post, json.dumps({"events": events}).encode("utf-8"))
+
+class FileSink(OutboxSink):
+    """Appends one JSON line per event."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def publish(self, events: list[dict]) -> None:
+        await asyncio.to_thread(self._append, "".join(json.dumps(e) + "\n" for e in events))
+
+class InProcessSink(OutboxSink):
+    """
+    Hands events to coroutines registered with `subscribe()` in this worker. Every worker's relay
+    follows the whole change feed for it, so a subscriber sees all events, not just the batches its
+    own worker happens to deliver.
+    """
+
+    name = "in_process"
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, handler) -> None:
+        self.subscribers.append(handler)
+
+    def unsubscribe(self, handler) -> None:
+        self.subscribers.remove(handler)
+
+    async def publish(self, events: list[dict]) -> None:
+        for handler in list(self.subscribers):
+            await handler(events)
+
+subscribers = InProcessSink()
+
+def configured_sinks() -> list[OutboxSink]:
+    """The sinks each event goes to once across all workers; `subscribers` is fed per worker instead."""
+    sinks: list[OutboxSink] = []
+    if settings.outbox_webhook_url:
+        sinks.append(WebhookSink(settings.outbox_webhook_url, settings.outbox_webhook_timeout))
+    if settings.outbox_file:
+        sinks.append(FileSink(settings.outbox_file))
+    return sinks
+
+class OutboxRelay:
+    """
+    Moves committed events on, in short transactions that are never held open while a sink runs:
+
+    - numbers them for the change feed in commit order (one relay at a time, see OutboxRepo.assign_sequence);
+    - claims a batch of numbered events, commits, sends it to every sink, then marks it published.
+      Delivery is at least once: a relay that dies before marking leaves the claim to expire and the
+      batch is sent again, so consumers de-duplicate on the event id;
+    - follows the numbered events from where this worker started and hands them to `local`.
+
+    Polls that find nothing to do only read, so on SQLite an idle relay never takes the write lock.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        sinks: list[OutboxSink],
+        batch_size: int,
+        poll_interval: float,
+        *,
+        read_session_factory=None,
+        local: InProcessSink | None = None,
+        claim_seconds: float = 60,
+    ):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.sinks = sinks
+        self.local = local
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.claim_seconds = claim_seconds
+        self._last_purge = 0.0
+        # Feed position handed to `local` so far; None until the first poll
+        self._followed: int | None = None
+
+    async def relay_once(self) -> int:
+        """One pass of every step; the largest batch any of them handled."""
+        if self.local is not None and self._followed is None:
+            async with self.read_session_factory() as session:
+                self._followed = await OutboxRepo(session).last_seq()
+        async with self.read_session_factory() as session:
+            busy = await OutboxRepo(session).has_work(now=datetime.now(timezone.utc), deliver=bool(self.sinks))
+        numbered = await self.sequence() if busy else 0
+        delivered = await self.deliver() if busy else 0
+        followed = await self.follow()
+        return max(numbered, delivered, followed)
+
+    async def sequence(self) -> int:
+        # With no sinks to deliver to, an event is published as soon as it is numbered
+        published_at = None if self.sinks else datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            n = await OutboxRepo(session).assign_sequence(self.batch_size, published_at=published_at)
+            await session.commit()
+        return n
+
+    async def deliver(self) -> int:
+        if not self.sinks:
+            return 0
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            batch = await OutboxRepo(session).claim(self.batch_size, now=now, until=now + timedelta(seconds=self.claim_seconds))
+            await session.commit()
+        if not batch:
+            return 0
+        ids = [e.id for e in batch]
+        events = [event_dict(e) for e in batch]
+        try:
+            for sink in self.sinks:
+                await sink.publish(events)
+        except Exception:
+            # Hand the batch straight back rather than leaving it until the claim expires
+            async with self.session_factory() as session:
+                await OutboxRepo(session).release(ids)
+                await session.commit()
+            raise
+        async with self.session_factory() as session:
+            await OutboxRepo(session).mark_published(ids, datetime.now(timezone.utc))
+            await session.commit()
+        return len(events)
+
+    async def follow(self) -> int:
+        if self.local is None:
+            return 0
+        async with self.read_session_factory() as session:
+            batch = await OutboxRepo(session).after(self._followed, self.batch_size)
+        if batch:
+            self._followed = batch[-1].seq
+            if self.local.subscribers:
+                await self.local.publish([event_dict(e) for e in batch])
+        return len(batch)
+
+    async def purge(self) -> int:
+        if settings.outbox_retention <= 0:
+            return 0
+        before = datetime.now(timezone.utc) - timedelta(seconds=settings.outbox_retention)
+        async with self.session_factory() as session:
+            n = await OutboxRepo(session).purge_published(before, self.batch_size * 10)
+            await session.commit()
+        return n
+
+    async def run(self) -> None:
+        backoff = self.poll_interval
+        while True:
+            try:
+                n = await self.relay_once()
+                backoff = self.poll_interval
+                if n == self.batch_size:
+                    # More waiting; go straight on to the next batch
+                    continue
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+                    self._last_purge = time.monotonic()
+                    purged = await self.purge()
+                    if purged:
+                        logger.info("outbox_events_purged", count=purged)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("outbox_relay_failed", error=str(e), retry_in_s=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            await asyncio.sleep(self.poll_interval)
+
+def build_relay() -> OutboxRelay:
+    from app.db.session import AsyncSessionLocal, PrimaryReadSessionLocal
+    return OutboxRelay(
+        AsyncSessionLocal,
+        configured_sinks(),
+        settings.outbox_batch_size,
+        settings.outbox_poll_interval,
+        # Polls read without taking SQLite's write lock
+        read_session_factory=PrimaryReadSessionLocal,
+        local=subscribers,
+        # Long enough for every sink to time out once before another relay may take the batch over
+        claim_seconds=max(60, 2 * settings.outbox_webhook_timeout),
+    )
@@ -0,0 +1,157 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING
+from app.core.logging import logger
+
+if TYPE_CHECKING:
+    # Imported when profiling starts; most workers never need them
+    import cProfile
+    import pstats
+
+MAX_DEPTH = 128
+NO_REQUEST = "<no request>"
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _request_route(frame) -> str | None:
+    # ASGI middleware frames hold the request scope; the router fills in scope["route"]
+    if frame.f_code.co_name != "__call__" or "scope" not in frame.f_code.co_varnames:
+        return None
+    scope = frame.f_locals.get("scope")
+    if not isinstance(scope, dict) or scope.get("type") != "http":
+        return None
+    route = getattr(scope.get("route"), "path", None)
+    return f"{scope.get('method')} {route or scope.get('path')}"
+
+class Profiler:
+    """
+    On-demand profiler for this worker, stopped after N requests or T seconds.
+
+    `sample` mode runs a background thread that snapshots the event loop thread's stack every
+    interval and attributes each sample to the request whose middleware frame is on it, giving
+    per-route collapsed stacks. `cprofile` mode traces every call; cProfile cannot tell interleaved
+    coroutines apart, so its stats cover all routes together. Nothing runs while inactive.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.mode: str | None = None
+        self.started_at: float | None = None
+        self.stopped_at: float | None = None
+        self.max_requests = 0
+        self.requests = 0
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self._interval = 0.005
+        self._target_thread: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._cprofile: "cProfile.Profile | None" = None
+        self._stats: "pstats.Stats | None" = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    def start(self, mode: str, requests: int = 0, seconds: float = 0, interval_ms: float = 5) -> None:
+        if self.active:
+            raise RuntimeError("profiler already running")
+        self.mode, self.max_requests, self.requests = mode, requests, 0
+        self.samples, self._stats = Counter(), None
+        self.started_at, self.stopped_at = time.time(), None
+        if seconds:
+            self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        if mode == "sample":
+            self._interval = interval_ms / 1000
+            self._target_thread = threading.get_ident()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self._thread.start()
+        else:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self.active = True
+        logger.info("profiler_started", mode=mode, requests=requests, seconds=seconds, pid=os.getpid())
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            import pstats
+            self._stats = pstats.Stats(self._cprofile)
+            self._cprofile = None
+        self.stopped_at = time.time()
+        logger.info("profiler_stopped", mode=self.mode, requests=self.requests, samples=sum(self.samples.values()), pid=os.getpid())
+
+    def request_finished(self) -> None:
+        self.requests += 1
+        if self.max_requests and self.requests >= self.max_requests:
+            self.stop()
+
+    def _sample_loop(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    def _collapse(self, frame) -> tuple[str, ...]:
+        stack: list[str] = []
+        route = None
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(_frame_label(frame.f_code))
+            # Keep the outermost match: inner middlewares see the same scope
+            route = _request_route(frame) or route
+            frame = frame.f_back
+        stack.append(route or NO_REQUEST)
+        return tuple(reversed(stack))
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, one `route;outer;...;inner count` line per stack."""
+        # Copy first: the sampler thread may still be adding stacks
+        samples = Counter(dict(self.samples))
+        return "\n".join(f"{';'.join(stack)} {n}" for stack, n in samples.most_common()) + "\n"
+
+    def pstats_text(self, limit: int = 50) -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """Raw stats in the `.prof` format snakeviz and pstats.Stats(path) load."""
+        import marshal
+        return marshal.dumps(self._stats.stats) if self._stats is not None else b""
+
+    def status(self) -> dict:
+        per_route = Counter()
+        samples = dict(self.samples)
+        for stack, n in samples.items():
+            per_route[stack[0]] += n
+        return {
+            "pid": os.getpid(),
+            "active": self.active,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "requests": self.requests,
+            "max_requests": self.max_requests,
+            "samples": sum(samples.values()),
+            "samples_per_route": dict(per_route.most_common()),
+            "has_stats": self._stats is not None,
+        }
+
+profiler = Profiler()
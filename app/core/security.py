@@ -1,7 +1,14 @@
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.timing import segment
+from typing import TYPE_CHECKING
+import asyncio
 import logging
 
+if TYPE_CHECKING:
+    # concurrent.futures.process pulls in multiprocessing; only bulk registration needs it
+    from concurrent.futures import ProcessPoolExecutor
+
 # Configure bcrypt with specific parameters to avoid version detection issues
 pwd_context = CryptContext(
     schemes=["bcrypt"], 
@@ -13,6 +20,9 @@ pwd_context = CryptContext(
 
 logger = logging.getLogger(__name__)
 
+# Lazily created so worker processes are only forked when bulk hashing is used
+_hash_pool: "ProcessPoolExecutor | None" = None
+
 def _truncate_password(password: str) -> str:
     """
     Truncate password to 72 bytes to comply with bcrypt limitations.
@@ -47,7 +57,8 @@ def hash_password(password: str) -> str:
     truncated_password = _truncate_password(password)
     
     try:
-        return pwd_context.hash(truncated_password)
+        with segment("hash"):
+            return pwd_context.hash(truncated_password)
     except Exception as e:
         logger.error(f"Error hashing password: {e}")
         raise ValueError("Failed to hash password")
@@ -63,7 +74,29 @@ def verify_password(password: str, hashed: str) -> bool:
     truncated_password = _truncate_password(password)
     
     try:
-        return pwd_context.verify(truncated_password, hashed)
+        with segment("hash"):
+            return pwd_context.verify(truncated_password, hashed)
     except Exception as e:
         logger.error(f"Error verifying password: {e}")
         return False
+
+def _get_hash_pool() -> "ProcessPoolExecutor":
+    global _hash_pool
+    if _hash_pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.hash_workers or None)
+    return _hash_pool
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Hash many passwords in parallel across a process pool, keeping bcrypt off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_hash_pool()
+    return list(await asyncio.gather(*(loop.run_in_executor(pool, hash_password, p) for p in passwords)))
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
@@ -0,0 +1,128 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from prometheus_client import Counter as PromCounter
+from app.core.cache import MarkedRoutes, reads_primary, request_key
+from app.core.config import settings
+
+SINGLEFLIGHT = PromCounter(
+    "bookit_singleflight_requests_total",
+    "Coalescable reads by outcome: leader ran the query, coalesced shared its response, fallback ran its own",
+    ["route", "outcome"],
+)
+
+def coalesced(endpoint):
+    """Mark a GET endpoint whose identical concurrent requests may share one response."""
+    endpoint.__coalesced__ = True
+    return endpoint
+
+@dataclass
+class SharedResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+class SingleFlight:
+    """
+    Per-worker registry of in-flight reads. The first request for a key (the leader) runs;
+    requests arriving while it runs wait for its response instead of querying again.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.counts: Counter[str] = Counter()
+
+    def join(self, key: str) -> tuple[asyncio.Future, bool]:
+        """The key's in-flight future, and whether the caller is its leader."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        return future, True
+
+    def finish(self, key: str, future: asyncio.Future, response: SharedResponse | None) -> None:
+        """Hand the leader's response to waiters; None (failure) sends each of them to run on its own."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.done():
+            future.set_result(response)
+
+    async def wait(self, future: asyncio.Future) -> SharedResponse | None:
+        try:
+            # Shielded so one waiter timing out does not cancel the future for the others
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def count(self, route: str, outcome: str) -> None:
+        self.counts[outcome] += 1
+        SINGLEFLIGHT.labels(route, outcome).inc()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "timeout_s": self.timeout,
+            "leaders": self.counts["leader"],
+            "coalesced": self.counts["coalesced"],
+            "timeouts": self.counts["timeout"],
+            "fallbacks": self.counts["fallback"],
+        }
+
+singleflight = SingleFlight(timeout=settings.singleflight_timeout)
+
+class SingleFlightMiddleware:
+    """
+    Pure ASGI middleware coalescing identical concurrent GETs to `@coalesced` endpoints. Waiters
+    get the leader's status, headers and body; if the leader fails (exception, 5xx, disconnect)
+    or takes longer than SINGLEFLIGHT_TIMEOUT, each waiter runs the request itself. Requests
+    pinned to the primary never join, since the leader may have read a lagging replica.
+    """
+
+    def __init__(self, app, group: SingleFlight = singleflight):
+        self.app = app
+        self.group = group
+        self.routes = MarkedRoutes("__coalesced__")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or self.group.timeout <= 0:
+            await self.app(scope, receive, send)
+            return
+        route, child_scope = self.routes.match(scope)
+        if route is None or reads_primary(scope):
+            await self.app(scope, receive, send)
+            return
+
+        key = request_key(scope)
+        future, leader = self.group.join(key)
+        if not leader:
+            shared = await self.group.wait(future)
+            if shared is not None:
+                self.group.count(route.path, "coalesced")
+                # Lets the metrics and access log label the response with its route template
+                scope.update(child_scope)
+                await send({"type": "http.response.start", "status": shared.status, "headers": shared.headers})
+                await send({"type": "http.response.body", "body": shared.body})
+                return
+            self.group.count(route.path, "timeout" if not future.done() else "fallback")
+            await self.app(scope, receive, send)
+            return
+
+        self.group.count(route.path, "leader")
+        start: dict = {}
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, receive, capture)
+            if start and start["status"] < 500:
+                response = SharedResponse(start["status"], list(start.get("headers", [])), b"".join(chunks))
+        finally:
+            self.group.finish(key, future, response)
@@ -0,0 +1,137 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.logging import logger, request_scope
+from app.core.profiling import profiler
+
+@dataclass
+class RequestTimings:
+    db_queries: int = 0
+    db_s: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    segments: dict[str, float] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.segments[name] = self.segments.get(name, 0.0) + seconds
+
+    def repeated_statements(self) -> list[tuple[str, int]]:
+        """Statements run often enough in one request to look like an N+1 loop."""
+        threshold = settings.n_plus_one_threshold
+        if threshold <= 0:
+            return []
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+    def server_timing(self, total_s: float) -> str:
+        parts = [f'db;dur={self.db_s * 1000:.2f};desc="{self.db_queries} queries"']
+        parts += [f"{name};dur={s * 1000:.2f}" for name, s in self.segments.items()]
+        parts.append(f"total;dur={total_s * 1000:.2f}")
+        return ", ".join(parts)
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+@contextmanager
+def segment(name: str):
+    """Time a block into the current request's Server-Timing; a no-op outside a request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    # Statements run in SQLAlchemy's greenlet bridge, which carries the request's context over
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        start = getattr(context, "_timing_start", None)
+        if timings is None or start is None:
+            return
+        timings.db_queries += 1
+        timings.db_s += time.perf_counter() - start
+        timings.statements[statement] += 1
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that reports encoding time as the `serialize` segment."""
+
+    def render(self, content) -> bytes:
+        with segment("serialize"):
+            return super().render(content)
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware: collects per-request DB/segment timings, adds Server-Timing and logs an access line."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+        scope_token = request_scope.set(scope)
+        start = time.perf_counter()
+        status = 500
+        # Only requests that started while profiling count towards its request budget
+        profiled = profiler.active
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing:
+                    header = timings.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            request_scope.reset(scope_token)
+            self._log(scope, status, time.perf_counter() - start, timings)
+            if profiled and profiler.active:
+                profiler.request_finished()
+
+    def _log(self, scope, status: int, duration_s: float, timings: RequestTimings) -> None:
+        path = _route_path(scope)
+        logger.info(
+            "request",
+            method=scope["method"],
+            path=path,
+            status=status,
+            duration_ms=round(duration_s * 1000, 2),
+            db_queries=timings.db_queries,
+            db_ms=round(timings.db_s * 1000, 2),
+            **{f"{name}_ms": round(s * 1000, 2) for name, s in timings.segments.items()},
+        )
+        for statement, count in timings.repeated_statements():
+            logger.warning(
+                "n_plus_one_suspected",
+                method=scope["method"],
+                path=path,
+                count=count,
+                statement=" ".join(statement.split())[:300],
+            )
@@ -1,4 +1,9 @@
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
     pass
+
+def dialect_insert(session):
+    """The session dialect's insert(), which supports ON CONFLICT on Postgres and SQLite."""
+    return postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
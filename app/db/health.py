@@ -0,0 +1,112 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+
+ROOT = Path(__file__).resolve().parents[2]
+REQUIRED_TABLES = ("users", "services", "bookings", "reviews", "idempotency_keys", "outbox_events", "service_daily_stats")
+
+@dataclass
+class SchemaStatus:
+    checked: bool = False
+    checked_at: float = 0.0  # time.monotonic() of the last check
+    missing_tables: list[str] = field(default_factory=list)
+    db_revision: str | None = None
+    head_revisions: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.checked and not self.error and not self.missing_tables and self.up_to_date
+
+    @property
+    def up_to_date(self) -> bool:
+        # Nothing to compare when there is no migrations directory, or the schema was
+        # created without Alembic (e.g. metadata.create_all in tests)
+        if not self.head_revisions or self.db_revision is None:
+            return True
+        return self.db_revision in self.head_revisions
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "missing_tables": self.missing_tables,
+            "db_revision": self.db_revision,
+            "head_revisions": self.head_revisions,
+            "error": self.error,
+        }
+
+# Populated at startup; /readyz re-checks while it is not ok
+schema_status = SchemaStatus()
+
+def _alembic_heads() -> list[str]:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "app" / "db" / "migrations"))
+    return list(ScriptDirectory.from_config(cfg).get_heads())
+
+def _inspect_schema(conn) -> tuple[list[str], str | None]:
+    tables = set(inspect(conn).get_table_names())
+    missing = [t for t in REQUIRED_TABLES if t not in tables]
+    revision = None
+    if "alembic_version" in tables:
+        revision = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    return missing, revision
+
+async def verify_schema(engine: AsyncEngine) -> SchemaStatus:
+    """Check tables and migration version; works on any dialect SQLAlchemy can inspect."""
+    schema_status.checked_at = time.monotonic()
+    try:
+        async with engine.connect() as conn:
+            missing, revision = await conn.run_sync(_inspect_schema)
+        schema_status.missing_tables = missing
+        schema_status.db_revision = revision
+        schema_status.error = None
+        try:
+            schema_status.head_revisions = _alembic_heads()
+        except Exception:
+            schema_status.head_revisions = []
+    except Exception as e:
+        schema_status.error = str(e)
+    schema_status.checked = True
+    return schema_status
+
+class DatabasePing:
+    """`SELECT 1` against the primary, cached for a short TTL so frequent probes cost one query per window."""
+
+    def __init__(self, ttl: float, timeout: float):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: dict | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def check(self, engine: AsyncEngine) -> dict:
+        if self._fresh():
+            return {**self._result, "cached": True}
+        async with self._lock:
+            # Another probe may have refreshed the result while we waited
+            if self._fresh():
+                return {**self._result, "cached": True}
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._ping(engine), self.timeout)
+                result = {"ok": True}
+            except Exception as e:
+                result = {"ok": False, "error": str(e) or type(e).__name__}
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._result, self._checked_at = result, time.monotonic()
+            return {**result, "cached": False}
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < self.ttl
+
+    async def _ping(self, engine: AsyncEngine):
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+db_ping = DatabasePing(ttl=settings.readiness_ttl_seconds, timeout=settings.readiness_timeout_seconds)
@@ -25,6 +25,9 @@ from app.models.user import User
 from app.models.service import Service
 from app.models.booking import Booking
 from app.models.review import Review
+from app.models.idempotency_key import IdempotencyKey
+from app.models.outbox_event import OutboxEvent
+from app.models.service_daily_stats import ServiceDailyStats
 
 target_metadata = Base.metadata
 
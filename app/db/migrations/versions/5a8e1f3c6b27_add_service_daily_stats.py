@@ -0,0 +1,44 @@
+"""add_service_daily_stats
+
+Revision ID: 5a8e1f3c6b27
+Revises: c41d7e2b9a08
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8e1f3c6b27'
+down_revision = 'c41d7e2b9a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'service_daily_stats' in inspector.get_table_names():
+        return
+    op.create_table('service_daily_stats',
+        sa.Column('service_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('pending', sa.Integer(), nullable=False),
+        sa.Column('confirmed', sa.Integer(), nullable=False),
+        sa.Column('cancelled', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.Column('booked_minutes', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('service_id', 'day')
+    )
+    op.create_index('ix_service_daily_stats_day', 'service_daily_stats', ['day'], unique=False)
+    # Existing bookings are counted by running: python -m app.db.rollups
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'service_daily_stats' not in inspector.get_table_names():
+        return
+    op.drop_index('ix_service_daily_stats_day', table_name='service_daily_stats')
+    op.drop_table('service_daily_stats')
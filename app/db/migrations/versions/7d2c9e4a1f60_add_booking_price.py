@@ -0,0 +1,36 @@
+"""add_booking_price
+
+Revision ID: 7d2c9e4a1f60
+Revises: 5a8e1f3c6b27
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2c9e4a1f60'
+down_revision = '5a8e1f3c6b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'price' in {c['name'] for c in inspector.get_columns('bookings')}:
+        return
+    op.add_column('bookings', sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True))
+    # Existing bookings take the price their service has now
+    op.execute(
+        "UPDATE bookings SET price = (SELECT services.price FROM services WHERE services.id = bookings.service_id) "
+        "WHERE price IS NULL"
+    )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'price' not in {c['name'] for c in inspector.get_columns('bookings')}:
+        return
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_column('price')
@@ -0,0 +1,45 @@
+"""add_outbox_events
+
+Revision ID: c41d7e2b9a08
+Revises: 9f3c2a7d1e45
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2b9a08'
+down_revision = '9f3c2a7d1e45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'outbox_events' in inspector.get_table_names():
+        return
+    op.create_table('outbox_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('aggregate', sa.String(length=20), nullable=False),
+        sa.Column('aggregate_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_unpublished', 'outbox_events', ['id'], unique=False,
+                    postgresql_where=sa.text('published_at IS NULL'), sqlite_where=sa.text('published_at IS NULL'))
+    op.create_index('ix_outbox_events_aggregate_user', 'outbox_events', ['aggregate', 'user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'outbox_events' not in inspector.get_table_names():
+        return
+    op.drop_index('ix_outbox_events_aggregate_user', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_unpublished', table_name='outbox_events')
+    op.drop_table('outbox_events')
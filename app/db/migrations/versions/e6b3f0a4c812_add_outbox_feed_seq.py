@@ -0,0 +1,44 @@
+"""add_outbox_feed_seq
+
+Revision ID: e6b3f0a4c812
+Revises: 7d2c9e4a1f60
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3f0a4c812'
+down_revision = '7d2c9e4a1f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'seq' in {c['name'] for c in inspector.get_columns('outbox_events')}:
+        return
+    op.add_column('outbox_events', sa.Column('seq', sa.BigInteger(), nullable=True))
+    op.add_column('outbox_events', sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True))
+    # Every existing event has committed, so its id is already a safe feed position
+    op.execute("UPDATE outbox_events SET seq = id")
+    op.drop_index('ix_outbox_events_aggregate_user', table_name='outbox_events')
+    op.create_index('ix_outbox_events_aggregate_user_seq', 'outbox_events', ['aggregate', 'user_id', 'seq'], unique=False)
+    op.create_index('ix_outbox_events_seq', 'outbox_events', ['seq'], unique=True)
+    op.create_index('ix_outbox_events_unsequenced', 'outbox_events', ['id'], unique=False,
+                    postgresql_where=sa.text('seq IS NULL'), sqlite_where=sa.text('seq IS NULL'))
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'seq' not in {c['name'] for c in inspector.get_columns('outbox_events')}:
+        return
+    op.drop_index('ix_outbox_events_unsequenced', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_seq', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_aggregate_user_seq', table_name='outbox_events')
+    op.create_index('ix_outbox_events_aggregate_user', 'outbox_events', ['aggregate', 'user_id', 'id'], unique=False)
+    with op.batch_alter_table('outbox_events') as batch_op:
+        batch_op.drop_column('claimed_until')
+        batch_op.drop_column('seq')
@@ -0,0 +1,88 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+from app.core.config import settings
+from app.core.logging import logger
+
+# Seconds the current checkout has spent blocked on the pool queue, per task
+_slot_wait: ContextVar[float] = ContextVar("db_pool_slot_wait", default=0.0)
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    slow_checkouts: int = 0
+    wait_total_s: float = 0.0
+    wait_max_s: float = 0.0
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """Pool queue that adds the time blocking gets spend waiting for a returned connection to `_slot_wait`."""
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        if not block:
+            return super().get(block, timeout)
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            _slot_wait.set(_slot_wait.get() + time.perf_counter() - start)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait for a free slot when the pool is exhausted.
+    Opening a new connection and pre-ping are not counted: they are connect cost, not queueing.
+    """
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.stats = PoolStats()
+
+    def connect(self):
+        token = _slot_wait.set(0.0)
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self._record_wait(_slot_wait.get())
+            self.stats.timeouts += 1
+            logger.warning("db_pool_checkout_timeout", timeout_s=self._timeout, **self.status_dict())
+            raise
+        else:
+            wait = self._record_wait(_slot_wait.get())
+        finally:
+            _slot_wait.reset(token)
+        if wait * 1000 >= settings.db_pool_wait_warn_ms:
+            self.stats.slow_checkouts += 1
+            logger.warning("db_pool_slow_checkout", wait_ms=round(wait * 1000, 2), **self.status_dict())
+        return conn
+
+    def _record_wait(self, wait: float) -> float:
+        self.stats.checkouts += 1
+        self.stats.wait_total_s += wait
+        self.stats.wait_max_s = max(self.stats.wait_max_s, wait)
+        return wait
+
+    def status_dict(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+        }
+
+    def metrics(self) -> dict:
+        s = self.stats
+        return {
+            **self.status_dict(),
+            "timeout_s": self._timeout,
+            "checkouts": s.checkouts,
+            "checkout_timeouts": s.timeouts,
+            "slow_checkouts": s.slow_checkouts,
+            "wait_avg_ms": round(s.wait_total_s / s.checkouts * 1000, 3) if s.checkouts else 0.0,
+            "wait_max_ms": round(s.wait_max_s * 1000, 3),
+        }
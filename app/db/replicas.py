@@ -0,0 +1,59 @@
+import time
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from app.core.logging import logger
+
+# Upper bound on remembered read-your-writes pins before expired ones are pruned
+MAX_PINS = 10_000
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping ones recently seen failing."""
+
+    def __init__(self, engines: list[AsyncEngine], eject_seconds: float, pin_seconds: float):
+        self.engines = engines
+        self.sessionmakers = [async_sessionmaker(e, expire_on_commit=False) for e in engines]
+        self.eject_seconds = eject_seconds
+        self.pin_seconds = pin_seconds
+        self._next = 0
+        self._ejected_until = [0.0] * len(engines)
+        self._pins: dict[str, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def candidates(self) -> list[int]:
+        """Healthy replica indexes, starting from the next one in rotation."""
+        n = len(self.engines)
+        start = self._next
+        self._next = (self._next + 1) % n
+        now = time.monotonic()
+        return [i % n for i in range(start, start + n) if self._ejected_until[i % n] <= now]
+
+    def eject(self, i: int, error: Exception) -> None:
+        self._ejected_until[i] = time.monotonic() + self.eject_seconds
+        logger.warning("db_replica_ejected", replica=i, seconds=self.eject_seconds, error=str(error))
+
+    def pin(self, key: str | None) -> None:
+        if not key:
+            return
+        now = time.monotonic()
+        if len(self._pins) >= MAX_PINS:
+            self._pins = {k: t for k, t in self._pins.items() if t > now}
+        self._pins[key] = now + self.pin_seconds
+
+    def is_pinned(self, key: str | None) -> bool:
+        if not key:
+            return False
+        until = self._pins.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._pins.pop(key, None)
+            return False
+        return True
+
+    def status(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {"replica": i, "healthy": until <= now, "ejected_for_s": max(round(until - now, 1), 0)}
+            for i, until in enumerate(self._ejected_until)
+        ]
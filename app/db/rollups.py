@@ -0,0 +1,35 @@
+"""
+Rebuild the service_daily_stats rollup from the bookings table.
+
+    python -m app.db.rollups                              # every day
+    python -m app.db.rollups --from 2026-01-01 --to 2026-01-31
+
+Run it after `alembic upgrade head` first creates the table, or to repair rows after bookings
+were changed outside the API. It works one service at a time, each in its own short
+transaction; on Postgres writes to that service wait for it, and no other writes do.
+"""
+import argparse
+import asyncio
+from datetime import date
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.repositories.stats_repo import ServiceStatsRepo
+
+async def rebuild(start: date | None, end: date | None) -> int:
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await ServiceStatsRepo(session).rebuild(start, end)
+            await session.commit()
+        return rows
+    finally:
+        await dispose_engines()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild per-service daily booking rollups")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first day (UTC), inclusive")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last day (UTC), inclusive")
+    args = parser.parse_args(argv)
+    rows = asyncio.run(rebuild(args.start, args.end))
+    print(f"Rebuilt {rows} service-day rows")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,127 @@
+import math
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.timing import instrument_engine
+from app.db.pool import InstrumentedQueuePool
+from app.db.replicas import ReplicaSet
+from app.db.slow_queries import slow_queries
+from app.db.sqlite import create_sqlite_engines, is_sqlite_file
 
-engine = create_async_engine(settings.db_url_async, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+def _engine_kwargs(url: str) -> dict:
+    kwargs: dict = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.startswith("sqlite"):
+        # In-memory databases keep the dialect's StaticPool; files use create_sqlite_engines
+        return kwargs
+    kwargs.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    if url.startswith("postgresql+asyncpg"):
+        connect_args: dict = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+        if settings.db_statement_cache_size == 0:
+            # Also disable asyncpg's own cache, e.g. behind pgbouncer in transaction mode
+            connect_args["statement_cache_size"] = 0
+        if settings.db_command_timeout:
+            connect_args["command_timeout"] = settings.db_command_timeout
+        kwargs["connect_args"] = connect_args
+    return kwargs
 
-async def get_session():
+class PrimarySession(Session):
+    """Session bound to the primary; commits pin the caller to the primary for a short while."""
+
+if is_sqlite_file(settings.db_url_async):
+    # Single-node profile: one writer connection, reads served by a pool of query-only readers.
+    # WAL readers see every committed write, so there is nothing to pin after a commit.
+    engine, _sqlite_reader = create_sqlite_engines(settings.db_url_async)
+    replicas = ReplicaSet([_sqlite_reader], eject_seconds=settings.db_replica_eject_seconds, pin_seconds=0)
+else:
+    engine = create_async_engine(settings.db_url_async, **_engine_kwargs(settings.db_url_async))
+    replicas = ReplicaSet(
+        [create_async_engine(url, **_engine_kwargs(url)) for url in settings.db_replica_urls],
+        eject_seconds=settings.db_replica_eject_seconds,
+        pin_seconds=settings.read_your_writes_seconds,
+    )
+
+for _e in (engine, *replicas.engines):
+    instrument_engine(_e)
+    # The SQLite writer is a single connection the app is waiting on; plan its statements on a reader
+    slow_queries.watch(_e, replicas.engines[0] if _e is engine and is_sqlite_file(settings.db_url_async) else None)
+
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=PrimarySession)
+# Reads that must see every commit so far: the primary, or on SQLite a WAL reader, since every
+# transaction on the single writer connection begins by taking the database-wide write lock
+PrimaryReadSessionLocal = replicas.sessionmakers[0] if is_sqlite_file(settings.db_url_async) else AsyncSessionLocal
+
+# Pins live in one worker's memory; this cookie carries a pin to whichever worker serves the next read
+PIN_COOKIE = "bookit_read_primary"
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_after_commit(session: Session):
+    if replicas and replicas.pin_seconds:
+        replicas.pin(session.info.get("pin_key"))
+        response = session.info.get("response")
+        if response is not None:
+            response.set_cookie(PIN_COOKIE, "1", max_age=math.ceil(replicas.pin_seconds), httponly=True, samesite="lax")
+
+def _metrics(pool) -> dict:
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.metrics()
+    return {"status": pool.status()}
+
+def pool_metrics() -> dict:
+    metrics = _metrics(engine.pool)
+    if replicas:
+        metrics["replicas"] = [_metrics(e.pool) for e in replicas.engines]
+    return metrics
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    for e in replicas.engines:
+        await e.dispose()
+
+def _pin_key(request: Request) -> str | None:
+    return request.headers.get("authorization")
+
+async def get_session(request: Request, response: Response):
+    async with AsyncSessionLocal() as session:
+        session.info["pin_key"] = _pin_key(request)
+        session.info["response"] = response
+        yield session
+
+def reads_primary(request: Request) -> bool:
+    """Whether the request must see the primary: X-Read-Primary, or a read-your-writes pin by token or cookie."""
+    if request.headers.get("x-read-primary"):
+        return True
+    return replicas.is_pinned(_pin_key(request)) or PIN_COOKIE in request.cookies
+
+async def get_primary_read_session():
+    """Session for read-only endpoints that must not see replica lag, e.g. login right after registering."""
+    async with PrimaryReadSessionLocal() as session:
+        yield session
+
+async def get_read_session(request: Request):
+    """Session for read-only endpoints: a healthy replica, or the primary when pinned or none are up."""
+    if replicas and not reads_primary(request):
+        for i in replicas.candidates():
+            async with replicas.sessionmakers[i]() as session:
+                try:
+                    await session.connection()
+                except (DBAPIError, OSError) as e:
+                    replicas.eject(i, e)
+                    continue
+                try:
+                    yield session
+                except DBAPIError as e:
+                    if e.connection_invalidated:
+                        replicas.eject(i, e)
+                    raise
+                return
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import json
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.logging import logger
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = r"(?:\?|%s|\$\d+|:\w+|%\(\w+\)s)"
+# IN (?, ?, ?) lists vary with input size; collapse them so equal queries group together
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+
+def normalize_sql(statement: str) -> str:
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _LITERAL.sub("?", sql)
+    return _IN_LIST.sub("(...)", sql)
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def param_shape(parameters, executemany: bool = False):
+    """Types (never values) of the bound parameters, so slow entries can be grouped without leaking data."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "params": param_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: _shape(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(v) for v in parameters]
+    return None
+
+class SlowQueryLog:
+    """
+    Logs statements slower than the threshold and keeps the most recent ones in a ring buffer.
+    A sampled fraction get their plan captured by a background EXPLAIN on a separate connection.
+    """
+
+    def __init__(self, threshold_ms: float, explain_sample: float, size: int):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.entries: deque[dict] = deque(maxlen=size)
+        self.total = 0
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def watch(self, engine: AsyncEngine, explain_engine: AsyncEngine | None = None) -> None:
+        """Time statements on `engine`; plans are captured on `explain_engine`, by default the same engine."""
+        if self.threshold_ms <= 0:
+            return
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._slow_query_start = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            start = getattr(context, "_slow_query_start", None)
+            if start is None:
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self.record(engine, statement, parameters, executemany, elapsed_ms, explain_engine=explain_engine)
+
+    def record(
+        self, engine: AsyncEngine, statement: str, parameters, executemany: bool, duration_ms: float,
+        *, explain_engine: AsyncEngine | None = None,
+    ) -> None:
+        if statement.lstrip().upper().startswith("EXPLAIN"):
+            return
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "sql": normalize_sql(statement),
+            "params": param_shape(parameters, executemany),
+            "dialect": engine.dialect.name,
+            "plan": None,
+        }
+        self.total += 1
+        self.entries.append(entry)
+        logger.warning("slow_query", **{k: v for k, v in entry.items() if k not in ("at", "plan")})
+        if not executemany and self._should_explain(statement):
+            self._schedule_explain(explain_engine or engine, entry, statement, parameters)
+
+    def _should_explain(self, statement: str) -> bool:
+        if self._explaining or self.explain_sample <= 0:
+            return False
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        return keyword in EXPLAINABLE and random.random() < self.explain_sample
+
+    def _schedule_explain(self, engine: AsyncEngine, entry: dict, statement: str, parameters) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explaining = True
+        # Empty context: the EXPLAIN must not count towards the request that triggered it
+        task = loop.create_task(self._explain(engine, entry, statement, parameters), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: dict, statement: str, parameters) -> None:
+        try:
+            async with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    res = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}", parameters)
+                    plan = res.scalar()
+                    entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+                elif engine.dialect.name == "sqlite":
+                    res = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    entry["plan"] = [dict(row._mapping) for row in res]
+                else:
+                    entry["plan_error"] = f"EXPLAIN not supported for {engine.dialect.name}"
+                await conn.rollback()
+        except Exception as e:
+            entry["plan_error"] = str(e) or type(e).__name__
+        finally:
+            self._explaining = False
+
+    def snapshot(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_sample": self.explain_sample,
+            "total": self.total,
+            "entries": list(reversed(self.entries)),
+        }
+
+slow_queries = SlowQueryLog(
+    threshold_ms=settings.slow_query_ms,
+    explain_sample=settings.slow_query_explain_sample,
+    size=settings.slow_query_buffer_size,
+)
@@ -0,0 +1,67 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool
+
+def is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and "mode=memory" not in url
+
+def _pragmas(*, writer: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+        "PRAGMA foreign_keys=ON",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if writer:
+        # journal_mode is persistent in the file; setting it from the writer is enough
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    else:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+def _configure(engine: AsyncEngine, *, writer: bool) -> AsyncEngine:
+    pragmas = _pragmas(writer=writer)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        cur = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cur.execute(pragma)
+        cur.close()
+        if writer:
+            # Take over transaction control so writes can start with BEGIN IMMEDIATE
+            dbapi_conn.isolation_level = None
+
+    if writer:
+        @event.listens_for(engine.sync_engine, "begin")
+        def _on_begin(conn):
+            # Grab the write lock up front: a deferred transaction that upgrades from read to
+            # write fails with SQLITE_BUSY immediately instead of honouring busy_timeout
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+def create_sqlite_engines(url: str) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    A single-writer engine and a reader pool over the same WAL-mode file.
+    WAL lets readers run alongside the writer; one writer connection per process
+    serializes writes in the pool queue instead of in SQLite lock retries.
+    """
+    writer = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    reader = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    return _configure(writer, writer=True), _configure(reader, writer=False)
@@ -0,0 +1,34 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.pool import QueuePool
+from app.repositories.booking_repo import BookingRepo
+from app.repositories.review_repo import ReviewRepo
+from app.repositories.service_repo import ServiceRepo
+from app.repositories.user_repo import UserRepo
+
+async def _hot_reads(session: AsyncSession) -> None:
+    # Ids that match nothing: only statement compilation and preparation are wanted
+    await ServiceRepo(session).by_id(0)
+    await ReviewRepo(session).for_service(0)
+    await BookingRepo(session).by_id(0)
+    await UserRepo(session).by_email("")
+
+async def warm_engine(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open up to `connections` pool connections at once and run the hot read queries on each,
+    filling SQLAlchemy's compiled cache and asyncpg's per-connection prepared statements.
+    Returns how many connections were opened.
+    """
+    pool = engine.pool
+    n = min(connections, pool.size()) if isinstance(pool, QueuePool) else min(connections, 1)
+    if n <= 0:
+        return 0
+    conns = await asyncio.gather(*(engine.connect().start() for _ in range(n)))
+    try:
+        for conn in conns:
+            async with AsyncSession(bind=conn) as session:
+                await _hot_reads(session)
+    finally:
+        # Back to the pool, still open
+        await asyncio.gather(*(conn.close() for conn in conns))
+    return n
@@ -1,24 +1,127 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from app.core.admission import AdmissionMiddleware
+from app.core.availability import hub as availability_hub
+from app.core.cache import ResponseCacheMiddleware, response_cache
 from app.core.config import settings
-from app.core.logging import setup_logging
-from app.routers import auth, users, services, bookings, reviews
-import logging
+from app.core.idempotency import purge_expired_keys
+from app.core.outbox import build_relay
+from app.core.logging import setup_logging, stop_logging, logger as events
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.occupancy import snapshots as occupancy_snapshots
+from app.core.singleflight import SingleFlightMiddleware
+from app.core.timing import RequestTimingMiddleware, TimedJSONResponse
+from app.routers import auth, users, services, bookings, reviews, admin
+from app.db.health import db_ping, schema_status, verify_schema
 import asyncio
-from sqlalchemy import text
+import logging
+import time
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+class _Phases:
+    """Times named startup steps and logs each one, then the total."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = round((time.perf_counter() - start) * 1000, 2)
+            events.info("startup_phase", phase=name, duration_ms=self.durations[name])
+
+    def done(self) -> None:
+        events.info("startup_complete", duration_ms=round((time.perf_counter() - self.start) * 1000, 2), phases=self.durations)
+
+async def _warm_up(app: FastAPI, phases: _Phases, db_ready: bool) -> None:
+    """Pay first-request costs up front: pool connections, statement compilation, bcrypt, JWT, OpenAPI."""
+    from app.core.auth import create_access_token, decode_token
+    from app.core.security import hash_password
+    from app.db.session import engine, replicas
+    from app.db.warmup import warm_engine
+
+    if db_ready:
+        async with phases.phase("db_pool"):
+            try:
+                for e in (engine, *replicas.engines):
+                    await warm_engine(e, settings.db_pool_warm_connections)
+            except Exception as e:
+                logger.warning(f"Connection pool warm-up failed: {e}")
+    async with phases.phase("auth"):
+        # Loads the bcrypt backend off the event loop, and the JWT signer
+        await asyncio.to_thread(hash_password, "warm-up")
+        decode_token(create_access_token("0", "user"))
+    async with phases.phase("openapi"):
+        app.openapi()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.db.session import dispose_engines, engine
+    phases = _Phases()
+
+    async with phases.phase("schema"):
+        # Checked once; readiness probes report the result instead of re-querying it
+        status = await verify_schema(engine)
+    if status.error:
+        logger.error(f"Database initialization failed: {status.error}")
+    elif status.missing_tables:
+        logger.warning(f"Database tables not found ({', '.join(status.missing_tables)}). Please run migrations: alembic upgrade head")
+    elif not status.up_to_date:
+        logger.warning(f"Database at revision {status.db_revision}, expected {', '.join(status.head_revisions)}. Please run migrations: alembic upgrade head")
+    else:
+        logger.info("Database connection successful and tables exist")
+
+    if settings.startup_warmup:
+        await _warm_up(app, phases, db_ready=not status.error and not status.missing_tables)
+    async with phases.phase("background"):
+        await response_cache.start()
+        await availability_hub.start()
+        tasks = [asyncio.create_task(purge_expired_keys())]
+        if settings.outbox_relay:
+            tasks.append(asyncio.create_task(build_relay().run()))
+        if settings.occupancy_snapshot:
+            tasks.append(asyncio.create_task(occupancy_snapshots.run()))
+    phases.done()
+
+    yield
+
+    from app.core.security import shutdown_hash_pool
+    for task in tasks:
+        task.cancel()
+    # Let a relay caught mid-batch roll back and return its connection before the engines go
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_hash_pool()
+    await response_cache.close()
+    await availability_hub.close()
+    await dispose_engines()
+    stop_logging()
+
 app = FastAPI(
     title="BookIt API",
     description="A modern booking service application",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=TimedJSONResponse,
+    lifespan=lifespan,
 )
 
+# Innermost, so cached responses get fresh CORS headers and are still timed and counted;
+# single-flight sits under the cache so only cache misses are coalesced, and admission
+# under single-flight so only requests that will do work take a slot
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(SingleFlightMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +130,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so Server-Timing, metrics and the access line cover the whole request
+app.add_middleware(RequestTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -34,61 +140,48 @@ app.include_router(users.router)
 app.include_router(services.router)
 app.include_router(bookings.router)
 app.include_router(reviews.router)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    try:
-        from app.db.session import engine
-        # Test database connection and ensure tables exist
-        async with engine.begin() as conn:
-            # Check if users table exists
-            result = await conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'users'
-                );
-            """))
-            table_exists = result.scalar()
-            
-            if not table_exists:
-                logger.warning("Database tables not found. Please run migrations: alembic upgrade head")
-            else:
-                logger.info("Database connection successful and tables exist")
-                
-    except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
-        # Don't raise the exception to allow the app to start
-        # The health check will show the database status
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
     return {"message": "BookIt API", "version": "1.0.0"}
 
+@app.get("/livez")
+async def livez():
+    # No I/O: only proves the event loop is serving requests
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    from app.db.session import engine
+    start = time.perf_counter()
+    if not schema_status.checked:
+        # Startup hook did not run (e.g. mounted under another app); verify now
+        await verify_schema(engine)
+    elif not schema_status.ok and time.monotonic() - schema_status.checked_at >= settings.readiness_ttl_seconds:
+        # Database unreachable or not migrated when last checked; look again, at most once per TTL
+        try:
+            await asyncio.wait_for(verify_schema(engine), settings.readiness_timeout_seconds)
+        except asyncio.TimeoutError:
+            schema_status.error = "schema check timed out"
+    db = await db_ping.check(engine)
+    ready = db["ok"] and schema_status.ok
+    body = {
+        "status": "ready" if ready else "unready",
+        "database": db,
+        "schema": schema_status.as_dict(),
+        "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if schema_status.missing_tables or not schema_status.up_to_date:
+        body["message"] = "Run migrations: alembic upgrade head"
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 @app.get("/health")
 async def health_check():
-    try:
-        # Test database connection
-        from app.db.session import engine
-        async with engine.begin() as conn:
-            await conn.execute(text("SELECT 1"))
-            
-            # Check if tables exist
-            result = await conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'users'
-                );
-            """))
-            tables_exist = result.scalar()
-            
-            if tables_exist:
-                return {"status": "healthy", "database": "connected", "tables": "exist"}
-            else:
-                return {"status": "unhealthy", "database": "connected", "tables": "missing", "message": "Run migrations: alembic upgrade head"}
-                
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+    # Kept for existing probes; same as /readyz
+    return await readyz()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, String, func, text, DateTime
+from sqlalchemy import ForeignKey, String, Numeric, func, text, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 from datetime import datetime
@@ -18,6 +18,8 @@ class Booking(Base):
     start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     status: Mapped[str] = mapped_column(String(20), default="pending")
+    # The service's price when the booking was made; what it contributes to revenue
+    price: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # NOTE: range/exclusion constraint created in Alembic migration using tstzrange
@@ -0,0 +1,31 @@
+from sqlalchemy import JSON, BigInteger, Integer, String, func, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+from datetime import datetime
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    # SQLite only autoincrements INTEGER primary keys
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(50))  # e.g. booking.created
+    aggregate: Mapped[str] = mapped_column(String(20))  # booking | review
+    aggregate_id: Mapped[int] = mapped_column(Integer)
+    # Owner of the booking; the change feed shows users only their own
+    user_id: Mapped[int | None] = mapped_column(Integer)
+    data: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # The change feed cursor. Ids are taken when a transaction inserts, not when it commits, so a
+    # cursor over ids could pass an event whose transaction is still open; the relay numbers
+    # events only once they have committed, one relay at a time, so later numbers commit later
+    seq: Mapped[int | None] = mapped_column(BigInteger)
+    # Set while a relay delivers the event to the webhook and file sinks; expires if it dies
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    published_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # The relay's scans stay small however long the table grows
+        Index("ix_outbox_events_unpublished", "id", postgresql_where=published_at.is_(None), sqlite_where=published_at.is_(None)),
+        Index("ix_outbox_events_unsequenced", "id", postgresql_where=seq.is_(None), sqlite_where=seq.is_(None)),
+        Index("ix_outbox_events_seq", "seq", unique=True),
+        Index("ix_outbox_events_aggregate_user_seq", "aggregate", "user_id", "seq"),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Date, ForeignKey, Integer, Numeric, PrimaryKeyConstraint, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+from datetime import date
+
+class ServiceDailyStats(Base):
+    """
+    Per service, per UTC day of booking start: bookings by current status, and the minutes and
+    revenue (each at its booking's recorded price) of those not cancelled. Kept up to date by
+    booking writes; `python -m app.db.rollups` rebuilds it from the bookings table.
+    """
+    __tablename__ = "service_daily_stats"
+    service_id: Mapped[int] = mapped_column(ForeignKey("services.id", ondelete="CASCADE"))
+    day: Mapped[date] = mapped_column(Date)
+    pending: Mapped[int] = mapped_column(Integer, default=0)
+    confirmed: Mapped[int] = mapped_column(Integer, default=0)
+    cancelled: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    booked_minutes: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("service_id", "day"),
+        # Range reads across all services
+        Index("ix_service_daily_stats_day", "day"),
+    )
@@ -1,6 +1,28 @@
-from sqlalchemy import select, func, text
+from collections.abc import AsyncIterator, Sequence
+from sqlalchemy import BigInteger, Integer, select, insert, update, delete, exists, extract, literal, func, text, case, cast, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.booking import Booking, BookingStatus
+from app.models.service import Service
+from app.repositories.stats_repo import BookingSlot
+
+# Hot statements are lambda statements: the Python construct is built once per code path and
+# its cache key is stable, so SQLAlchemy's compiled cache and asyncpg's prepared statements are reused.
+
+ACTIVE_STATUSES = (BookingStatus.pending.value, BookingStatus.confirmed.value)
+# Small-integer status codes for columnar copies, in BookingStatus order; -1 for anything else
+STATUS_CODES = {s.value: i for i, s in enumerate(BookingStatus)}
+
+# SQLite-compatible conflict detection
+# Check for overlapping time ranges: (start1 < end2) AND (end1 > start2)
+CONFLICT_SQL = text("""
+SELECT EXISTS (
+  SELECT 1 FROM bookings
+  WHERE service_id = :sid
+    AND start_time < :end_time
+    AND end_time > :start_time
+    AND status IN ('pending','confirmed')
+) AS conflict
+""")
 
 class BookingRepo:
     def __init__(self, session: AsyncSession):
@@ -11,36 +33,106 @@ class BookingRepo:
         await self.session.flush()
         return b
 
+    async def create_if_free(self, *, user_id: int, service_id: int, start, end) -> Booking | None:
+        """Insert a pending booking unless it overlaps an active one; None on conflict. One INSERT ... SELECT ... RETURNING."""
+        free = ~exists().where(
+            Booking.service_id == service_id,
+            Booking.start_time < end,
+            Booking.end_time > start,
+            Booking.status.in_(ACTIVE_STATUSES),
+        )
+        stmt = insert(Booking).from_select(
+            ["user_id", "service_id", "start_time", "end_time", "status", "price"],
+            select(
+                literal(user_id),
+                literal(service_id),
+                literal(start, Booking.start_time.type),
+                literal(end, Booking.end_time.type),
+                literal(BookingStatus.pending.value),
+                select(Service.price).where(Service.id == service_id).scalar_subquery(),
+            ).where(free),
+        ).returning(Booking)
+        return (await self.session.scalars(stmt)).one_or_none()
+
+    async def update_as_owner(self, bid: int, user_id: int, values: dict) -> Booking | None:
+        """Apply values if the booking belongs to user_id and is still active; None otherwise."""
+        stmt = (
+            update(Booking)
+            .where(Booking.id == bid, Booking.user_id == user_id, Booking.status.in_(ACTIVE_STATUSES))
+            .values(**values)
+            .returning(Booking)
+        )
+        return (await self.session.scalars(stmt)).one_or_none()
+
+    async def set_status(self, bid: int, status: BookingStatus) -> Booking | None:
+        stmt = update(Booking).where(Booking.id == bid).values(status=status.value).returning(Booking)
+        return (await self.session.scalars(stmt)).one_or_none()
+
+    async def delete(self, bid: int, *, user_id: int | None = None, before=None) -> Booking | None:
+        """Delete a booking; with user_id, only that user's booking and only if it starts after `before`. Returns the deleted row."""
+        stmt = delete(Booking).where(Booking.id == bid)
+        if user_id is not None:
+            stmt = stmt.where(Booking.user_id == user_id, Booking.start_time > before)
+        return (await self.session.scalars(stmt.returning(Booking))).one_or_none()
+
+    async def slot_for_update(self, bid: int) -> BookingSlot | None:
+        """The booking's rollup fields, row-locked until the transaction ends so a following update sees the same state."""
+        stmt = (
+            select(Booking.service_id, Booking.start_time, Booking.end_time, Booking.status, Booking.price)
+            .where(Booking.id == bid)
+            .with_for_update()
+        )
+        row = (await self.session.execute(stmt)).one_or_none()
+        return BookingSlot(*row) if row else None
+
     async def by_id(self, bid: int) -> Booking | None:
-        res = await self.session.execute(select(Booking).where(Booking.id == bid))
+        res = await self.session.execute(lambda_stmt(lambda: select(Booking).where(Booking.id == bid)))
         return res.scalar_one_or_none()
 
     async def list(self, *, user_id: int | None = None, status: str | None = None, dt_from=None, dt_to=None):
-        q = select(Booking)
+        q = lambda_stmt(lambda: select(Booking))
         if user_id:
-            q = q.where(Booking.user_id == user_id)
+            q += lambda s: s.where(Booking.user_id == user_id)
         if status:
-            q = q.where(Booking.status == BookingStatus(status))
+            st = BookingStatus(status)
+            q += lambda s: s.where(Booking.status == st)
         if dt_from:
-            q = q.where(Booking.start_time >= dt_from)
+            q += lambda s: s.where(Booking.start_time >= dt_from)
         if dt_to:
-            q = q.where(Booking.start_time < dt_to)
-        res = await self.session.execute(q.order_by(Booking.start_time.desc()))
+            q += lambda s: s.where(Booking.start_time < dt_to)
+        q += lambda s: s.order_by(Booking.start_time.desc())
+        res = await self.session.execute(q)
         return res.scalars().all()
 
+    async def busy_intervals(self, service_id: int, after) -> Sequence[Booking]:
+        """Active bookings of a service ending after `after`, earliest first."""
+        stmt = (
+            select(Booking)
+            .where(Booking.service_id == service_id, Booking.end_time > after, Booking.status.in_(ACTIVE_STATUSES))
+            .order_by(Booking.start_time)
+        )
+        return (await self.session.scalars(stmt)).all()
+
+    async def slot_columns(self, partition_size: int) -> AsyncIterator[Sequence[tuple[int, int, int, int]]]:
+        """
+        Every booking as (service_id, start epoch s, end epoch s, status code), streamed from a
+        server-side cursor in partitions so a large table is never held as ORM objects.
+        """
+        if self.session.bind.dialect.name == "postgresql":
+            start = cast(extract("epoch", Booking.start_time), BigInteger)
+            end = cast(extract("epoch", Booking.end_time), BigInteger)
+        else:
+            # SQLite stores UTC as text
+            start = cast(func.strftime("%s", Booking.start_time), Integer)
+            end = cast(func.strftime("%s", Booking.end_time), Integer)
+        status = case(STATUS_CODES, value=Booking.status, else_=-1)
+        stmt = select(Booking.service_id, start, end, status).execution_options(yield_per=partition_size)
+        result = await self.session.stream(stmt)
+        async for part in result.partitions():
+            yield part
+
     async def conflicts(self, service_id: int, start, end) -> bool:
-        # SQLite-compatible conflict detection
-        # Check for overlapping time ranges: (start1 < end2) AND (end1 > start2)
-        sql = text("""
-        SELECT EXISTS (
-          SELECT 1 FROM bookings
-          WHERE service_id = :sid
-            AND start_time < :end_time
-            AND end_time > :start_time
-            AND status IN ('pending','confirmed')
-        ) AS conflict
-        """)
-        res = await self.session.execute(sql, {
+        res = await self.session.execute(CONFLICT_SQL, {
             "sid": service_id, 
             "start_time": start, 
             "end_time": end
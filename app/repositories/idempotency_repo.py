@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import dialect_insert
+from app.models.idempotency_key import IdempotencyKey
+
+class IdempotencyRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find(self, user_id: int, key: str, now: datetime) -> IdempotencyKey | None:
+        stmt = select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > now,
+        )
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    async def claim(self, *, user_id: int, key: str, fingerprint: str, now: datetime, expires_at: datetime) -> int | None:
+        """
+        Insert the key, or take over an expired one; its id, or None if a live one exists.
+        On Postgres this waits for a concurrent transaction holding the same key to finish.
+        """
+        values = {"user_id": user_id, "key": key, "fingerprint": fingerprint, "created_at": now, "expires_at": expires_at}
+        stmt = dialect_insert(self.session)(IdempotencyKey).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={**values, "status_code": None, "response_body": None},
+            where=IdempotencyKey.expires_at <= now,
+        ).returning(IdempotencyKey.id)
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    async def record(self, kid: int, status_code: int, body: bytes) -> None:
+        stmt = update(IdempotencyKey).where(IdempotencyKey.id == kid).values(status_code=status_code, response_body=body)
+        await self.session.execute(stmt)
+
+    async def purge_expired(self, now: datetime, limit: int) -> int:
+        expired = select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= now).limit(limit)
+        res = await self.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+        return res.rowcount
@@ -0,0 +1,110 @@
+from datetime import datetime
+from sqlalchemy import func, or_, select, update, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.outbox_event import OutboxEvent
+
+# Postgres advisory lock held while feed positions are handed out, so relays number one at a time
+SEQUENCE_LOCK = 0x0B0C
+
+class OutboxRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, *, event_type: str, aggregate: str, aggregate_id: int, user_id: int | None, data: dict) -> None:
+        """Queue an event in the caller's transaction; it is visible to the relay only once that commits."""
+        await self.session.execute(insert(OutboxEvent).values(
+            event_type=event_type, aggregate=aggregate, aggregate_id=aggregate_id, user_id=user_id, data=data,
+        ))
+
+    def _deliverable(self, now: datetime):
+        return (
+            OutboxEvent.seq.is_not(None),
+            OutboxEvent.published_at.is_(None),
+            or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until < now),
+        )
+
+    async def has_work(self, *, now: datetime, deliver: bool) -> bool:
+        """Whether any committed event awaits a feed position or, with `deliver`, delivery. Takes no locks."""
+        pending = [select(OutboxEvent.id).where(OutboxEvent.seq.is_(None)).limit(1)]
+        if deliver:
+            pending.append(select(OutboxEvent.id).where(*self._deliverable(now)).limit(1))
+        for stmt in pending:
+            if (await self.session.execute(stmt)).first() is not None:
+                return True
+        return False
+
+    async def assign_sequence(self, limit: int, *, published_at: datetime | None = None) -> int:
+        """
+        Give the oldest committed events without a feed position the next ones, in id order. On
+        Postgres the caller's transaction holds SEQUENCE_LOCK until commit, so a relay only starts
+        numbering after the previous relay's numbers are visible; SQLite's single writer does the same.
+        """
+        if self.session.bind.dialect.name == "postgresql":
+            await self.session.execute(select(func.pg_advisory_xact_lock(SEQUENCE_LOCK)))
+        ids = list((await self.session.scalars(
+            select(OutboxEvent.id).where(OutboxEvent.seq.is_(None)).order_by(OutboxEvent.id).limit(limit)
+        )).all())
+        if not ids:
+            return 0
+        last = await self.last_seq()
+        values = {} if published_at is None else {"published_at": published_at}
+        await self.session.execute(
+            update(OutboxEvent),
+            [{"id": id_, "seq": last + n, **values} for n, id_ in enumerate(ids, 1)],
+        )
+        return len(ids)
+
+    async def last_seq(self) -> int:
+        return (await self.session.scalar(select(func.max(OutboxEvent.seq)))) or 0
+
+    async def claim(self, limit: int, *, now: datetime, until: datetime) -> list[OutboxEvent]:
+        """
+        Oldest numbered, undelivered events that no other relay holds, claimed until `until` so the
+        caller can commit before delivering. SKIP LOCKED lets relays in other workers take the next
+        batch instead of waiting; SQLite ignores the lock clause and serializes writers instead.
+        """
+        stmt = (
+            select(OutboxEvent)
+            .where(*self._deliverable(now))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        batch = list((await self.session.scalars(stmt)).all())
+        if batch:
+            await self.session.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in batch])).values(claimed_until=until)
+            )
+        return batch
+
+    async def release(self, ids: list[int]) -> None:
+        await self.session.execute(update(OutboxEvent).where(OutboxEvent.id.in_(ids)).values(claimed_until=None))
+
+    async def mark_published(self, ids: list[int], now: datetime) -> None:
+        await self.session.execute(
+            update(OutboxEvent).where(OutboxEvent.id.in_(ids)).values(published_at=now, claimed_until=None)
+        )
+
+    async def after(self, seq: int, limit: int) -> list[OutboxEvent]:
+        """Numbered events after feed position `seq`, in feed order."""
+        stmt = select(OutboxEvent).where(OutboxEvent.seq > seq).order_by(OutboxEvent.seq).limit(limit)
+        return list((await self.session.scalars(stmt)).all())
+
+    async def changes(self, *, aggregate: str, since: int, limit: int, user_id: int | None = None) -> list[OutboxEvent]:
+        """Events after feed position `since`, in feed order; with user_id, only that user's."""
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.aggregate == aggregate, OutboxEvent.seq > since)
+            .order_by(OutboxEvent.seq)
+            .limit(limit)
+        )
+        if user_id is not None:
+            stmt = stmt.where(OutboxEvent.user_id == user_id)
+        return list((await self.session.scalars(stmt)).all())
+
+    async def purge_published(self, before: datetime, limit: int) -> int:
+        # The newest event always stays, so numbering carries on from it rather than starting over
+        newest = select(func.max(OutboxEvent.seq)).scalar_subquery()
+        old = select(OutboxEvent.id).where(OutboxEvent.published_at < before, OutboxEvent.seq < newest).limit(limit)
+        res = await self.session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(old)))
+        return res.rowcount
@@ -1 +1,75 @@
-# Review repository for database operations
+from sqlalchemy import Integer, select, update, delete, exists, literal, literal_column, lambda_stmt
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import dialect_insert
+from app.models.review import Review
+from app.models.booking import Booking, BookingStatus
+
+# Returned alongside review writes so callers can invalidate that service's cached reviews.
+# Spelled out because SQLite renders RETURNING columns unqualified, which makes `id` ambiguous here.
+_SERVICE_ID = literal_column(
+    f"(SELECT b.service_id FROM {Booking.__tablename__} AS b WHERE b.id = {Review.__tablename__}.booking_id)",
+    Integer,
+)
+
+class ReviewRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_for_completed_booking(self, *, booking_id: int, user_id: int, rating: int, comment: str | None) -> tuple[Review, int] | None:
+        """Insert the review if the booking is the user's, completed and not yet reviewed; (review, service id) or None."""
+        eligible = exists().where(
+            Booking.id == booking_id,
+            Booking.user_id == user_id,
+            Booking.status == BookingStatus.completed.value,
+        )
+        stmt = (
+            dialect_insert(self.session)(Review)
+            .from_select(
+                ["booking_id", "rating", "comment"],
+                select(literal(booking_id), literal(rating), literal(comment, Review.comment.type)).where(eligible),
+            )
+            .on_conflict_do_nothing(index_elements=[Review.booking_id])
+            .returning(Review, _SERVICE_ID)
+        )
+        return (await self.session.execute(stmt)).one_or_none()
+
+    async def update_as_owner(self, rid: int, user_id: int, values: dict) -> tuple[Review, int] | None:
+        stmt = (
+            update(Review)
+            .where(Review.id == rid, Review.booking_id.in_(select(Booking.id).where(Booking.user_id == user_id)))
+            .values(**values)
+            .returning(Review, _SERVICE_ID)
+        )
+        return (await self.session.execute(stmt)).one_or_none()
+
+    async def delete(self, rid: int, *, user_id: int | None = None) -> int | None:
+        """Delete a review; with user_id, only if it is on one of that user's bookings. Returns its service id."""
+        stmt = delete(Review).where(Review.id == rid)
+        if user_id is not None:
+            stmt = stmt.where(Review.booking_id.in_(select(Booking.id).where(Booking.user_id == user_id)))
+        res = await self.session.execute(stmt.returning(_SERVICE_ID))
+        return res.scalar_one_or_none()
+
+    async def owner_id(self, rid: int) -> int | None:
+        """User id of the booking a review belongs to, or None if the review does not exist."""
+        res = await self.session.execute(lambda_stmt(lambda: (
+            select(Booking.user_id).join(Review, Review.booking_id == Booking.id).where(Review.id == rid)
+        )))
+        return res.scalar_one_or_none()
+
+    async def by_id(self, rid: int) -> Review | None:
+        res = await self.session.execute(lambda_stmt(lambda: select(Review).where(Review.id == rid)))
+        return res.scalar_one_or_none()
+
+    async def by_booking(self, bid: int) -> Review | None:
+        res = await self.session.execute(lambda_stmt(lambda: select(Review).where(Review.booking_id == bid)))
+        return res.scalar_one_or_none()
+
+    async def for_service(self, service_id: int):
+        res = await self.session.execute(lambda_stmt(lambda: (
+            select(Review)
+            .join(Booking, Review.booking_id == Booking.id)
+            .where(Booking.service_id == service_id)
+            .order_by(Review.created_at.desc())
+        )))
+        return res.scalars().all()
@@ -1 +1,41 @@
-# Service repository for database operations
+from collections.abc import Sequence
+from sqlalchemy import select, insert, update, delete, lambda_stmt
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.service import Service
+
+class ServiceRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, values: dict) -> Service:
+        return (await self.session.scalars(insert(Service).values(**values).returning(Service))).one()
+
+    async def update(self, sid: int, values: dict) -> Service | None:
+        stmt = update(Service).where(Service.id == sid).values(**values).returning(Service)
+        return (await self.session.scalars(stmt)).one_or_none()
+
+    async def delete(self, sid: int) -> bool:
+        res = await self.session.execute(delete(Service).where(Service.id == sid).returning(Service.id))
+        return res.scalar_one_or_none() is not None
+
+    async def by_id(self, sid: int) -> Service | None:
+        res = await self.session.execute(lambda_stmt(lambda: select(Service).where(Service.id == sid)))
+        return res.scalar_one_or_none()
+
+    async def ids(self) -> Sequence[int]:
+        return (await self.session.scalars(select(Service.id).order_by(Service.id))).all()
+
+    async def list(self, *, q: str | None = None, price_min: float | None = None, price_max: float | None = None, active: bool | None = None):
+        stmt = lambda_stmt(lambda: select(Service))
+        if q:
+            pattern = f"%{q}%"
+            stmt += lambda s: s.where(Service.title.ilike(pattern))
+        if price_min is not None:
+            stmt += lambda s: s.where(Service.price >= price_min)
+        if price_max is not None:
+            stmt += lambda s: s.where(Service.price <= price_max)
+        if active is not None:
+            stmt += lambda s: s.where(Service.is_active == active)
+        stmt += lambda s: s.order_by(Service.created_at.desc())
+        res = await self.session.execute(stmt)
+        return res.scalars().all()
@@ -0,0 +1,164 @@
+from collections.abc import Sequence
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import NamedTuple
+from sqlalchemy import Integer, cast, case, delete, extract, func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import dialect_insert
+from app.models.booking import Booking, BookingStatus
+from app.models.service import Service
+from app.models.service_daily_stats import ServiceDailyStats
+
+STATUS_COLUMNS = tuple(s.value for s in BookingStatus)
+COUNTED = (*STATUS_COLUMNS, "booked_minutes", "revenue")
+# Postgres advisory lock space for per-service rollup locks: writers share one, a rebuild takes it alone
+ROLLUP_LOCK = 0x5D57
+
+class BookingSlot(NamedTuple):
+    """The fields of a booking the rollup depends on."""
+    service_id: int
+    start_time: datetime
+    end_time: datetime
+    status: str
+    price: Decimal | None = None
+
+    @classmethod
+    def of(cls, b: Booking) -> "BookingSlot":
+        status = b.status.value if isinstance(b.status, BookingStatus) else b.status
+        return cls(b.service_id, b.start_time, b.end_time, status, b.price)
+
+    @property
+    def day(self) -> date:
+        # SQLite hands back naive datetimes, already in UTC
+        start = self.start_time
+        return (start.astimezone(timezone.utc) if start.tzinfo else start).date()
+
+    @property
+    def minutes(self) -> int:
+        return round((self.end_time - self.start_time).total_seconds() / 60)
+
+class ServiceStatsRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _postgres(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
+    async def _lock(self, service_id: int, *, shared: bool) -> None:
+        fn = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+        await self.session.execute(select(fn(ROLLUP_LOCK, service_id)))
+
+    async def apply(self, *, before: BookingSlot | None, after: BookingSlot | None) -> None:
+        """
+        Move a booking's contribution from `before` to `after` (None for a new or deleted booking)
+        in the caller's transaction, as one upsert per affected service and day. On Postgres it
+        holds the services' rollup locks shared until commit, waiting only while one is rebuilt.
+        """
+        deltas: dict[tuple[int, date], dict[str, int | Decimal]] = {}
+        for slot, sign in ((before, -1), (after, 1)):
+            if slot is None:
+                continue
+            d = deltas.setdefault((slot.service_id, slot.day), {**dict.fromkeys(COUNTED, 0), "revenue": Decimal(0)})
+            d[slot.status] += sign
+            if slot.status != BookingStatus.cancelled.value:
+                d["booked_minutes"] += sign * slot.minutes
+                # The booking's own price on both sides, so a later price change cannot skew the sum
+                d["revenue"] += sign * Decimal(slot.price or 0)
+        if self._postgres:
+            for service_id in sorted({service_id for service_id, _ in deltas}):
+                await self._lock(service_id, shared=True)
+        for (service_id, day), d in deltas.items():
+            if not any(d.values()):
+                continue
+            stmt = dialect_insert(self.session)(ServiceDailyStats).values(service_id=service_id, day=day, **d)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ServiceDailyStats.service_id, ServiceDailyStats.day],
+                set_={c: getattr(ServiceDailyStats, c) + getattr(stmt.excluded, c) for c in COUNTED},
+            )
+            await self.session.execute(stmt)
+            if sum(d[c] for c in STATUS_COLUMNS) < 0:
+                # A booking left this day; drop the row if it was the last, as a rebuild would
+                await self.session.execute(
+                    delete(ServiceDailyStats).where(
+                        ServiceDailyStats.service_id == service_id,
+                        ServiceDailyStats.day == day,
+                        *(getattr(ServiceDailyStats, c) == 0 for c in STATUS_COLUMNS),
+                    )
+                )
+
+    async def daily(self, start: date, end: date, service_id: int | None = None) -> Sequence[ServiceDailyStats]:
+        stmt = (
+            select(ServiceDailyStats)
+            .where(ServiceDailyStats.day >= start, ServiceDailyStats.day <= end)
+            .order_by(ServiceDailyStats.day, ServiceDailyStats.service_id)
+        )
+        if service_id is not None:
+            stmt = stmt.where(ServiceDailyStats.service_id == service_id)
+        return (await self.session.scalars(stmt)).all()
+
+    async def totals(self, start: date, end: date) -> Sequence:
+        """Per-service sums over the range, highest revenue first."""
+        revenue = func.sum(ServiceDailyStats.revenue)
+        stmt = (
+            select(
+                ServiceDailyStats.service_id,
+                *(func.sum(getattr(ServiceDailyStats, c)).label(c) for c in COUNTED if c != "revenue"),
+                revenue.label("revenue"),
+            )
+            .where(ServiceDailyStats.day >= start, ServiceDailyStats.day <= end)
+            .group_by(ServiceDailyStats.service_id)
+            .order_by(revenue.desc(), ServiceDailyStats.service_id)
+        )
+        return (await self.session.execute(stmt)).all()
+
+    async def rebuild(self, start: date | None = None, end: date | None = None) -> int:
+        """
+        Recompute rollup rows (all, or for days in [start, end]) from bookings; rows written.
+        Commits once per service. On Postgres each service's pass holds its rollup lock alone,
+        so only writes to that service wait, and only for that pass: a write that committed
+        before it is counted, one still open adds its delta after it.
+        """
+        if self._postgres:
+            # Inlined rather than bound, so the GROUP BY expression matches the selected one
+            day = func.date(func.timezone(literal_column("'UTC'"), Booking.start_time))
+            minutes = extract("epoch", Booking.end_time - Booking.start_time) / 60
+        else:
+            day = func.date(Booking.start_time)
+            minutes = (func.julianday(Booking.end_time) - func.julianday(Booking.start_time)) * 1440
+        active = Booking.status != BookingStatus.cancelled.value
+
+        service_ids = (await self.session.scalars(select(Service.id).order_by(Service.id))).all()
+        await self.session.commit()
+        written = 0
+        for service_id in service_ids:
+            stale = delete(ServiceDailyStats).where(ServiceDailyStats.service_id == service_id)
+            source = (
+                select(
+                    Booking.service_id,
+                    day.label("day"),
+                    *(func.sum(case((Booking.status == s, 1), else_=0)) for s in STATUS_COLUMNS),
+                    func.coalesce(func.sum(case((active, cast(func.round(minutes), Integer)), else_=0)), 0),
+                    # Bookings from before prices were recorded fall back to the service's current one
+                    func.coalesce(func.sum(case((active, func.coalesce(Booking.price, Service.price)), else_=0)), 0),
+                )
+                .join(Service, Service.id == Booking.service_id)
+                .where(Booking.service_id == service_id)
+                .group_by(Booking.service_id, day)
+            )
+            if start is not None:
+                stale = stale.where(ServiceDailyStats.day >= start)
+                source = source.where(day >= start)
+            if end is not None:
+                stale = stale.where(ServiceDailyStats.day <= end)
+                source = source.where(day <= end)
+            if self._postgres:
+                # Read committed: the statements below see every write that held the lock shared
+                await self._lock(service_id, shared=False)
+            await self.session.execute(stale)
+            res = await self.session.execute(
+                insert(ServiceDailyStats).from_select(["service_id", "day", *COUNTED], source)
+            )
+            await self.session.commit()
+            written += res.rowcount
+        return written
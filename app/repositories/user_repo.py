@@ -1 +1,49 @@
-# User repository for database operations
+from sqlalchemy import select, update, any_, bindparam, lambda_stmt, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import dialect_insert
+from app.models.user import User
+
+class UserRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    async def by_id(self, uid: int) -> User | None:
+        res = await self.session.execute(lambda_stmt(lambda: select(User).where(User.id == uid)))
+        return res.scalar_one_or_none()
+
+    async def by_email(self, email: str) -> User | None:
+        res = await self.session.execute(lambda_stmt(lambda: select(User).where(User.email == email)))
+        return res.scalar_one_or_none()
+
+    async def existing_emails(self, emails: list[str]) -> set[str]:
+        if not emails:
+            return set()
+        if self.dialect == "postgresql":
+            # A single array parameter keeps the statement shape stable for any batch size
+            cond = User.email == any_(bindparam("emails", emails, type_=postgresql.ARRAY(String)))
+        else:
+            cond = User.email.in_(emails)
+        res = await self.session.execute(select(User.email).where(cond))
+        return set(res.scalars().all())
+
+    async def insert_many(self, rows: list[dict]) -> dict[str, int]:
+        """Insert users in one statement, skipping emails that already exist. Returns email -> id of inserted rows."""
+        if not rows:
+            return {}
+        stmt = (
+            dialect_insert(self.session)(User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id, User.email)
+        )
+        res = await self.session.execute(stmt)
+        return {email: uid for uid, email in res.all()}
+
+    async def update_name(self, uid: int, name: str) -> User | None:
+        stmt = update(User).where(User.id == uid).values(name=name).returning(User)
+        return (await self.session.scalars(stmt)).one_or_none()
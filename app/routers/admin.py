@@ -0,0 +1,172 @@
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.admission import admission
+from app.core.availability import hub as availability_hub
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.dependencies import require_role
+from app.core.logging import logging_stats
+from app.core.occupancy import DAY, OCCUPYING, WEEKDAYS, BookingSnapshot, heatmap, snapshots as occupancy_snapshots, utilization
+from app.core.profiling import profiler
+from app.core.singleflight import singleflight
+from app.db.session import get_read_session, pool_metrics, replicas
+from app.db.slow_queries import slow_queries
+from app.models.booking import BookingStatus
+from app.repositories.stats_repo import ServiceStatsRepo
+from app.schemas.admin import OccupancyHeatmap, ProfileStart, ServiceDayStats, ServiceTotals, UtilizationReport
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_role("admin"))])
+
+@router.get("/db/pool")
+async def db_pool():
+    return {
+        "pre_ping": settings.db_pool_pre_ping,
+        "recycle_s": settings.db_pool_recycle,
+        **pool_metrics(),
+    }
+
+@router.get("/db/replicas")
+async def db_replicas():
+    return {"replicas": replicas.status()}
+
+@router.get("/db/slow-queries")
+async def db_slow_queries():
+    return slow_queries.snapshot()
+
+@router.get("/cache")
+async def cache_status():
+    return response_cache.stats()
+
+@router.get("/admission")
+async def admission_status():
+    return admission.stats()
+
+@router.get("/availability")
+async def availability_status():
+    return availability_hub.stats()
+
+@router.get("/singleflight")
+async def singleflight_status():
+    return singleflight.stats()
+
+@router.get("/logging")
+async def logging_status():
+    return logging_stats()
+
+@router.post("/profile", status_code=202)
+async def start_profile(body: ProfileStart):
+    """Profile this worker for the next `requests` requests and/or `seconds` seconds."""
+    if profiler.active:
+        raise HTTPException(status_code=409, detail="Profiler already running on this worker")
+    profiler.start(body.mode, requests=body.requests, seconds=body.seconds, interval_ms=body.interval_ms)
+    return profiler.status()
+
+@router.get("/profile")
+async def get_profile(format: Literal["status", "collapsed", "pstats", "prof"] = "status"):
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    if format == "pstats":
+        return PlainTextResponse(profiler.pstats_text())
+    if format == "prof":
+        return Response(profiler.pstats_dump(), media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="worker-{os.getpid()}.prof"'})
+    return profiler.status()
+
+@router.delete("/profile")
+async def stop_profile():
+    profiler.stop()
+    return profiler.status()
+
+MAX_ANALYTICS_DAYS = 366
+
+def _day_range(start: date | None, end: date | None) -> tuple[date, date]:
+    # Defaults to the last 30 days, today (UTC) included
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(422, detail="from must not be after to")
+    if (end - start).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(422, detail=f"Date range is limited to {MAX_ANALYTICS_DAYS} days")
+    return start, end
+
+@router.get("/analytics/daily", response_model=list[ServiceDayStats])
+async def analytics_daily(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    service_id: int | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Bookings by status, booked minutes and revenue per service per day, from the rollup table."""
+    start, end = _day_range(start, end)
+    return await ServiceStatsRepo(session).daily(start, end, service_id)
+
+@router.get("/analytics/services", response_model=list[ServiceTotals])
+async def analytics_services(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """The same figures summed per service over the range, highest revenue first."""
+    start, end = _day_range(start, end)
+    return await ServiceStatsRepo(session).totals(start, end)
+
+EPOCH = date(1970, 1, 1)
+
+def _occupancy_window(start: date | None, end: date | None) -> tuple[date, date, int, int]:
+    # Defaults to the last 52 weeks, so every hour of the week is seen equally often
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(weeks=52) + timedelta(days=1)
+    if start > end:
+        raise HTTPException(422, detail="from must not be after to")
+    return start, end, (start - EPOCH).days * DAY, ((end - EPOCH).days + 1) * DAY
+
+def _snapshot() -> BookingSnapshot:
+    snap = occupancy_snapshots.snapshot
+    if snap is None:
+        if not settings.occupancy_snapshot:
+            raise HTTPException(503, detail="Occupancy snapshot disabled on this worker (OCCUPANCY_SNAPSHOT=false)")
+        raise HTTPException(503, detail="Occupancy snapshot not loaded yet", headers={"Retry-After": "5"})
+    return snap
+
+@router.get("/occupancy")
+async def occupancy_status():
+    return occupancy_snapshots.stats()
+
+@router.get("/occupancy/heatmap", response_model=OccupancyHeatmap)
+async def occupancy_heatmap(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    service_id: int | None = None,
+    status: list[BookingStatus] | None = Query(None),
+):
+    """Booked hours and utilization per UTC hour of week, computed over this worker's bookings snapshot."""
+    snap = _snapshot()
+    start, end, lo, hi = _occupancy_window(start, end)
+    if service_id is not None and service_id not in snap.services:
+        raise HTTPException(404, detail="Service not found")
+    result = await asyncio.to_thread(heatmap, snap, lo, hi, status or OCCUPYING, service_id)
+    return {"start": start, "end": end, "service_id": service_id, "as_of": snap.loaded_at, "weekdays": list(WEEKDAYS), **result}
+
+@router.get("/occupancy/utilization", response_model=UtilizationReport)
+async def occupancy_utilization(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    p: list[float] = Query([50, 90, 95, 99]),
+    status: list[BookingStatus] | None = Query(None),
+    top: int = Query(10, ge=0, le=100),
+):
+    """Utilization percentiles across services and across service-days, and the busiest services."""
+    snap = _snapshot()
+    start, end, lo, hi = _occupancy_window(start, end)
+    if any(not 0 <= x <= 100 for x in p):
+        raise HTTPException(422, detail="Percentiles must be between 0 and 100")
+    try:
+        result = await asyncio.to_thread(utilization, snap, lo, hi, p, status or OCCUPYING, top)
+    except ValueError as e:
+        raise HTTPException(422, detail=str(e))
+    return {"start": start, "end": end, "as_of": snap.loaded_at, **result}
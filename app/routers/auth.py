@@ -1,36 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_session
-from app.schemas.auth import RegisterIn, LoginIn, TokenOut
+from typing import Any, AsyncIterator
+import asyncio
+import json
+from app.db.session import get_primary_read_session, get_session
+from app.schemas.auth import RegisterIn, LoginIn, TokenOut, BulkRegisterOut
 from app.models.user import User, UserRole
 from app.core.security import hash_password, verify_password
 from app.core.auth import create_access_token, create_refresh_token, decode_token
+from app.core.dependencies import require_role
+from app.repositories.user_repo import UserRepo
+from app.services.user_service import UserService
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", status_code=201)
 async def register(data: RegisterIn, session: AsyncSession = Depends(get_session)):
-    exists = await session.execute(select(User).where(User.email == data.email))
-    if exists.scalar_one_or_none():
-        raise HTTPException(409, detail="Email already registered")
-    
     role = UserRole.admin if data.is_admin else UserRole.user
-    u = User(
-        name=data.name, 
-        email=data.email, 
-        password_hash=hash_password(data.password),
-        role=role
-    )
-    session.add(u)
+    repo = UserRepo(session)
+    # Cheap check first so a duplicate never pays for a bcrypt hash
+    if await repo.existing_emails([data.email]):
+        raise HTTPException(409, detail="Email already registered")
+    # Off the event loop; ON CONFLICT DO NOTHING still catches a concurrent registration
+    password_hash = await asyncio.to_thread(hash_password, data.password)
+    created = await repo.insert_many([{
+        "name": data.name,
+        "email": data.email,
+        "password_hash": password_hash,
+        "role": role,
+    }])
+    if data.email not in created:
+        raise HTTPException(409, detail="Email already registered")
     await session.commit()
-    return {"id": u.id, "email": u.email, "role": u.role.value}
+    return {"id": created[data.email], "email": data.email, "role": role.value}
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+
+async def _register_rows(request: Request) -> AsyncIterator[Any]:
+    """Yield raw rows from an NDJSON stream (one object per line) or a JSON array body."""
+    if request.headers.get("content-type", "").split(";")[0].strip() in NDJSON_TYPES:
+        buf = b""
+        async for chunk in request.stream():
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_row(line)
+        if buf.strip():
+            yield _parse_row(buf)
+        return
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(422, detail="Body must be a JSON array or NDJSON stream")
+    if not isinstance(body, list):
+        raise HTTPException(422, detail="Body must be a JSON array or NDJSON stream")
+    for row in body:
+        yield row
+
+def _parse_row(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        # Reported back as an invalid row rather than failing the whole upload
+        return line.decode("utf-8", errors="replace")
+
+@router.post("/register/bulk", response_model=BulkRegisterOut, dependencies=[Depends(require_role("admin"))])
+async def register_bulk(request: Request, session: AsyncSession = Depends(get_session)):
+    svc = UserService(session)
+    return await svc.bulk_register(_register_rows(request))
 
 @router.post("/login", response_model=TokenOut)
-async def login(payload: LoginIn, session: AsyncSession = Depends(get_session)):
-    res = await session.execute(select(User).where(User.email == payload.email))
-    u = res.scalar_one_or_none()
+async def login(payload: LoginIn, session: AsyncSession = Depends(get_primary_read_session)):
+    u = await UserRepo(session).by_email(payload.email)
     if not u or not verify_password(payload.password, u.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return TokenOut(access_token=create_access_token(str(u.id), u.role.value), refresh_token=create_refresh_token(str(u.id)))
@@ -38,12 +81,12 @@ async def login(payload: LoginIn, session: AsyncSession = Depends(get_session)):
 bearer = HTTPBearer()
 
 @router.post("/refresh", response_model=TokenOut)
-async def refresh(creds: HTTPAuthorizationCredentials = Depends(bearer), session: AsyncSession = Depends(get_session)):
+async def refresh(creds: HTTPAuthorizationCredentials = Depends(bearer), session: AsyncSession = Depends(get_primary_read_session)):
     payload = decode_token(creds.credentials)
     if payload.get("type") != "refresh":
         raise HTTPException(401, detail="Invalid token type")
     user_id = payload.get("sub")
-    u = (await session.execute(select(User).where(User.id == int(user_id)))).scalar_one_or_none()
+    u = await UserRepo(session).by_id(int(user_id))
     if not u:
         raise HTTPException(401, detail="User not found")
     return TokenOut(access_token=create_access_token(str(u.id), u.role.value), refresh_token=create_refresh_token(str(u.id)))
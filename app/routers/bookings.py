@@ -1,46 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime
-from app.db.session import get_session
+from datetime import datetime, timezone
+from app.db.session import get_session, get_read_session
 from app.core.dependencies import get_current_user, require_role
-from app.schemas.booking import BookingCreate, BookingOut, BookingUpdate
-from app.services.booking_service import BookingService
+from app.core.encoding import LIST_RESPONSES, list_response
+from app.core.cache import response_cache, reviews_tag
+from app.core.idempotency import IDEMPOTENT_RESPONSES, IdempotentRequest, idempotent
+from app.schemas.booking import BookingChange, BookingChanges, BookingCreate, BookingOut, BookingUpdate
+from app.services.booking_service import BookingService, record_booking_deleted, record_booking_event
 from app.models.booking import Booking, BookingStatus
+from app.repositories.booking_repo import BookingRepo
+from app.repositories.outbox_repo import OutboxRepo
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
-@router.post("", response_model=BookingOut, status_code=201)
+@router.post("", response_model=BookingOut, status_code=201, responses=IDEMPOTENT_RESPONSES)
 async def create_booking(
     data: BookingCreate, 
     payload=Depends(get_current_user), 
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    idem: IdempotentRequest | None = Depends(idempotent(BookingOut, 201))
 ):
+    if idem and idem.replay:
+        return idem.replay
     svc = BookingService(session)
     b = await svc.create(
         user_id=int(payload["sub"]), 
         service_id=data.service_id, 
         start=data.start_time, 
-        end=data.end_time
+        end=data.end_time,
+        idempotency=idem
     )
     return b
 
-@router.get("", response_model=list[BookingOut])
-async def list_bookings(payload=Depends(get_current_user), session: AsyncSession = Depends(get_session), status: str | None = None, from_: datetime | None = None, to: datetime | None = None):
+@router.get("", response_model=list[BookingOut], responses=LIST_RESPONSES)
+async def list_bookings(request: Request, response: Response, payload=Depends(get_current_user), session: AsyncSession = Depends(get_read_session), status: str | None = None, from_: datetime | None = None, to: datetime | None = None):
     is_admin = payload.get("role") == "admin"
-    from app.repositories.booking_repo import BookingRepo
     repo = BookingRepo(session)
     bookings = await repo.list(user_id=None if is_admin else int(payload["sub"]), status=status, dt_from=from_, dt_to=to)
-    return bookings
+    return list_response(request, response, bookings, BookingOut)
+
+@router.get("/changes", response_model=BookingChanges)
+async def booking_changes(
+    payload=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Booking events after cursor `since`, in commit order: the caller's bookings, or all of them for
+    admins. Events show up once the outbox relay has numbered them.
+    """
+    is_admin = payload.get("role") == "admin"
+    events = await OutboxRepo(session).changes(
+        aggregate="booking",
+        since=since,
+        limit=limit + 1,
+        user_id=None if is_admin else int(payload["sub"]),
+    )
+    page = events[:limit]
+    return BookingChanges(
+        changes=[
+            BookingChange(cursor=e.seq, type=e.event_type, booking_id=e.aggregate_id, occurred_at=e.created_at, data=e.data)
+            for e in page
+        ],
+        next_cursor=page[-1].seq if page else since,
+        has_more=len(events) > limit,
+    )
 
 @router.get("/{bid}", response_model=BookingOut)
-async def get_booking(bid: int, payload=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    b = (await session.execute(select(Booking).where(Booking.id == bid))).scalar_one_or_none()
+async def get_booking(bid: int, payload=Depends(get_current_user), session: AsyncSession = Depends(get_read_session)):
+    b = await BookingRepo(session).by_id(bid)
     if not b: raise HTTPException(404)
     if payload.get("role") != "admin" and b.user_id != int(payload["sub"]):
         raise HTTPException(403)
     return b
 
+async def _raise_for_rejected_write(repo: BookingRepo, bid: int, user_id: int, forbidden_detail: str, inactive_detail: str):
+    # Only reached when a guarded write matched no row: find out which guard failed
+    b = await repo.by_id(bid)
+    if not b:
+        raise HTTPException(404, detail="Booking not found")
+    if b.user_id != user_id:
+        raise HTTPException(403, detail=forbidden_detail)
+    raise HTTPException(400, detail=inactive_detail)
+
 @router.patch("/{bid}", response_model=BookingOut)
 async def patch_booking(
     bid: int, 
@@ -48,32 +92,37 @@ async def patch_booking(
     payload=Depends(get_current_user), 
     session: AsyncSession = Depends(get_session)
 ):
-    b = (await session.execute(select(Booking).where(Booking.id == bid))).scalar_one_or_none()
-    if not b: 
-        raise HTTPException(404, detail="Booking not found")
-    
-    # Check permissions
-    if payload.get("role") != "admin" and b.user_id != int(payload["sub"]):
-        raise HTTPException(403, detail="Not your booking")
+    repo = BookingRepo(session)
+    is_admin = payload.get("role") == "admin"
+    user_id = int(payload["sub"])
     
-    # Update fields based on role
-    if payload.get("role") == "admin":
-        # Admin can update status via query parameter
-        pass  # Status updates handled separately
-    else:
-        # Regular users can only reschedule pending/confirmed bookings
-        if b.status not in [BookingStatus.pending, BookingStatus.confirmed]:
-            raise HTTPException(400, detail="Can only modify pending or confirmed bookings")
-        
+    # Admins change status via /status; regular users can reschedule or cancel
+    values = {}
+    if not is_admin:
         if data.start_time is not None:
-            b.start_time = data.start_time
+            values["start_time"] = data.start_time
         if data.end_time is not None:
-            b.end_time = data.end_time
+            values["end_time"] = data.end_time
         if data.cancel:
-            b.status = BookingStatus.cancelled
+            values["status"] = BookingStatus.cancelled.value
+    
+    if not values:
+        b = await repo.by_id(bid)
+        if not b: 
+            raise HTTPException(404, detail="Booking not found")
+        if not is_admin and b.user_id != user_id:
+            raise HTTPException(403, detail="Not your booking")
+        if not is_admin and b.status not in [BookingStatus.pending, BookingStatus.confirmed]:
+            raise HTTPException(400, detail="Can only modify pending or confirmed bookings")
+        return b
     
+    # Ownership and status checks are part of the UPDATE's WHERE clause
+    before = await repo.slot_for_update(bid)
+    b = await repo.update_as_owner(bid, user_id, values)
+    if not b:
+        await _raise_for_rejected_write(repo, bid, user_id, "Not your booking", "Can only modify pending or confirmed bookings")
+    await record_booking_event(session, "booking.updated", b, before)
     await session.commit()
-    await session.refresh(b)
     return b
 
 @router.patch("/{bid}/status", response_model=BookingOut, dependencies=[Depends(require_role("admin"))])
@@ -83,13 +132,18 @@ async def update_booking_status(
     payload=Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    b = (await session.execute(select(Booking).where(Booking.id == bid))).scalar_one_or_none()
+    try:
+        new_status = BookingStatus(status)
+    except ValueError:
+        raise HTTPException(422, detail="Invalid booking status")
+    
+    repo = BookingRepo(session)
+    before = await repo.slot_for_update(bid)
+    b = await repo.set_status(bid, new_status)
     if not b:
         raise HTTPException(404, detail="Booking not found")
-    
-    b.status = BookingStatus(status)
+    await record_booking_event(session, "booking.status_changed", b, before)
     await session.commit()
-    await session.refresh(b)
     return b
 
 @router.delete("/{bid}", status_code=204)
@@ -98,23 +152,20 @@ async def delete_booking(
     payload=Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    b = (await session.execute(select(Booking).where(Booking.id == bid))).scalar_one_or_none()
-    if not b:
-        raise HTTPException(404, detail="Booking not found")
-    
-    # Check permissions
-    is_owner = b.user_id == int(payload["sub"])
+    repo = BookingRepo(session)
+    user_id = int(payload["sub"])
     is_admin = payload.get("role") == "admin"
     
-    if not (is_owner or is_admin):
-        raise HTTPException(403, detail="Not authorized")
-    
-    # Regular users can only delete before start time
-    if is_owner and not is_admin:
-        from datetime import datetime
-        if b.start_time <= datetime.now():
-            raise HTTPException(400, detail="Cannot delete booking after start time")
-    
-    await session.delete(b)
+    # Regular users can only delete their own bookings before start time
+    b = await repo.delete(
+        bid,
+        user_id=None if is_admin else user_id,
+        before=datetime.now(timezone.utc),
+    )
+    if b is None:
+        await _raise_for_rejected_write(repo, bid, user_id, "Not authorized", "Cannot delete booking after start time")
+    await record_booking_deleted(session, b)
     await session.commit()
+    # A review on the booking is deleted with it
+    await response_cache.invalidate(reviews_tag(b.service_id))
     return
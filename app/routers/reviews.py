@@ -1,82 +1,88 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_session
+from app.db.session import get_session, get_read_session
 from app.core.dependencies import get_current_user, require_role
+from app.core import outbox
+from app.core.cache import cached, response_cache, reviews_tag
+from app.core.idempotency import IDEMPOTENT_RESPONSES, IdempotentRequest, idempotent
+from app.core.singleflight import coalesced
 from app.schemas.review import ReviewCreate, ReviewOut, ReviewUpdate
 from app.models.review import Review
 from app.models.booking import Booking, BookingStatus
+from app.repositories.booking_repo import BookingRepo
+from app.repositories.review_repo import ReviewRepo
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
-@router.post("", response_model=ReviewOut, status_code=201)
+def _review_out(review: Review) -> ReviewOut:
+    return ReviewOut(
+        id=review.id,
+        booking_id=review.booking_id,
+        rating=review.rating,
+        comment=review.comment,
+        created_at=review.created_at
+    )
+
+async def _record_event(session: AsyncSession, event_type: str, review: Review, user_id: int, service_id: int):
+    data = {**_review_out(review).model_dump(mode="json"), "service_id": service_id}
+    await outbox.record(session, event_type, review.id, user_id, data)
+
+@router.post("", response_model=ReviewOut, status_code=201, responses=IDEMPOTENT_RESPONSES)
 async def create_review(
     data: ReviewCreate, 
     payload=Depends(get_current_user), 
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    idem: IdempotentRequest | None = Depends(idempotent(ReviewOut, 201))
 ):
-    # Get the booking and verify it belongs to the user and is completed
-    booking = (await session.execute(
-        select(Booking).where(Booking.id == data.booking_id)
-    )).scalar_one_or_none()
-    
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.user_id != int(payload["sub"]):
-        raise HTTPException(status_code=403, detail="Not your booking")
+    if idem and idem.replay:
+        return idem.replay
+    user_id = int(payload["sub"])
     
-    if booking.status != BookingStatus.completed:
-        raise HTTPException(status_code=400, detail="Can only review completed bookings")
-    
-    # Check if review already exists
-    existing_review = (await session.execute(
-        select(Review).where(Review.booking_id == data.booking_id)
-    )).scalar_one_or_none()
-    
-    if existing_review:
-        raise HTTPException(status_code=409, detail="Review already exists for this booking")
-    
-    # Create the review
-    review = Review(
+    # Ownership, completed status and uniqueness are checked by the INSERT itself
+    created = await ReviewRepo(session).create_for_completed_booking(
         booking_id=data.booking_id,
+        user_id=user_id,
         rating=data.rating,
         comment=data.comment
     )
-    session.add(review)
+    
+    if not created:
+        # Work out which condition failed
+        booking = await BookingRepo(session).by_id(data.booking_id)
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if booking.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Not your booking")
+        if booking.status != BookingStatus.completed:
+            raise HTTPException(status_code=400, detail="Can only review completed bookings")
+        raise HTTPException(status_code=409, detail="Review already exists for this booking")
+    
+    review, service_id = created
+    await _record_event(session, "review.created", review, user_id, service_id)
+    if idem:
+        await idem.record(_review_out(review))
     await session.commit()
-    await session.refresh(review)
+    await response_cache.invalidate(reviews_tag(service_id))
     
-    return ReviewOut(
-        id=review.id,
-        booking_id=review.booking_id,
-        rating=review.rating,
-        comment=review.comment,
-        created_at=review.created_at
-    )
+    return _review_out(review)
 
 @router.get("/services/{service_id}", response_model=list[ReviewOut])
+@cached(lambda params: [reviews_tag(params["service_id"])])
+@coalesced
 async def get_service_reviews(
     service_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     # Get all reviews for bookings of this service
-    reviews = (await session.execute(
-        select(Review)
-        .join(Booking, Review.booking_id == Booking.id)
-        .where(Booking.service_id == service_id)
-        .order_by(Review.created_at.desc())
-    )).scalars().all()
+    reviews = await ReviewRepo(session).for_service(service_id)
     
-    return [
-        ReviewOut(
-            id=r.id,
-            booking_id=r.booking_id,
-            rating=r.rating,
-            comment=r.comment,
-            created_at=r.created_at
-        ) for r in reviews
-    ]
+    return [_review_out(r) for r in reviews]
+
+async def _raise_for_rejected_write(repo: ReviewRepo, review_id: int, forbidden_detail: str):
+    # Only reached when a guarded write matched no row
+    if await repo.owner_id(review_id) is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    raise HTTPException(status_code=403, detail=forbidden_detail)
 
 @router.patch("/{review_id}", response_model=ReviewOut)
 async def update_review(
@@ -85,37 +91,33 @@ async def update_review(
     payload=Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    review = (await session.execute(
-        select(Review).where(Review.id == review_id)
-    )).scalar_one_or_none()
+    repo = ReviewRepo(session)
+    user_id = int(payload["sub"])
     
-    if not review:
-        raise HTTPException(status_code=404, detail="Review not found")
-    
-    # Check if user owns the review (via booking)
-    booking = (await session.execute(
-        select(Booking).where(Booking.id == review.booking_id)
-    )).scalar_one()
-    
-    if booking.user_id != int(payload["sub"]):
-        raise HTTPException(status_code=403, detail="Not your review")
-    
-    # Update the review
+    values = {}
     if data.rating is not None:
-        review.rating = data.rating
+        values["rating"] = data.rating
     if data.comment is not None:
-        review.comment = data.comment
-    
+        values["comment"] = data.comment
+    
+    if not values:
+        owner_id = await repo.owner_id(review_id)
+        if owner_id is None:
+            raise HTTPException(status_code=404, detail="Review not found")
+        if owner_id != user_id:
+            raise HTTPException(status_code=403, detail="Not your review")
+        return _review_out(await repo.by_id(review_id))
+    
+    # Ownership (via booking) is part of the UPDATE's WHERE clause
+    updated = await repo.update_as_owner(review_id, user_id, values)
+    if not updated:
+        await _raise_for_rejected_write(repo, review_id, "Not your review")
+    review, service_id = updated
+    await _record_event(session, "review.updated", review, user_id, service_id)
     await session.commit()
-    await session.refresh(review)
+    await response_cache.invalidate(reviews_tag(service_id))
     
-    return ReviewOut(
-        id=review.id,
-        booking_id=review.booking_id,
-        rating=review.rating,
-        comment=review.comment,
-        created_at=review.created_at
-    )
+    return _review_out(review)
 
 @router.delete("/{review_id}", status_code=204)
 async def delete_review(
@@ -123,24 +125,14 @@ async def delete_review(
     payload=Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    review = (await session.execute(
-        select(Review).where(Review.id == review_id)
-    )).scalar_one_or_none()
-    
-    if not review:
-        raise HTTPException(status_code=404, detail="Review not found")
-    
-    # Check if user owns the review or is admin
-    booking = (await session.execute(
-        select(Booking).where(Booking.id == review.booking_id)
-    )).scalar_one()
-    
-    is_owner = booking.user_id == int(payload["sub"])
+    repo = ReviewRepo(session)
     is_admin = payload.get("role") == "admin"
     
-    if not (is_owner or is_admin):
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    await session.delete(review)
+    # Owners can delete their own reviews, admins any review
+    service_id = await repo.delete(review_id, user_id=None if is_admin else int(payload["sub"]))
+    if service_id is None:
+        await _raise_for_rejected_write(repo, review_id, "Not authorized")
+    await outbox.record(session, "review.deleted", review_id, None if is_admin else int(payload["sub"]), {"id": review_id, "service_id": service_id})
     await session.commit()
+    await response_cache.invalidate(reviews_tag(service_id))
     return
@@ -1,48 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_session
+from app.db.session import get_primary_read_session, get_session, get_read_session
 from app.schemas.service import ServiceCreate, ServiceOut
-from app.models.service import Service
+from app.repositories.booking_repo import BookingRepo
+from app.repositories.service_repo import ServiceRepo
+from app.core import availability
+from app.core.config import settings
 from app.core.dependencies import require_role
+from app.core.encoding import LIST_RESPONSES, list_response
+from app.core.cache import cached, response_cache, reviews_tag, service_tag, services_tag
+from app.core.singleflight import coalesced
 
 router = APIRouter(prefix="/services", tags=["services"])
 
-@router.get("", response_model=list[ServiceOut])
-async def list_services(q: str | None = None, price_min: float | None = None, price_max: float | None = None, active: bool | None = None, session: AsyncSession = Depends(get_session)):
-    stmt = select(Service)
-    if q: stmt = stmt.where(Service.title.ilike(f"%{q}%"))
-    if price_min is not None: stmt = stmt.where(Service.price >= price_min)
-    if price_max is not None: stmt = stmt.where(Service.price <= price_max)
-    if active is not None: stmt = stmt.where(Service.is_active == active)
-    res = await session.execute(stmt.order_by(Service.created_at.desc()))
-    return res.scalars().all()
+@router.get("", response_model=list[ServiceOut], responses=LIST_RESPONSES)
+@cached(lambda params: [services_tag()])
+async def list_services(request: Request, response: Response, q: str | None = None, price_min: float | None = None, price_max: float | None = None, active: bool | None = None, session: AsyncSession = Depends(get_read_session)):
+    services = await ServiceRepo(session).list(q=q, price_min=price_min, price_max=price_max, active=active)
+    return list_response(request, response, services, ServiceOut)
 
 @router.get("/{sid}", response_model=ServiceOut)
-async def get_service(sid: int, session: AsyncSession = Depends(get_session)):
-    s = (await session.execute(select(Service).where(Service.id == sid))).scalar_one_or_none()
+@cached(lambda params: [service_tag(params["sid"])])
+@coalesced
+async def get_service(sid: int, session: AsyncSession = Depends(get_read_session)):
+    s = await ServiceRepo(session).by_id(sid)
     if not s: raise HTTPException(404)
     return s
 
+@router.get(
+    "/{sid}/availability/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}, 503: {"description": "Too many open streams on this worker"}},
+)
+async def availability_stream(sid: int, request: Request, session: AsyncSession = Depends(get_primary_read_session)):
+    """
+    Server-Sent Events: a `snapshot` of the service's active bookings from now on, then an
+    `interval` message per booking created, rescheduled, cancelled or deleted. A client that
+    falls behind, or was connected while the worker's listener lost changes, gets `reset` and
+    is disconnected; reconnecting gives it a fresh snapshot.
+    """
+    sub = availability.hub.subscribe(sid)
+    if sub is None:
+        raise HTTPException(503, detail="Too many availability streams", headers={"Retry-After": "5"})
+    try:
+        # Subscribed before the snapshot is read, so no change falls between the two. The
+        # snapshot comes from the primary: a replica could still lack a booking whose NOTIFY
+        # went out before we subscribed, and the stream would never hear of it
+        if not await ServiceRepo(session).by_id(sid):
+            raise HTTPException(404)
+        bookings = await BookingRepo(session).busy_intervals(sid, datetime.now(timezone.utc))
+        snapshot = {"service_id": sid, "intervals": [availability.interval(b) for b in bookings]}
+    except BaseException:
+        availability.hub.unsubscribe(sub)
+        raise
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            yield availability.sse("snapshot", snapshot)
+            while True:
+                if sub.evicted:
+                    yield availability.sse("reset", {"reason": sub.reason})
+                    return
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), settings.availability_heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # Evicted; the check above sends the reset
+                    continue
+                yield availability.sse("interval", message)
+        finally:
+            availability.hub.unsubscribe(sub)
+
+    # X-Accel-Buffering stops nginx-style proxies from holding messages back
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.post("", response_model=ServiceOut, status_code=201, dependencies=[Depends(require_role("admin"))])
 async def create_service(data: ServiceCreate, session: AsyncSession = Depends(get_session)):
-    s = Service(**data.model_dump())
-    session.add(s)
+    s = await ServiceRepo(session).create(data.model_dump())
     await session.commit()
+    await response_cache.invalidate(services_tag())
     return s
 
 @router.patch("/{sid}", response_model=ServiceOut, dependencies=[Depends(require_role("admin"))])
 async def patch_service(sid: int, data: ServiceCreate, session: AsyncSession = Depends(get_session)):
-    s = (await session.execute(select(Service).where(Service.id == sid))).scalar_one_or_none()
+    s = await ServiceRepo(session).update(sid, data.model_dump())
     if not s: raise HTTPException(404)
-    for k, v in data.model_dump().items(): setattr(s, k, v)
     await session.commit()
+    await response_cache.invalidate(services_tag(), service_tag(sid))
     return s
 
 @router.delete("/{sid}", status_code=204, dependencies=[Depends(require_role("admin"))])
 async def delete_service(sid: int, session: AsyncSession = Depends(get_session)):
-    s = (await session.execute(select(Service).where(Service.id == sid))).scalar_one_or_none()
-    if not s: raise HTTPException(404)
-    await session.delete(s)
+    if not await ServiceRepo(session).delete(sid): raise HTTPException(404)
     await session.commit()
+    # Its bookings, and so its reviews, cascade with it
+    await response_cache.invalidate(services_tag(), service_tag(sid), reviews_tag(sid))
     return
@@ -1,21 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.session import get_session
+from app.db.session import get_primary_read_session, get_session
 from app.core.dependencies import get_current_user
 from app.schemas.user import UserOut, UserPatch
-from app.models.user import User
+from app.repositories.user_repo import UserRepo
 
 router = APIRouter(prefix="/me", tags=["users"])
 
 @router.get("", response_model=UserOut)
-async def me(payload=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    u = (await session.execute(select(User).where(User.id == int(payload["sub"])))).scalar_one()
+async def me(payload=Depends(get_current_user), session: AsyncSession = Depends(get_primary_read_session)):
+    u = await UserRepo(session).by_id(int(payload["sub"]))
+    if not u: raise HTTPException(404, detail="User not found")
     return UserOut(id=u.id, name=u.name, email=u.email, role=u.role.value)
 
 @router.patch("", response_model=UserOut)
 async def patch_me(data: UserPatch, payload=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    u = (await session.execute(select(User).where(User.id == int(payload["sub"])))).scalar_one()
-    if data.name: u.name = data.name
-    await session.commit()
+    repo = UserRepo(session)
+    if data.name:
+        u = await repo.update_name(int(payload["sub"]), data.name)
+        await session.commit()
+    else:
+        u = await repo.by_id(int(payload["sub"]))
+    if not u: raise HTTPException(404, detail="User not found")
     return UserOut(id=u.id, name=u.name, email=u.email, role=u.role.value)
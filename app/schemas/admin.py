@@ -0,0 +1,54 @@
+from datetime import date, datetime
+from typing import Literal
+from pydantic import BaseModel, Field, model_validator
+
+class ProfileStart(BaseModel):
+    mode: Literal["sample", "cprofile"] = "sample"
+    requests: int = Field(0, ge=0, le=100_000)
+    seconds: float = Field(0, ge=0, le=600)
+    interval_ms: float = Field(5, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def _bounded(self):
+        if not self.requests and not self.seconds:
+            raise ValueError("set requests and/or seconds")
+        return self
+
+class ServiceTotals(BaseModel):
+    service_id: int
+    pending: int
+    confirmed: int
+    cancelled: int
+    completed: int
+    booked_minutes: int
+    revenue: float
+
+class ServiceDayStats(ServiceTotals):
+    day: date
+
+class OccupancyHeatmap(BaseModel):
+    start: date = Field(serialization_alias="from")
+    end: date = Field(serialization_alias="to")
+    service_id: int | None
+    as_of: datetime
+    services: int
+    bookings: int
+    weekdays: list[str]
+    booked_hours: list[list[float]]  # [weekday][hour], UTC
+    utilization: list[list[float]]
+
+class ServiceUtilization(BaseModel):
+    service_id: int
+    utilization: float
+
+class UtilizationReport(BaseModel):
+    start: date = Field(serialization_alias="from")
+    end: date = Field(serialization_alias="to")
+    as_of: datetime
+    services: int
+    days: int
+    bookings: int
+    mean: float | None
+    per_service: dict[str, float | None]
+    per_service_day: dict[str, float | None]
+    busiest: list[ServiceUtilization]
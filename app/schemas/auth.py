@@ -39,3 +39,16 @@ class TokenOut(BaseModel):
     access_token: str
     refresh_token: str
     token_type: str = "bearer"
+
+class BulkRegisterResult(BaseModel):
+    index: int
+    email: str | None = None
+    status: str  # created | duplicate | invalid
+    id: int | None = None
+    detail: str | None = None
+
+class BulkRegisterOut(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: list[BulkRegisterResult]
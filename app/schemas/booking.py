@@ -19,3 +19,16 @@ class BookingOut(BaseModel):
     end_time: datetime
     status: str
     created_at: datetime
+
+class BookingChange(BaseModel):
+    cursor: int
+    type: str  # booking.created | booking.updated | booking.status_changed | booking.deleted
+    booking_id: int
+    occurred_at: datetime
+    data: dict
+
+class BookingChanges(BaseModel):
+    changes: list[BookingChange]
+    # Pass as `since` on the next call
+    next_cursor: int
+    has_more: bool
@@ -0,0 +1,29 @@
+"""Production entry point: `python -m app.server` runs gunicorn with uvicorn workers using gunicorn.conf.py."""
+import os
+import sys
+from uvicorn.workers import UvicornWorker
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+class BookItWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools; lifespan events run in every worker."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+def main() -> None:
+    from gunicorn.app.wsgiapp import WSGIApplication
+
+    class BookItApplication(WSGIApplication):
+        def load_config(self):
+            super().load_config()
+            # Command-line flags are applied after gunicorn.conf.py has run, so the worker count
+            # it exported may be stale; workers read this to split DB_MAX_CONNECTIONS, and a
+            # preloaded app reads it before any server hook runs
+            os.environ["WEB_CONCURRENCY"] = str(self.cfg.workers)
+
+    # Extra arguments override the config file, e.g. `python -m app.server --workers 2`
+    sys.argv = [sys.argv[0], "--config", CONFIG_FILE, *sys.argv[1:], "app.main:app"]
+    BookItApplication("%(prog)s [OPTIONS] [APP_MODULE]").run()
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,64 @@
 from datetime import datetime
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import availability, outbox
+from app.core.idempotency import IdempotentRequest
 from app.repositories.booking_repo import BookingRepo
+from app.repositories.stats_repo import BookingSlot, ServiceStatsRepo
 from app.models.booking import Booking, BookingStatus
+from app.schemas.booking import BookingOut
+
+async def record_booking_event(session: AsyncSession, event_type: str, booking: Booking, before: BookingSlot | None = None) -> None:
+    """
+    Side effects of a booking write, in its transaction: the daily rollup moving from `before`
+    (None for a new booking) to its new state, the booking.* outbox event and the slot change
+    announcement. The rollup goes first: it may wait out a rebuild of the service, which should
+    not happen while holding an outbox id that later commits would overtake.
+    """
+    await ServiceStatsRepo(session).apply(before=before, after=BookingSlot.of(booking))
+    await outbox.record(session, event_type, booking.id, booking.user_id, BookingOut.model_validate(booking, from_attributes=True))
+    await availability.notify(session, booking.service_id, availability.interval(booking))
+
+async def record_booking_deleted(session: AsyncSession, booking: Booking) -> None:
+    await ServiceStatsRepo(session).apply(before=BookingSlot.of(booking), after=None)
+    await outbox.record(session, "booking.deleted", booking.id, booking.user_id, {"id": booking.id, "user_id": booking.user_id, "service_id": booking.service_id})
+    await availability.notify(session, booking.service_id, {"booking_id": booking.id, "busy": False, "deleted": True})
 
 class BookingService:
     def __init__(self, session: AsyncSession):
         self.repo = BookingRepo(session)
         self.session = session
 
-    async def create(self, *, user_id: int, service_id: int, start: datetime, end: datetime) -> Booking:
+    async def create(self, *, user_id: int, service_id: int, start: datetime, end: datetime, idempotency: IdempotentRequest | None = None) -> Booking:
         if start >= end:
             raise HTTPException(422, detail="start_time must be before end_time")
-        if await self.repo.conflicts(service_id, start, end):
+        # Conflict check and insert in one statement
+        b = await self.repo.create_if_free(user_id=user_id, service_id=service_id, start=start, end=end)
+        if not b:
             raise HTTPException(409, detail="Booking overlaps an existing one")
-        b = Booking(user_id=user_id, service_id=service_id, start_time=start, end_time=end)
-        b = await self.repo.create(b)
+        await record_booking_event(self.session, "booking.created", b)
+        if idempotency is not None:
+            await idempotency.record(b)
         await self.session.commit()
         return b
 
     async def patch_as_owner(self, *, booking: Booking, start=None, end=None, cancel=False):
         if booking.status not in {BookingStatus.pending, BookingStatus.confirmed}:
             raise HTTPException(409, detail="Cannot modify non-active booking")
+        before = BookingSlot.of(booking)
         if cancel:
             booking.status = BookingStatus.cancelled
         if start and end:
             if await self.repo.conflicts(booking.service_id, start, end):
                 raise HTTPException(409, detail="New time conflicts")
             booking.start_time, booking.end_time = start, end
+        await record_booking_event(self.session, "booking.updated", booking, before)
         await self.session.commit()
         return booking
 
     async def admin_update_status(self, booking: Booking, status: BookingStatus):
+        before = BookingSlot.of(booking)
         booking.status = status
+        await record_booking_event(self.session, "booking.status_changed", booking, before)
         await self.session.commit()
         return booking
@@ -1 +1,75 @@
-# User business logic and service layer
+from typing import Any, AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import hash_passwords
+from app.models.user import UserRole
+from app.repositories.user_repo import UserRepo
+from app.schemas.auth import RegisterIn, BulkRegisterResult, BulkRegisterOut
+
+class UserService:
+    def __init__(self, session: AsyncSession):
+        self.repo = UserRepo(session)
+        self.session = session
+
+    async def bulk_register(self, rows: AsyncIterator[Any]) -> BulkRegisterOut:
+        results: list[BulkRegisterResult] = []
+        batch: list[tuple[int, Any]] = []
+        index = 0
+        async for raw in rows:
+            batch.append((index, raw))
+            index += 1
+            if len(batch) >= settings.bulk_register_batch_size:
+                results.extend(await self._register_batch(batch))
+                batch = []
+        if batch:
+            results.extend(await self._register_batch(batch))
+        return BulkRegisterOut(
+            created=sum(r.status == "created" for r in results),
+            duplicates=sum(r.status == "duplicate" for r in results),
+            invalid=sum(r.status == "invalid" for r in results),
+            results=results,
+        )
+
+    async def _register_batch(self, batch: list[tuple[int, Any]]) -> list[BulkRegisterResult]:
+        results: dict[int, BulkRegisterResult] = {}
+        pending: dict[str, tuple[int, RegisterIn]] = {}
+
+        for index, raw in batch:
+            try:
+                data = RegisterIn.model_validate(raw)
+            except ValidationError as e:
+                email = raw.get("email") if isinstance(raw, dict) else None
+                if not isinstance(email, str):
+                    email = None
+                results[index] = BulkRegisterResult(index=index, email=email, status="invalid", detail=e.errors()[0]["msg"])
+                continue
+            if data.email in pending:
+                results[index] = BulkRegisterResult(index=index, email=data.email, status="duplicate", detail="Email repeated in request")
+                continue
+            pending[data.email] = (index, data)
+
+        for email in await self.repo.existing_emails(list(pending)):
+            index, _ = pending.pop(email)
+            results[index] = BulkRegisterResult(index=index, email=email, status="duplicate", detail="Email already registered")
+
+        if pending:
+            hashes = await hash_passwords([data.password for _, data in pending.values()])
+            created = await self.repo.insert_many([
+                {
+                    "name": data.name,
+                    "email": data.email,
+                    "password_hash": password_hash,
+                    "role": UserRole.admin if data.is_admin else UserRole.user,
+                }
+                for (_, data), password_hash in zip(pending.values(), hashes)
+            ])
+            await self.session.commit()
+            for email, (index, _) in pending.items():
+                if email in created:
+                    results[index] = BulkRegisterResult(index=index, email=email, status="created", id=created[email])
+                else:
+                    # Lost a race with a concurrent registration between the lookup and the insert
+                    results[index] = BulkRegisterResult(index=index, email=email, status="duplicate", detail="Email already registered")
+
+        return [results[index] for index, _ in batch]
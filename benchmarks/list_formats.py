@@ -0,0 +1,59 @@
+"""
+Payload size and encode time of list responses: FastAPI's JSON path vs columnar JSON and MessagePack.
+
+    python -m benchmarks.list_formats [rows ...]
+
+The JSON column mirrors what a `response_model=list[BookingOut]` endpoint does with ORM rows
+(validate from attributes, dump in JSON mode, json.dumps); the others are app.core.encoding.
+Sizes are also given gzipped, as most clients negotiate compression.
+"""
+import gzip
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from pydantic import TypeAdapter
+from app.core.encoding import COLUMNAR_JSON, MSGPACK, columns, encode
+from app.models.booking import Booking
+from app.models import review, service, user  # noqa: F401 - registers the tables
+from app.schemas.booking import BookingOut
+
+def make_rows(n: int) -> list[Booking]:
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    return [
+        Booking(id=i, user_id=i % 50 + 1, service_id=i % 20 + 1, start_time=base + timedelta(hours=i),
+                end_time=base + timedelta(hours=i, minutes=45), status="confirmed", created_at=base)
+        for i in range(1, n + 1)
+    ]
+
+adapter = TypeAdapter(list[BookingOut])
+
+def fastapi_json(rows) -> bytes:
+    content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    # Starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+ENCODERS = {
+    "json (current)": fastapi_json,
+    "columnar json": lambda rows: encode(columns(rows, BookingOut), COLUMNAR_JSON),
+    "msgpack": lambda rows: encode(columns(rows, BookingOut), MSGPACK),
+}
+
+def main(sizes: list[int]):
+    print(f"{'rows':>7} {'format':16} {'bytes':>10} {'gzip':>9} {'encode us':>11} {'vs json':>8}")
+    for n in sizes:
+        rows = make_rows(n)
+        baseline = None
+        for name, enc in ENCODERS.items():
+            body = enc(rows)
+            number = max(1, 20_000 // n)
+            per_call = min(timeit.repeat(lambda: enc(rows), number=number, repeat=5)) / number * 1e6
+            baseline = baseline or per_call
+            print(f"{n:>7} {name:16} {len(body):>10} {len(gzip.compress(body)):>9} {per_call:>11.1f} {per_call / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 100, 1000, 10000])
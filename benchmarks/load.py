@@ -0,0 +1,309 @@
+"""
+Concurrent load scenarios against a real server, with per-endpoint latency percentiles.
+
+    python -m benchmarks.load [--scenarios browse,login,...] [--concurrency 20] [--duration 10]
+                              [--database-url URL] [--workers 1]
+                              [--output results.json] [--baseline baseline.json] [--max-regression 0.2]
+
+Boots `uvicorn app.main:app` in a subprocess against --database-url (a throwaway SQLite
+file by default; missing tables are created from the models, so run migrations first on
+Postgres), seeds an admin, users and services through the API, then runs each scenario
+for --duration seconds with --concurrency clients. Prints throughput and p50/p95/p99 per
+endpoint and writes them as JSON with --output.
+
+With --baseline, endpoints whose p95 grew or whose throughput dropped by more than
+--max-regression (a fraction) compared to an earlier --output file are reported and the
+process exits with status 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+SCENARIOS = ("browse", "login", "book_contention", "list_bookings", "post_review")
+PASSWORD = "benchpassword"
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, client, endpoint: str, method: str, url: str, ok=(200, 201, 204), **kw):
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kw)
+        except Exception:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if r.status_code not in ok:
+            self.errors[endpoint] += 1
+        return r
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+class Fixture:
+    """Users, tokens and services seeded for one run; names are unique so runs can share a database."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.admin: dict = {}
+        self.users: list[tuple[str, dict]] = []
+        self.services: list[int] = []
+        self.contended_service = 0
+        self.review_service = 0
+        self.review_slots = itertools.count()
+
+def _slot(base: datetime, hours: int) -> dict:
+    start = base + timedelta(hours=hours)
+    return {"start_time": start.isoformat(), "end_time": (start + timedelta(minutes=30)).isoformat()}
+
+BASE_TIME = datetime(2040, 1, 1, tzinfo=timezone.utc)
+
+async def browse(c, rec: Recorder, fx: Fixture, worker: int):
+    await rec.request(c, "GET /services", "GET", "/services")
+    sid = random.choice(fx.services)
+    await rec.request(c, "GET /services/{sid}", "GET", f"/services/{sid}")
+    await rec.request(c, "GET /reviews/services/{service_id}", "GET", f"/reviews/services/{sid}")
+
+async def login(c, rec: Recorder, fx: Fixture, worker: int):
+    email, _ = fx.users[worker % len(fx.users)]
+    await rec.request(c, "POST /auth/login", "POST", "/auth/login", json={"email": email, "password": PASSWORD})
+
+async def book_contention(c, rec: Recorder, fx: Fixture, worker: int):
+    # Every client competes for the same handful of slots; 409 is the expected loser outcome
+    _, headers = fx.users[worker % len(fx.users)]
+    slot = {"service_id": fx.contended_service, **_slot(BASE_TIME, random.randrange(5))}
+    r = await rec.request(c, "POST /bookings", "POST", "/bookings", ok=(201, 409), json=slot, headers=headers)
+    if r is not None and r.status_code == 201:
+        # Free the slot again so the contention continues for the whole run
+        await rec.request(c, "DELETE /bookings/{bid}", "DELETE", f"/bookings/{r.json()['id']}", headers=fx.admin)
+
+async def list_bookings(c, rec: Recorder, fx: Fixture, worker: int):
+    _, headers = fx.users[worker % len(fx.users)]
+    await rec.request(c, "GET /bookings", "GET", "/bookings", headers=headers)
+
+async def post_review(c, rec: Recorder, fx: Fixture, worker: int):
+    _, headers = fx.users[worker % len(fx.users)]
+    slot = {"service_id": fx.review_service, **_slot(BASE_TIME, next(fx.review_slots))}
+    r = await rec.request(c, "POST /bookings", "POST", "/bookings", json=slot, headers=headers)
+    if r is None or r.status_code != 201:
+        return
+    bid = r.json()["id"]
+    await rec.request(c, "PATCH /bookings/{bid}/status", "PATCH", f"/bookings/{bid}/status?status=completed", headers=fx.admin)
+    await rec.request(c, "POST /reviews", "POST", "/reviews", json={"booking_id": bid, "rating": random.randint(1, 5)}, headers=headers)
+
+SCENARIO_FUNCS = {f.__name__: f for f in (browse, login, book_contention, list_bookings, post_review)}
+
+def _bearer(token_response) -> dict:
+    return {"Authorization": "Bearer " + token_response.json()["access_token"]}
+
+async def seed(c, database_url: str, users: int, services: int) -> Fixture:
+    from sqlalchemy import update
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.models.user import User, UserRole
+
+    fx = Fixture()
+    admin_email = f"admin-{fx.run_id}@bench.example.com"
+    r = await c.post("/auth/register", json={"name": "Bench Admin", "email": admin_email, "password": PASSWORD})
+    r.raise_for_status()
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(update(User).where(User.email == admin_email).values(role=UserRole.admin))
+    await engine.dispose()
+    fx.admin = _bearer(await c.post("/auth/login", json={"email": admin_email, "password": PASSWORD}))
+
+    emails = [f"user-{fx.run_id}-{i}@bench.example.com" for i in range(users)]
+    rows = [{"name": f"User {i}", "email": e, "password": PASSWORD} for i, e in enumerate(emails)]
+    (await c.post("/auth/register/bulk", json=rows, headers=fx.admin, timeout=300)).raise_for_status()
+    logins = await asyncio.gather(*(c.post("/auth/login", json={"email": e, "password": PASSWORD}) for e in emails))
+    fx.users = [(e, _bearer(r)) for e, r in zip(emails, logins)]
+
+    for i in range(services + 2):
+        body = {"title": f"Bench service {fx.run_id} {i}", "description": "Load test", "price": 10 + i, "duration_minutes": 30}
+        r = await c.post("/services", json=body, headers=fx.admin)
+        r.raise_for_status()
+        fx.services.append(r.json()["id"])
+    fx.contended_service, fx.review_service = fx.services.pop(), fx.services.pop()
+    return fx
+
+async def run_scenario(c, name: str, fx: Fixture, concurrency: int, duration: float) -> dict:
+    rec = Recorder()
+    func = SCENARIO_FUNCS[name]
+    deadline = time.perf_counter() + duration
+
+    async def worker(i: int):
+        while time.perf_counter() < deadline:
+            await func(c, rec, fx, i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return rec.summary(time.perf_counter() - start)
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Human-readable regressions of p95 latency or throughput beyond the allowed fraction."""
+    problems = []
+    for scenario, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for endpoint, cur in current["endpoints"].items():
+            old = base["endpoints"].get(endpoint)
+            if not old:
+                continue
+            if old["p95_ms"] and cur["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+                problems.append(f"{scenario} {endpoint}: p95 {old['p95_ms']}ms -> {cur['p95_ms']}ms")
+            if old["throughput_rps"] and cur["throughput_rps"] < old["throughput_rps"] * (1 - max_regression):
+                problems.append(f"{scenario} {endpoint}: throughput {old['throughput_rps']} -> {cur['throughput_rps']} req/s")
+    return problems
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def _wait_until_live(c, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            if (await c.get("/livez")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become live")
+
+def _print(results: dict) -> None:
+    for scenario, s in results["scenarios"].items():
+        print(f"\n{scenario}: {s['requests']} requests in {s['duration_s']}s, {s['throughput_rps']} req/s, {s['errors']} errors")
+        print(f"  {'endpoint':38} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+        for endpoint, e in s["endpoints"].items():
+            print(f"  {endpoint:38} {e['count']:>7} {e['throughput_rps']:>8} {e['p50_ms']:>8} {e['p95_ms']:>8} {e['p99_ms']:>8} {e['errors']:>6}")
+
+async def main(args) -> int:
+    import httpx
+    from sqlalchemy.ext.asyncio import create_async_engine
+    import importlib
+    import pkgutil
+    import app.models
+    from app.db.base import Base
+    # Every model, so tables added later (outbox, idempotency keys, rollups) exist too
+    for m in pkgutil.iter_modules(app.models.__path__):
+        importlib.import_module(f"app.models.{m.name}")
+
+    engine = create_async_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": args.database_url, "APP_ENV": os.environ.get("APP_ENV", "bench")}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        stdout=subprocess.DEVNULL if not args.server_log else None,
+        stderr=subprocess.DEVNULL if not args.server_log else None,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as c:
+            await _wait_until_live(c, proc)
+            fx = await seed(c, args.database_url, users=args.users or args.concurrency, services=args.services)
+            results = {
+                "meta": {
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "database": args.database_url.split("://", 1)[0],
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "workers": args.workers,
+                },
+                "scenarios": {},
+            }
+            for name in args.scenarios:
+                results["scenarios"][name] = await run_scenario(c, name, fx, args.concurrency, args.duration)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    _print(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f), args.max_regression)
+        if problems:
+            print(f"\nregressions beyond {args.max_regression:.0%} of {args.baseline}:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print(f"\nno regressions beyond {args.max_regression:.0%} of {args.baseline}")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scenarios", type=lambda s: [x.strip() for x in s.split(",") if x.strip()], default=list(SCENARIOS),
+                        help=f"comma-separated, any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--users", type=int, default=0, help="seeded users (default: one per client)")
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", default=f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--server-log", action="store_true", help="show the server's output")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    # The models import app settings, which require a database URL
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.exit(asyncio.run(main(args)))
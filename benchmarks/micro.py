@@ -0,0 +1,237 @@
+"""
+Microbenchmarks for the functions that dominate CPU profiles.
+
+    python -m benchmarks.micro [--only hash,verify,token,truncate,schemas,conflicts]
+                               [--rounds 10,12] [--rows 10000,100000,1000000]
+                               [--repeat 5] [--database-url URL] [--json results.json]
+
+Each case is calibrated to run for at least --min-time seconds per sample, sampled
+--repeat times, and reported as min/median/mean time per call. `conflicts` seeds the
+bookings table of --database-url (a throwaway SQLite file by default) up to each --rows
+size in turn and times BookingRepo.conflicts against it. --json writes the results
+(`-` for stdout) so changes to these paths can be compared with numbers.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+
+GROUPS = ("hash", "verify", "token", "truncate", "schemas", "conflicts")
+SERVICES = 100
+
+def _result(name: str, params: dict, samples: list[float], number: int) -> dict:
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "params": params,
+        "number": number,
+        "repeat": len(samples),
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+        "ops_per_s": round(1 / median, 1) if median else None,
+    }
+
+def bench(name: str, fn, repeat: int, min_time: float, **params) -> dict:
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return _result(name, params, samples, number)
+
+async def bench_async(name: str, fn, repeat: int, min_time: float, **params) -> dict:
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - start
+
+    number = 1
+    while await run(number) < min_time:
+        number *= 2
+    samples = [await run(number) / number for _ in range(repeat)]
+    return _result(name, params, samples, number)
+
+def bench_hash(args) -> list[dict]:
+    from app.core import security
+    default_context = security.pwd_context
+    results = []
+    try:
+        for rounds in args.rounds:
+            security.pwd_context = default_context.copy(bcrypt__default_rounds=rounds, bcrypt__min_rounds=min(rounds, 10))
+            results.append(bench("hash_password", lambda: security.hash_password("correct horse battery"), args.repeat, args.min_time, rounds=rounds))
+    finally:
+        security.pwd_context = default_context
+    return results
+
+def bench_verify(args) -> list[dict]:
+    from app.core import security
+    results = []
+    for rounds in args.rounds:
+        # Verification cost follows the rounds stored in the hash, not the context default
+        hashed = security.pwd_context.hash("correct horse battery", rounds=rounds)
+        results.append(bench("verify_password", lambda: security.verify_password("correct horse battery", hashed), args.repeat, args.min_time, rounds=rounds))
+    return results
+
+def bench_token(args) -> list[dict]:
+    from app.core.auth import _create_token, create_access_token, decode_token
+    token = create_access_token("42", "user")
+    return [
+        bench("_create_token", lambda: _create_token("42", 15, {"role": "user", "type": "access"}), args.repeat, args.min_time),
+        bench("decode_token", lambda: decode_token(token), args.repeat, args.min_time),
+    ]
+
+def bench_truncate(args) -> list[dict]:
+    from app.core.security import _truncate_password
+    cases = {"short_ascii": "secret12", "long_ascii": "x" * 200, "long_multibyte": "пароль€" * 30}
+    return [bench("_truncate_password", lambda p=p: _truncate_password(p), args.repeat, args.min_time, case=case) for case, p in cases.items()]
+
+def _booking_rows(n: int, start_id: int = 1) -> list[dict]:
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(start_id, start_id + n):
+        start = base + timedelta(hours=i // SERVICES)
+        rows.append({
+            "id": i, "user_id": 1, "service_id": i % SERVICES + 1, "start_time": start,
+            "end_time": start + timedelta(minutes=45), "status": "pending" if i % 3 else "cancelled",
+            "created_at": base,
+        })
+    return rows
+
+def bench_schemas(args) -> list[dict]:
+    from pydantic import TypeAdapter
+    from app.models.booking import Booking
+    from app.schemas.booking import BookingCreate, BookingOut
+    results = []
+    create_list = TypeAdapter(list[BookingCreate])
+    out_list = TypeAdapter(list[BookingOut])
+    for size in (1, 100, 1000):
+        rows = _booking_rows(size)
+        payload = [{"service_id": r["service_id"], "start_time": r["start_time"].isoformat(), "end_time": r["end_time"].isoformat()} for r in rows]
+        payload_json = json.dumps(payload).encode()
+        orm = [Booking(**r) for r in rows]
+        results += [
+            bench("BookingCreate.validate_python", lambda p=payload: create_list.validate_python(p), args.repeat, args.min_time, items=size),
+            bench("BookingCreate.validate_json", lambda p=payload_json: create_list.validate_json(p), args.repeat, args.min_time, items=size),
+            # What FastAPI does with a response_model=list[BookingOut] endpoint returning ORM rows
+            bench("BookingOut.from_orm+dump_json", lambda o=orm: out_list.dump_json(out_list.validate_python(o, from_attributes=True)), args.repeat, args.min_time, items=size),
+        ]
+    return results
+
+async def bench_conflicts(args) -> list[dict]:
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db.base import Base
+    from app.models import review  # noqa: F401 - registers the table
+    from app.models.booking import Booking
+    from app.models.service import Service
+    from app.models.user import User
+    from app.repositories.booking_repo import BookingRepo
+
+    engine = create_async_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if not (await conn.execute(select(func.count()).select_from(User))).scalar():
+            await conn.execute(insert(User), [{"id": 1, "name": "Bench", "email": "bench@example.com", "password_hash": "x"}])
+            await conn.execute(insert(Service), [
+                {"id": i, "title": f"Service {i}", "description": "Bench", "price": 10, "duration_minutes": 45}
+                for i in range(1, SERVICES + 1)
+            ])
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(42)
+    results = []
+    try:
+        for target in sorted(args.rows):
+            async with engine.begin() as conn:
+                have = (await conn.execute(select(func.count()).select_from(Booking))).scalar()
+                print(f"seeding bookings {have} -> {target}", file=sys.stderr)
+                for chunk_start in range(have, target, 10_000):
+                    await conn.execute(insert(Booking), _booking_rows(min(10_000, target - chunk_start), start_id=chunk_start + 1))
+            # Probes spread over the seeded range: roughly half hit an existing booking
+            span_hours = max(target // SERVICES, 1)
+            base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+            probes = itertools.cycle([
+                (rng.randint(1, SERVICES), base + timedelta(hours=rng.randrange(span_hours), minutes=rng.choice((0, 50))))
+                for _ in range(1000)
+            ])
+            async with Session() as session:
+                repo = BookingRepo(session)
+
+                async def probe():
+                    sid, start = next(probes)
+                    await repo.conflicts(sid, start, start + timedelta(minutes=5))
+
+                results.append(await bench_async("BookingRepo.conflicts", probe, args.repeat, args.min_time, rows=target, dialect=engine.dialect.name))
+    finally:
+        await engine.dispose()
+    return results
+
+def _print(results: list[dict], file=sys.stdout) -> None:
+    print(f"{'benchmark':32} {'params':30} {'median us':>12} {'min us':>12} {'ops/s':>12}", file=file)
+    for r in results:
+        params = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{r['name']:32} {params:30} {r['median_us']:>12} {r['min_us']:>12} {r['ops_per_s']:>12}", file=file)
+
+def main(args) -> int:
+    results: list[dict] = []
+    runners = {"hash": bench_hash, "verify": bench_verify, "token": bench_token, "truncate": bench_truncate, "schemas": bench_schemas}
+    for group in args.only:
+        if group == "conflicts":
+            results += asyncio.run(bench_conflicts(args))
+        else:
+            results += runners[group](args)
+    # Keep stdout parseable when the JSON goes there
+    _print(results, file=sys.stderr if args.json == "-" else sys.stdout)
+    if args.json:
+        doc = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "min_time_s": args.min_time,
+            },
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(doc, sys.stdout, indent=2)
+        else:
+            with open(args.json, "w") as f:
+                json.dump(doc, f, indent=2)
+    return 0
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--only", type=lambda s: [x.strip() for x in s.split(",") if x.strip()], default=list(GROUPS),
+                        help=f"comma-separated, any of {', '.join(GROUPS)}")
+    parser.add_argument("--rounds", type=_ints, default=[10, 12], help="bcrypt cost factors")
+    parser.add_argument("--rows", type=_ints, default=[10_000, 100_000, 1_000_000], help="bookings table sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample")
+    parser.add_argument("--database-url", default=f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'micro.db')}")
+    parser.add_argument("--json", help="write results as JSON (- for stdout)")
+    args = parser.parse_args(argv)
+    unknown = set(args.only) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    # app.core.config requires a database URL at import time
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    sys.exit(main(args))
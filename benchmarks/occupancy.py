@@ -0,0 +1,101 @@
+"""
+Occupancy heatmap and utilization over a synthetic in-memory bookings snapshot.
+
+    python -m benchmarks.occupancy [--rows 10000000] [--services 2000] [--years 3]
+                                   [--repeat 3] [--json results.json]
+
+Builds a BookingSnapshot of --rows bookings (30 to 120 minutes, spread over --services
+services and --years years, a tenth cancelled) without touching a database, then times the
+computations behind /admin/occupancy: the all-services and one-service heatmaps over the
+whole span and over the last year, and utilization percentiles over the last year. `load`
+times turning fetched row partitions into columns, the CPU half of a snapshot refresh,
+at a tenth of --rows. Snapshot memory is reported alongside.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import numpy as np
+from app.core.occupancy import DAY, BookingSnapshot, _join_columns, _partition_columns, heatmap, utilization
+from app.repositories.booking_repo import STATUS_CODES
+from benchmarks.micro import _print, bench
+
+def make_snapshot(rows: int, services: int, years: int, seed: int = 42) -> BookingSnapshot:
+    rng = np.random.default_rng(seed)
+    lo = int(datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp())
+    span = years * 365 * DAY
+    start = np.sort(lo + rng.integers(0, span, rows) // 900 * 900)
+    end = start + rng.integers(2, 9, rows) * 900
+    status = np.where(rng.random(rows) < 0.1, STATUS_CODES["cancelled"], STATUS_CODES["confirmed"]).astype(np.int8)
+    return BookingSnapshot(
+        rng.integers(1, services + 1, rows).astype(np.int32), start.astype(np.int64), end.astype(np.int64), status,
+        np.arange(1, services + 1, dtype=np.int32), loaded_at=datetime.now(timezone.utc), load_ms=0,
+    )
+
+def _load_columns(parts: list[list[tuple]], services: np.ndarray) -> list[np.ndarray]:
+    # What load_snapshot does, in its worker thread, with the partitions the cursor returns
+    columns = [[], [], [], []]
+    for part in parts:
+        for out, col in zip(columns, _partition_columns(part)):
+            out.append(col)
+    return _join_columns(columns, services)
+
+def main(args) -> int:
+    started = time.perf_counter()
+    snap = make_snapshot(args.rows, args.services, args.years)
+    print(f"snapshot: {snap.rows} bookings, {len(snap.services)} services, {snap.nbytes / 2**20:.1f} MiB, "
+          f"built in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    first = int(snap.start.min()) // DAY * DAY
+    last = (int(snap.end.max()) // DAY + 1) * DAY
+    year = last - 365 * DAY
+    params = {"rows": args.rows}
+    results = [
+        bench("heatmap all services", lambda: heatmap(snap, first, last), args.repeat, args.min_time, span_days=(last - first) // DAY, **params),
+        bench("heatmap all services", lambda: heatmap(snap, year, last), args.repeat, args.min_time, span_days=365, **params),
+        bench("heatmap one service", lambda: heatmap(snap, first, last, service_id=1), args.repeat, args.min_time, span_days=(last - first) // DAY, **params),
+        bench("utilization p50-p99", lambda: utilization(snap, year, last, [50, 90, 95, 99]), args.repeat, args.min_time, span_days=365, **params),
+    ]
+    n = max(args.rows // 10, 1)
+    parts = [
+        list(zip(snap.service_id[i:i + 50_000].tolist(), snap.start[i:i + 50_000].tolist(),
+                 snap.end[i:i + 50_000].tolist(), snap.status[i:i + 50_000].tolist()))
+        for i in range(0, n, 50_000)
+    ]
+    results.append(bench("load partitions", lambda: _load_columns(parts, snap.services), args.repeat, args.min_time, rows=n))
+    _print(results, file=sys.stderr if args.json == "-" else sys.stdout)
+    if args.json:
+        doc = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "snapshot_bytes": snap.nbytes,
+            },
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(doc, sys.stdout, indent=2)
+        else:
+            with open(args.json, "w") as f:
+                json.dump(doc, f, indent=2)
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--services", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.0, help="seconds per sample")
+    parser.add_argument("--json", help="write results as JSON (- for stdout)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,91 @@
+"""
+Per-query Python overhead of ad-hoc select() constructs vs the cached lambda statements
+used by the repositories.
+
+    python -m benchmarks.statement_cache [iterations]
+
+Runs against an in-memory SQLite database so the numbers are dominated by SQLAlchemy's
+statement construction, cache-key generation and result handling rather than the server.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import create_engine, select, lambda_stmt
+from sqlalchemy.orm import Session
+from app.db.base import Base
+from app.models.user import User
+from app.models.service import Service
+from app.models.booking import Booking, BookingStatus
+from app.models.review import Review  # noqa: F401 - registers the table
+
+def adhoc_by_id(session, bid):
+    return session.execute(select(Booking).where(Booking.id == bid)).scalar_one_or_none()
+
+def cached_by_id(session, bid):
+    return session.execute(lambda_stmt(lambda: select(Booking).where(Booking.id == bid))).scalar_one_or_none()
+
+def adhoc_list(session, user_id, status):
+    q = select(Booking)
+    if user_id:
+        q = q.where(Booking.user_id == user_id)
+    if status:
+        q = q.where(Booking.status == BookingStatus(status))
+    return session.execute(q.order_by(Booking.start_time.desc())).scalars().all()
+
+def cached_list(session, user_id, status):
+    q = lambda_stmt(lambda: select(Booking))
+    if user_id:
+        q += lambda s: s.where(Booking.user_id == user_id)
+    if status:
+        st = BookingStatus(status)
+        q += lambda s: s.where(Booking.status == st)
+    q += lambda s: s.order_by(Booking.start_time.desc())
+    return session.execute(q).scalars().all()
+
+def build_only_adhoc(bid):
+    return select(Booking).where(Booking.id == bid)._generate_cache_key()
+
+def build_only_cached(bid):
+    return lambda_stmt(lambda: select(Booking).where(Booking.id == bid))._generate_cache_key()
+
+def seed(engine):
+    from datetime import datetime, timedelta, timezone
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add(User(id=1, name="u", email="u@example.com", password_hash="x"))
+        s.add(Service(id=1, title="s", description="d", price=10, duration_minutes=60))
+        t0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        s.add_all(
+            Booking(user_id=1, service_id=1, start_time=t0 + timedelta(hours=i), end_time=t0 + timedelta(hours=i, minutes=30), status="pending")
+            for i in range(20)
+        )
+        s.commit()
+
+def timeit(fn, n):
+    for _ in range(min(n, 200)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine = create_engine("sqlite://")
+    seed(engine)
+    with Session(engine) as session:
+        cases = [
+            ("build + cache key (by id)", lambda: build_only_adhoc(7), lambda: build_only_cached(7)),
+            ("booking by id", lambda: adhoc_by_id(session, 7), lambda: cached_by_id(session, 7)),
+            ("booking list (user + status)", lambda: adhoc_list(session, 1, "pending"), lambda: cached_list(session, 1, "pending")),
+        ]
+        print(f"{'case':32} {'adhoc us':>10} {'cached us':>10} {'saved':>8}")
+        for name, adhoc, cached in cases:
+            a, c = timeit(adhoc, n), timeit(cached, n)
+            print(f"{name:32} {a:10.2f} {c:10.2f} {(a - c) / a:8.1%}")
+
+if __name__ == "__main__":
+    main()
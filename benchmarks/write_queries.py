@@ -0,0 +1,77 @@
+"""
+SQL statements issued per write request.
+
+    python -m benchmarks.write_queries
+
+Boots the app against a throwaway SQLite database, drives each write endpoint once
+through an in-process ASGI client and counts the statements the engine executes
+(BEGIN/COMMIT included, as they are round trips too).
+"""
+import asyncio
+import logging
+import os
+import tempfile
+
+_db = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db}"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx
+from sqlalchemy import event, update
+from app.main import app
+from app.db.base import Base
+from app.db.session import engine
+from app.models.user import User, UserRole
+from app.models import booking, review, service  # noqa: F401 - registers the tables
+
+logging.disable(logging.INFO)
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    # Transaction control is not a cursor execute; count it separately
+    event.listen(engine.sync_engine, "commit", counter)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        async def measure(name, method, url, **kw):
+            counter.count = 0
+            r = await c.request(method, url, **kw)
+            print(f"{name:28} {r.status_code:>4} {counter.count:>8}")
+            return r
+
+        await c.post("/auth/register", json={"name": "Admin", "email": "admin@example.com", "password": "adminpassword"})
+        async with engine.begin() as conn:
+            await conn.execute(update(User).where(User.email == "admin@example.com").values(role=UserRole.admin))
+        admin = {"Authorization": "Bearer " + (await c.post("/auth/login", json={"email": "admin@example.com", "password": "adminpassword"})).json()["access_token"]}
+
+        print(f"{'request':28} {'code':>4} {'queries':>8}")
+        await measure("POST /auth/register", "POST", "/auth/register", json={"name": "User", "email": "user@example.com", "password": "userpassword"})
+        user = {"Authorization": "Bearer " + (await c.post("/auth/login", json={"email": "user@example.com", "password": "userpassword"})).json()["access_token"]}
+        await measure("PATCH /me", "PATCH", "/me", json={"name": "Renamed"}, headers=user)
+        sid = (await measure("POST /services", "POST", "/services", json={"title": "Cut", "description": "Hair", "price": 20, "duration_minutes": 30}, headers=admin)).json()["id"]
+        await measure("PATCH /services/{sid}", "PATCH", f"/services/{sid}", json={"title": "Cut+", "description": "Hair", "price": 25, "duration_minutes": 30}, headers=admin)
+        slot = {"service_id": sid, "start_time": "2030-01-01T10:00:00Z", "end_time": "2030-01-01T11:00:00Z"}
+        bid = (await measure("POST /bookings", "POST", "/bookings", json=slot, headers=user)).json()["id"]
+        await measure("PATCH /bookings/{bid}", "PATCH", f"/bookings/{bid}", json={"start_time": "2030-01-01T12:00:00Z", "end_time": "2030-01-01T13:00:00Z"}, headers=user)
+        await measure("PATCH /bookings/{bid}/status", "PATCH", f"/bookings/{bid}/status?status=completed", headers=admin)
+        rid = (await measure("POST /reviews", "POST", "/reviews", json={"booking_id": bid, "rating": 5}, headers=user)).json()["id"]
+        await measure("PATCH /reviews/{rid}", "PATCH", f"/reviews/{rid}", json={"rating": 4}, headers=user)
+        await measure("DELETE /reviews/{rid}", "DELETE", f"/reviews/{rid}", headers=user)
+        await measure("DELETE /bookings/{bid}", "DELETE", f"/bookings/{bid}", headers=admin)
+        await measure("DELETE /services/{sid}", "DELETE", f"/services/{sid}", headers=admin)
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
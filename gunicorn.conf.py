@@ -0,0 +1,58 @@
+# Gunicorn settings for `python -m app.server` (or `gunicorn -c gunicorn.conf.py app.main:app`).
+# Every setting can be overridden from the environment; see README "Running in production".
+import os
+import shutil
+
+def _cpu_count() -> int:
+    """CPUs this container may use: the cgroup quota when set, else the scheduler affinity."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+# Each worker is a single event loop, so one per core; WEB_CONCURRENCY overrides
+workers = int(os.environ.get("WEB_CONCURRENCY") or _cpu_count())
+worker_class = "app.server.BookItWorker"
+# Import the app once in the master; workers fork with the code already loaded
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+# Recycle workers after this many requests (plus jitter so they do not restart together); 0 disables
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+backlog = int(os.environ.get("GUNICORN_BACKLOG", 2048))
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = None  # RequestTimingMiddleware already logs one line per request
+
+# Workers read this to split DB_MAX_CONNECTIONS between them. This runs before command-line flags
+# are applied: `python -m app.server` exports the final count again, but plain `gunicorn -c` with
+# `--workers` does not, so set WEB_CONCURRENCY instead of passing --workers there
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Prometheus multiprocess mode: start from an empty directory so stale worker files are not summed.
+# Done while the config loads because a preloaded app creates its metric files before on_starting.
+_metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    # Threads do not survive fork: a preloaded app needs its own log writer in each worker
+    if preload_app:
+        from app.core.logging import setup_logging, stop_logging
+        stop_logging()
+        setup_logging()
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.db.base import Base
-from app.db.session import get_session
+from app.db.session import get_primary_read_session, get_session, get_read_session
 from app.core.config import settings
 
 # Test database URL
@@ -44,6 +44,8 @@ async def client(db_session):
         return db_session
     
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    app.dependency_overrides[get_primary_read_session] = override_get_session
     
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
@@ -96,7 +98,7 @@ async def test_admin(client):
     from sqlalchemy import select
     
     # Get the session from the client
-    session = client.app.dependency_overrides[get_session]()
+    session = app.dependency_overrides[get_session]()
     user = (await session.execute(select(User).where(User.email == "admin@example.com"))).scalar_one()
     user.role = UserRole.admin
     await session.commit()
@@ -0,0 +1,41 @@
+from app.core.admission import AdaptiveLimit, route_class
+
+class TestAdmission:
+    """Test route classification and the adaptive concurrency limit."""
+
+    def test_route_classes(self):
+        """Test that requests map to their class and probes and admin are exempt."""
+        assert route_class("POST", "/auth/login") == "auth"
+        assert route_class("POST", "/bookings") == "booking_writes"
+        assert route_class("GET", "/services/3/reviews") == "catalog_reads"
+        assert route_class("GET", "/bookings") == "other"
+        assert all(route_class("GET", p) is None for p in ("/readyz", "/livez", "/health", "/admin/cache", "/metrics"))
+        assert route_class("GET", "/services/3/availability/stream") is None
+
+    def test_sheds_over_limit(self):
+        """Test that requests past the limit are refused until a slot frees."""
+        limit = AdaptiveLimit(initial=2, min_limit=1, max_limit=10, tolerance=2)
+        assert limit.try_acquire() and limit.try_acquire()
+        assert not limit.try_acquire()
+        limit.release(0.01)
+        assert limit.try_acquire()
+        assert limit.shed == 1
+
+    def test_limit_grows_while_latency_holds(self):
+        """Test that a saturated class with steady latency raises its limit."""
+        limit = AdaptiveLimit(initial=10, min_limit=1, max_limit=50, tolerance=2)
+        for _ in range(50):
+            limit.in_flight = int(limit.limit)
+            limit.release(0.01)
+        assert limit.limit == 50
+
+    def test_limit_shrinks_when_latency_climbs(self):
+        """Test that latency well above the baseline drives the limit down to its floor."""
+        limit = AdaptiveLimit(initial=40, min_limit=4, max_limit=50, tolerance=2)
+        for _ in range(20):
+            limit.in_flight = int(limit.limit)
+            limit.release(0.01)
+        for _ in range(200):
+            limit.in_flight = int(limit.limit)
+            limit.release(1.0)
+        assert int(limit.limit) == 4
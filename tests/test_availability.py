@@ -0,0 +1,38 @@
+from app.core.availability import AvailabilityHub
+
+class TestAvailabilityHub:
+    """Test fan-out of availability changes to stream subscribers."""
+
+    async def test_publish_reaches_only_that_service(self):
+        """Test that subscribers get changes for their own service only."""
+        hub = AvailabilityHub(queue_size=4, max_subscribers=10)
+        a, b = hub.subscribe(1), hub.subscribe(2)
+        hub.publish(1, {"booking_id": 7})
+        assert (a.queue.qsize(), b.queue.qsize()) == (1, 0)
+
+    async def test_slow_subscriber_is_evicted(self):
+        """Test that a subscriber whose queue is full is dropped without affecting others."""
+        hub = AvailabilityHub(queue_size=2, max_subscribers=10)
+        slow, fast = hub.subscribe(1), hub.subscribe(1)
+        for i in range(3):
+            hub.publish(1, {"booking_id": i})
+            if not fast.queue.empty():
+                fast.queue.get_nowait()
+        assert (slow.evicted, fast.evicted, hub.count, hub.evictions) == (True, False, 1, 1)
+
+    async def test_subscriber_cap(self):
+        """Test that subscribing past the cap is refused until a stream closes."""
+        hub = AvailabilityHub(queue_size=2, max_subscribers=1)
+        first = hub.subscribe(1)
+        assert hub.subscribe(1) is None
+        hub.unsubscribe(first)
+        assert hub.subscribe(1) is not None
+
+    async def test_reset_all_wakes_idle_streams(self):
+        """Test that a reset reaches subscribers with nothing queued and frees their slots."""
+        hub = AvailabilityHub(queue_size=2, max_subscribers=10)
+        subs = [hub.subscribe(1), hub.subscribe(2)]
+        hub.reset_all("listener_reconnected")
+        assert all(s.evicted and s.reason == "listener_reconnected" for s in subs)
+        assert [await s.queue.get() for s in subs] == [None, None]
+        assert (hub.count, hub.resets) == (0, 2)
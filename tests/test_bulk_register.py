@@ -0,0 +1,55 @@
+import json
+import pytest
+from httpx import AsyncClient
+
+class TestBulkRegister:
+    """Test admin bulk user provisioning."""
+    
+    async def test_bulk_register_reports_per_row(self, client: AsyncClient, test_admin):
+        """Test that each row gets its own result and duplicates are skipped."""
+        rows = [
+            {"name": "Alice", "email": "alice@example.com", "password": "alicepassword"},
+            {"name": "Bob", "email": "bob@example.com", "password": "bobpassword"},
+            {"name": "Admin Again", "email": "admin@example.com", "password": "adminpassword"},
+            {"name": "Alice Again", "email": "alice@example.com", "password": "alicepassword"},
+            {"name": "Broken", "email": "not-an-email", "password": "brokenpassword"},
+            {"name": "Numeric", "email": 123, "password": "numericpassword"},
+        ]
+        
+        response = await client.post("/auth/register/bulk", json=rows, headers=test_admin["headers"])
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["created"] == 2
+        assert data["duplicates"] == 2
+        assert data["invalid"] == 2
+        assert [r["status"] for r in data["results"]] == ["created", "created", "duplicate", "duplicate", "invalid", "invalid"]
+        assert data["results"][-1]["email"] is None
+        
+        # Created users can log in
+        response = await client.post("/auth/login", json={"email": "bob@example.com", "password": "bobpassword"})
+        assert response.status_code == 200
+    
+    async def test_bulk_register_ndjson_stream(self, client: AsyncClient, test_admin):
+        """Test that rows can be streamed as NDJSON."""
+        body = "\n".join(json.dumps(r) for r in [
+            {"name": "Carol", "email": "carol@example.com", "password": "carolpassword"},
+            {"name": "Dave", "email": "dave@example.com", "password": "davepassword"},
+        ]) + "\n{not json\n"
+        
+        response = await client.post(
+            "/auth/register/bulk",
+            content=body,
+            headers={**test_admin["headers"], "Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["created"] == 2
+        assert data["invalid"] == 1
+    
+    async def test_bulk_register_requires_admin(self, client: AsyncClient, test_user):
+        """Test that regular users cannot bulk register."""
+        rows = [{"name": "Eve", "email": "eve@example.com", "password": "evepassword"}]
+        response = await client.post("/auth/register/bulk", json=rows, headers=test_user["headers"])
+        assert response.status_code == 403
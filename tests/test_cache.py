@@ -0,0 +1,62 @@
+import time
+from app.core.cache import CachedResponse, LocalTier, ResponseCache, request_key
+
+def _entry(body: bytes, tags=("services",), ttl: float = 30) -> CachedResponse:
+    return CachedResponse(200, [(b"content-type", b"application/json")], body, time.monotonic() + ttl, tags)
+
+def _scope(query: bytes, accept: bytes = b"") -> dict:
+    return {"path": "/services", "query_string": query, "headers": [(b"accept", accept)] if accept else []}
+
+class TestResponseCache:
+    """Test the response cache's LRU bound, expiry, keys and tag invalidation."""
+
+    def test_lru_evicts_oldest_over_byte_budget(self):
+        """Test that the least recently used entry is evicted once the byte budget is exceeded."""
+        tier = LocalTier(max_bytes=_entry(b"x" * 100).size * 2)
+        tier.set("a", _entry(b"x" * 100))
+        tier.set("b", _entry(b"x" * 100))
+        tier.get("a")
+        tier.set("c", _entry(b"x" * 100))
+        assert tier.get("b") is None
+        assert tier.get("a") is not None and tier.get("c") is not None
+        assert tier.bytes == _entry(b"x" * 100).size * 2
+
+    def test_expired_entries_are_misses(self):
+        """Test that an entry past its TTL is dropped on read."""
+        tier = LocalTier(max_bytes=1024)
+        tier.set("a", _entry(b"{}", ttl=-1))
+        assert tier.get("a") is None
+        assert len(tier) == 0 and tier.bytes == 0
+
+    async def test_invalidate_by_tag(self):
+        """Test that invalidation drops only entries carrying the tag."""
+        cache = ResponseCache(ttl=30, max_bytes=1024, max_entry_bytes=512, redis_url=None)
+        gen = cache.generation(["reviews:1"])
+        await cache.set("r1", 200, [], b"[]", ["reviews:1"], gen)
+        await cache.set("r2", 200, [], b"[]", ["reviews:2"], cache.generation(["reviews:2"]))
+        await cache.invalidate("reviews:1")
+        assert (await cache.get("r1"))[0] is None
+        assert (await cache.get("r2"))[1] == "local"
+
+    async def test_fill_racing_a_write_is_not_stored(self):
+        """Test that a response read before an invalidation is not cached after it."""
+        cache = ResponseCache(ttl=30, max_bytes=1024, max_entry_bytes=512, redis_url=None)
+        gen = cache.generation(["services"])
+        await cache.invalidate("services")
+        await cache.set("s", 200, [], b"[]", ["services"], gen)
+        assert (await cache.get("s"))[0] is None
+
+    async def test_no_fill_while_replicas_may_lag(self):
+        """Test that a response is not stored within replica_lag of its tag's invalidation."""
+        cache = ResponseCache(ttl=30, max_bytes=1024, max_entry_bytes=512, redis_url=None, replica_lag=60)
+        await cache.invalidate("services")
+        await cache.set("s", 200, [], b"[]", ["services"], cache.generation(["services"]))
+        assert (await cache.get("s"))[0] is None
+        await cache.set("r", 200, [], b"[]", ["reviews:1"], cache.generation(["reviews:1"]))
+        assert (await cache.get("r"))[1] == "local"
+
+    def test_key_normalizes_query_and_format(self):
+        """Test that parameter order does not matter but the negotiated format does."""
+        assert request_key(_scope(b"q=a&active=true")) == request_key(_scope(b"active=true&q=a"))
+        assert request_key(_scope(b"q=a")) != request_key(_scope(b"q=a", b"application/msgpack"))
+        assert request_key(_scope(b"q=a&active=")) != request_key(_scope(b"q=a"))
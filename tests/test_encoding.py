@@ -0,0 +1,38 @@
+import msgpack
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from pydantic import BaseModel
+from app.core.encoding import COLUMNAR_JSON, JSON, MSGPACK, columns, encode, preferred_format
+
+class Row(BaseModel):
+    id: int
+    price: float
+    start_time: datetime
+
+class TestListEncoding:
+    """Test content negotiation and the columnar list formats."""
+
+    def test_preferred_format(self):
+        """Test that the highest-q supported type wins and JSON is the fallback."""
+        assert preferred_format(None) == JSON
+        assert preferred_format("*/*") == JSON
+        assert preferred_format("application/msgpack") == MSGPACK
+        assert preferred_format("application/x-msgpack") == MSGPACK
+        assert preferred_format(f"application/msgpack;q=0.5, {COLUMNAR_JSON};q=0.9") == COLUMNAR_JSON
+
+    def test_columns_use_epoch_ms(self):
+        """Test that rows are grouped by field with datetimes as epoch milliseconds."""
+        rows = [
+            SimpleNamespace(id=1, price=Decimal("9.50"), start_time=datetime(2030, 1, 1, tzinfo=timezone.utc)),
+            SimpleNamespace(id=2, price=Decimal("12.00"), start_time=datetime(2030, 1, 1, 1)),
+        ]
+        doc = columns(rows, Row)
+        assert doc["count"] == 2
+        assert doc["columns"] == {"id": [1, 2], "price": [9.5, 12.0], "start_time": [1893456000000, 1893459600000]}
+
+    def test_msgpack_round_trip(self):
+        """Test that the MessagePack body decodes to the same document."""
+        doc = columns([SimpleNamespace(id=1, price=1.0, start_time=datetime(2030, 1, 1, tzinfo=timezone.utc))], Row)
+        assert msgpack.unpackb(encode(doc, MSGPACK)) == doc
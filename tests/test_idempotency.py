@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from app.services.booking_service import BookingService
+
+class TestIdempotencyKeys:
+    """Test Idempotency-Key handling on booking creation."""
+
+    async def test_retry_replays_stored_response(self, client: AsyncClient, test_user, test_service):
+        """Test that a retried create returns the first response instead of a 409."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-03-01T10:00:00Z",
+            "end_time": "2024-03-01T11:00:00Z"
+        }
+        headers = {**test_user["headers"], "Idempotency-Key": "retry-1"}
+
+        first = await client.post("/bookings", json=booking_data, headers=headers)
+        assert first.status_code == 201
+
+        retry = await client.post("/bookings", json=booking_data, headers=headers)
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+
+        bookings = await client.get("/bookings", headers=test_user["headers"])
+        assert len(bookings.json()) == 1
+
+    async def test_key_reused_for_different_request(self, client: AsyncClient, test_user, test_service):
+        """Test that a key cannot be reused with a different body."""
+        headers = {**test_user["headers"], "Idempotency-Key": "retry-2"}
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-03-02T10:00:00Z",
+            "end_time": "2024-03-02T11:00:00Z"
+        }
+        response = await client.post("/bookings", json=booking_data, headers=headers)
+        assert response.status_code == 201
+
+        booking_data["end_time"] = "2024-03-02T12:00:00Z"
+        response = await client.post("/bookings", json=booking_data, headers=headers)
+        assert response.status_code == 422
+
+    async def test_concurrent_duplicate_waits_for_first(self, client: AsyncClient, test_user, test_service, monkeypatch):
+        """Test that a duplicate sent while the first request runs waits for it and replays its response."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-03-03T10:00:00Z",
+            "end_time": "2024-03-03T11:00:00Z"
+        }
+        headers = {**test_user["headers"], "Idempotency-Key": "retry-3"}
+        started, proceed = asyncio.Event(), asyncio.Event()
+        create = BookingService.create
+
+        async def held_create(self, **kwargs):
+            started.set()
+            await proceed.wait()
+            return await create(self, **kwargs)
+
+        monkeypatch.setattr(BookingService, "create", held_create)
+        first = asyncio.create_task(client.post("/bookings", json=booking_data, headers=headers))
+        await started.wait()
+        duplicate = asyncio.create_task(client.post("/bookings", json=booking_data, headers=headers))
+        await asyncio.sleep(0.1)
+        assert not duplicate.done()
+
+        proceed.set()
+        first, duplicate = await first, await duplicate
+        assert first.status_code == duplicate.status_code == 201
+        assert duplicate.json() == first.json()
+        assert duplicate.headers["idempotent-replayed"] == "true"
+        bookings = await client.get("/bookings", headers=test_user["headers"])
+        assert len(bookings.json()) == 1
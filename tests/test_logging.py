@@ -0,0 +1,40 @@
+import logging
+import queue
+import pytest
+from app.core.logging import BatchRotatingFileHandler, DebugSampler, DroppingQueueHandler, request_scope
+
+def _record(level=logging.DEBUG, msg="event"):
+    return logging.makeLogRecord({"msg": msg, "levelno": level, "levelname": logging.getLevelName(level)})
+
+class TestLoggingPipeline:
+    """Test the queued logging pipeline's drop counter, debug sampling and rotation."""
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that records beyond the queue bound are counted, not waited on."""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record(logging.INFO))
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_debug_sampled_per_route(self):
+        """Test that debug records follow the rate of the current route."""
+        route = type("Route", (), {"path": "/services"})()
+        sampler = DebugSampler({"/services": 0.0}, default=1.0)
+        token = request_scope.set({"type": "http", "route": route})
+        try:
+            assert not sampler.filter(_record())
+            assert sampler.filter(_record(logging.INFO))
+        finally:
+            request_scope.reset(token)
+        assert sampler.filter(_record())
+
+    def test_size_rotation(self, tmp_path):
+        """Test that a batch that would overflow the file rotates it first."""
+        handler = BatchRotatingFileHandler(str(tmp_path / "app.log"), max_bytes=100, backup_count=2, rotate_seconds=0)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.emit_batch([_record(logging.INFO, "x" * 60)])
+        handler.emit_batch([_record(logging.INFO, "y" * 60)])
+        handler.close()
+        assert (tmp_path / "app.log.1").read_text().startswith("x")
+        assert (tmp_path / "app.log").read_text().startswith("y")
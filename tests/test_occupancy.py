@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timezone
+import numpy as np
+from httpx import AsyncClient
+from app.core.occupancy import DAY, HOUR, BookingSnapshot, busy_seconds, heatmap, snapshots, utilization
+from app.repositories.booking_repo import STATUS_CODES
+
+def _snapshot(rows: list[tuple[int, int, int, str]], services: list[int]) -> BookingSnapshot:
+    sid, start, end, status = zip(*rows)
+    return BookingSnapshot(
+        np.array(sid, np.int32), np.array(start, np.int64), np.array(end, np.int64),
+        np.array([STATUS_CODES[s] for s in status], np.int8), np.array(services, np.int32),
+        loaded_at=datetime.now(timezone.utc), load_ms=0,
+    )
+
+class TestOccupancy:
+    """Test the vectorized occupancy maths over a bookings snapshot."""
+
+    def test_busy_seconds_matches_brute_force(self):
+        """Test that binning, including intervals spanning many bins, agrees with a per-second count."""
+        rng = random.Random(7)
+        lo, hi, width, groups = 1000, 1000 + 50 * 60, 60, 3
+        starts = [rng.randrange(900, 4200) for _ in range(300)]
+        ends = [s + rng.randrange(1, 400) for s in starts]
+        group = [rng.randrange(groups) for _ in starts]
+        expected = np.zeros((groups, 50))
+        for s, e, g in zip(starts, ends, group):
+            for t in range(max(s, lo), min(e, hi)):
+                expected[g, (t - lo) // width] += 1
+        got = busy_seconds(np.array(starts), np.array(ends), lo, hi, width, group=np.array(group), groups=groups)
+        assert np.array_equal(got, expected)
+
+    def test_heatmap_folds_hours_of_week(self):
+        """Test that a booking lands in its UTC weekday and hour, and cancelled ones are left out."""
+        monday = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+        snap = _snapshot([
+            (1, monday + 9 * HOUR, monday + 10 * HOUR + 1800, "confirmed"),
+            (2, monday + DAY + 9 * HOUR, monday + DAY + 10 * HOUR, "cancelled"),
+        ], services=[1, 2])
+        result = heatmap(snap, monday, monday + 7 * DAY)
+        assert result["bookings"] == 1
+        assert result["booked_hours"][0][9:11] == [1.0, 0.5]
+        assert result["utilization"][0][9] == 0.5  # one of two services
+        assert sum(map(sum, result["booked_hours"])) == 1.5
+
+    def test_utilization_percentiles(self):
+        """Test per-service and per-service-day utilization, including services with no bookings."""
+        day = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+        snap = _snapshot([
+            (1, day, day + DAY, "completed"),
+            (2, day + 6 * HOUR, day + 12 * HOUR, "pending"),
+        ], services=[1, 2, 3, 4])
+        result = utilization(snap, day, day + 2 * DAY, [50, 100])
+        assert result["per_service"] == {"p50": 0.0625, "p100": 0.5}
+        assert result["per_service_day"]["p100"] == 1.0
+        assert [b["service_id"] for b in result["busiest"][:2]] == [1, 2]
+
+    async def test_endpoints_over_loaded_snapshot(self, client: AsyncClient, db_session, test_user, test_admin, test_service):
+        """Test that the admin endpoints answer from a snapshot loaded from the database."""
+        await client.post("/bookings", json={
+            "service_id": test_service["id"],
+            "start_time": "2024-01-01T09:00:00Z",
+            "end_time": "2024-01-01T10:00:00Z"
+        }, headers=test_user["headers"])
+        snapshots.snapshot = None
+        response = await client.get("/admin/occupancy/heatmap", headers=test_admin["headers"])
+        assert response.status_code == 503
+
+        await snapshots.refresh(lambda: db_session)
+        url = f"/admin/occupancy/heatmap?from=2024-01-01&to=2024-01-14&service_id={test_service['id']}"
+        response = await client.get(url, headers=test_admin["headers"])
+        assert response.status_code == 200
+        body = response.json()
+        assert body["from"] == "2024-01-01" and body["bookings"] == 1
+        assert body["utilization"][0][9] == 0.5  # one of two Mondays
+
+        response = await client.get("/admin/occupancy/utilization?from=2024-01-01&to=2024-01-01&p=50&p=101", headers=test_admin["headers"])
+        assert response.status_code == 422
+        response = await client.get("/admin/occupancy/utilization?from=2024-01-01&to=2024-01-01&p=100", headers=test_admin["headers"])
+        assert response.json()["per_service"] == {"p100": round(1 / 24, 4)}
@@ -0,0 +1,127 @@
+import pytest
+from httpx import AsyncClient
+from app.core.outbox import OutboxRelay, OutboxSink, subscribers
+
+@pytest.fixture
+def relay_for(db_session):
+    """A relay over the test session, built with the given sinks."""
+    class _SessionFactory:
+        async def __aenter__(self):
+            return db_session
+
+        async def __aexit__(self, *exc):
+            return False
+
+    def build(sinks=(), local=None):
+        return OutboxRelay(_SessionFactory, list(sinks), batch_size=10, poll_interval=0.1, local=local)
+    return build
+
+class TestBookingChanges:
+    """Test the outbox-backed booking change feed and relay."""
+
+    async def test_feed_follows_cursor(self, client: AsyncClient, relay_for, test_user, test_service):
+        """Test that each mutation appears once, in order, after the given cursor."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-04-01T10:00:00Z",
+            "end_time": "2024-04-01T11:00:00Z"
+        }
+        created = await client.post("/bookings", json=booking_data, headers=test_user["headers"])
+        bid = created.json()["id"]
+        await client.patch(f"/bookings/{bid}", json={"cancel": True}, headers=test_user["headers"])
+        unnumbered = await client.get("/bookings/changes", headers=test_user["headers"])
+        assert unnumbered.json()["changes"] == []
+        await relay_for().relay_once()
+
+        first = await client.get("/bookings/changes?limit=1", headers=test_user["headers"])
+        assert first.status_code == 200
+        page = first.json()
+        assert [c["type"] for c in page["changes"]] == ["booking.created"]
+        assert page["has_more"] is True
+
+        rest = await client.get(f"/bookings/changes?since={page['next_cursor']}", headers=test_user["headers"])
+        changes = rest.json()["changes"]
+        assert [c["type"] for c in changes] == ["booking.updated"]
+        assert changes[0]["data"]["status"] == "cancelled"
+        assert rest.json()["has_more"] is False
+
+    async def test_feed_is_scoped_to_owner(self, client: AsyncClient, relay_for, test_user, test_admin, test_service):
+        """Test that users see only their own bookings' changes and admins see all."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-04-02T10:00:00Z",
+            "end_time": "2024-04-02T11:00:00Z"
+        }
+        await client.post("/bookings", json=booking_data, headers=test_admin["headers"])
+        await relay_for().relay_once()
+
+        mine = await client.get("/bookings/changes", headers=test_user["headers"])
+        assert mine.json()["changes"] == []
+        everything = await client.get("/bookings/changes", headers=test_admin["headers"])
+        assert len(everything.json()["changes"]) == 1
+
+    async def test_failed_write_records_nothing(self, client: AsyncClient, relay_for, test_user, test_service):
+        """Test that a rejected booking leaves no event behind."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-04-03T10:00:00Z",
+            "end_time": "2024-04-03T11:00:00Z"
+        }
+        await client.post("/bookings", json=booking_data, headers=test_user["headers"])
+        conflict = await client.post("/bookings", json=booking_data, headers=test_user["headers"])
+        assert conflict.status_code == 409
+        await relay_for().relay_once()
+
+        changes = await client.get("/bookings/changes", headers=test_user["headers"])
+        assert len(changes.json()["changes"]) == 1
+
+    async def test_relay_publishes_once(self, client: AsyncClient, relay_for, test_user, test_service):
+        """Test that the relay hands each committed event to sinks and subscribers exactly once."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-04-04T10:00:00Z",
+            "end_time": "2024-04-04T11:00:00Z"
+        }
+        await client.post("/bookings", json=booking_data, headers=test_user["headers"])
+
+        delivered, received = [], []
+
+        class _Sink(OutboxSink):
+            async def publish(self, events):
+                delivered.extend(events)
+
+        async def handler(events):
+            received.extend(events)
+
+        relay = relay_for([_Sink()], local=subscribers)
+        subscribers.subscribe(handler)
+        try:
+            assert await relay.relay_once() == 1
+            assert await relay.relay_once() == 0
+        finally:
+            subscribers.unsubscribe(handler)
+        assert [e["type"] for e in delivered] == ["booking.created"]
+        assert [e["type"] for e in received] == ["booking.created"]
+
+    async def test_failed_sink_releases_batch(self, client: AsyncClient, relay_for, test_user, test_service):
+        """Test that a batch a sink rejected is offered again on the next pass."""
+        booking_data = {
+            "service_id": test_service["id"],
+            "start_time": "2024-04-05T10:00:00Z",
+            "end_time": "2024-04-05T11:00:00Z"
+        }
+        await client.post("/bookings", json=booking_data, headers=test_user["headers"])
+
+        attempts = []
+
+        class _FlakySink(OutboxSink):
+            async def publish(self, events):
+                attempts.append(events)
+                if len(attempts) == 1:
+                    raise RuntimeError("sink down")
+
+        relay = relay_for([_FlakySink()])
+        with pytest.raises(RuntimeError):
+            await relay.relay_once()
+        assert await relay.relay_once() == 1
+        assert [len(batch) for batch in attempts] == [1, 1]
@@ -0,0 +1,35 @@
+import time
+import pytest
+from app.core.profiling import NO_REQUEST, Profiler
+
+class TestProfiler:
+    """Test the on-demand profiler's request budget and output."""
+
+    def test_stops_after_request_budget(self):
+        """Test that sampling stops once the requested number of requests finished."""
+        p = Profiler()
+        p.start("sample", requests=2, interval_ms=1)
+        time.sleep(0.02)
+        p.request_finished()
+        assert p.active
+        p.request_finished()
+        assert not p.active
+        assert p.status()["samples"] > 0
+
+    def test_collapsed_stacks_start_with_route(self):
+        """Test that stacks sampled outside a request are attributed to no route."""
+        p = Profiler()
+        p.start("sample", requests=1, interval_ms=1)
+        time.sleep(0.02)
+        p.stop()
+        lines = p.collapsed().strip().splitlines()
+        assert lines and all(line.startswith(NO_REQUEST + ";") for line in lines)
+
+    def test_cprofile_stats(self):
+        """Test that deterministic mode produces pstats output."""
+        p = Profiler()
+        p.start("cprofile", requests=1)
+        sum(range(1000))
+        p.request_finished()
+        assert "function calls" in p.pstats_text()
+        assert p.pstats_dump()
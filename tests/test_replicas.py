@@ -0,0 +1,34 @@
+import pytest
+from app.db.replicas import ReplicaSet
+
+class TestReplicaSet:
+    """Test read replica rotation, ejection and read-your-writes pinning."""
+    
+    def make(self, n=3):
+        rs = ReplicaSet([], eject_seconds=30, pin_seconds=5)
+        # Routing only needs the slot bookkeeping, not live engines
+        rs.engines = [object()] * n
+        rs._ejected_until = [0.0] * n
+        return rs
+    
+    def test_round_robin(self):
+        """Test that each call starts from the next replica."""
+        rs = self.make()
+        assert [rs.candidates()[0] for _ in range(4)] == [0, 1, 2, 0]
+    
+    def test_ejected_replica_is_skipped(self):
+        """Test that a failing replica is taken out of rotation."""
+        rs = self.make()
+        rs.eject(1, RuntimeError("down"))
+        for _ in range(3):
+            assert 1 not in rs.candidates()
+        assert [s["healthy"] for s in rs.status()] == [True, False, True]
+    
+    def test_pin_after_write(self):
+        """Test that a pinned caller is routed to the primary."""
+        rs = self.make()
+        assert not rs.is_pinned("Bearer abc")
+        rs.pin("Bearer abc")
+        assert rs.is_pinned("Bearer abc")
+        assert not rs.is_pinned("Bearer other")
+        assert not rs.is_pinned(None)
@@ -0,0 +1,75 @@
+from httpx import AsyncClient
+from app.repositories.stats_repo import ServiceStatsRepo
+
+class TestServiceRollups:
+    """Test the per-service daily rollups behind /admin/analytics."""
+
+    async def test_rollup_follows_booking_writes(self, client: AsyncClient, test_user, test_admin, test_service):
+        """Test that create, reschedule and status changes move counts, minutes and revenue."""
+        first = await client.post("/bookings", json={
+            "service_id": test_service["id"],
+            "start_time": "2024-05-01T10:00:00Z",
+            "end_time": "2024-05-01T11:00:00Z"
+        }, headers=test_user["headers"])
+        second = await client.post("/bookings", json={
+            "service_id": test_service["id"],
+            "start_time": "2024-05-01T12:00:00Z",
+            "end_time": "2024-05-01T12:30:00Z"
+        }, headers=test_user["headers"])
+        await client.patch(f"/bookings/{first.json()['id']}/status?status=completed", headers=test_admin["headers"])
+        await client.patch(f"/bookings/{second.json()['id']}", json={"cancel": True}, headers=test_user["headers"])
+
+        response = await client.get("/admin/analytics/daily?from=2024-05-01&to=2024-05-31", headers=test_admin["headers"])
+        assert response.status_code == 200
+        [day] = response.json()
+        assert day["day"] == "2024-05-01"
+        assert (day["pending"], day["completed"], day["cancelled"]) == (0, 1, 1)
+        assert day["booked_minutes"] == 60
+        assert day["revenue"] == float(test_service["price"])
+
+    async def test_rebuild_matches_incremental(self, client: AsyncClient, db_session, test_user, test_admin, test_service):
+        """Test that rebuilding from bookings gives the rows kept incrementally."""
+        booking = await client.post("/bookings", json={
+            "service_id": test_service["id"],
+            "start_time": "2024-05-02T10:00:00Z",
+            "end_time": "2024-05-02T11:00:00Z"
+        }, headers=test_user["headers"])
+        await client.patch(f"/bookings/{booking.json()['id']}", json={
+            "start_time": "2024-05-03T10:00:00Z",
+            "end_time": "2024-05-03T10:45:00Z"
+        }, headers=test_user["headers"])
+        url = "/admin/analytics/daily?from=2024-05-01&to=2024-05-31"
+        incremental = (await client.get(url, headers=test_admin["headers"])).json()
+
+        await ServiceStatsRepo(db_session).rebuild()
+        await db_session.commit()
+
+        rebuilt = (await client.get(url, headers=test_admin["headers"])).json()
+        assert rebuilt == incremental
+        assert [d["day"] for d in rebuilt] == ["2024-05-03"]
+
+    async def test_price_change_keeps_booked_revenue(self, client: AsyncClient, test_user, test_admin, test_service):
+        """Test that cancelling after a price change takes back what the booking added, not the new price."""
+        booking = await client.post("/bookings", json={
+            "service_id": test_service["id"],
+            "start_time": "2024-05-04T10:00:00Z",
+            "end_time": "2024-05-04T11:00:00Z"
+        }, headers=test_user["headers"])
+        fields = ("title", "description", "duration_minutes", "is_active")
+        repriced = {**{k: test_service[k] for k in fields}, "price": float(test_service["price"]) * 3}
+        response = await client.patch(f"/services/{test_service['id']}", json=repriced, headers=test_admin["headers"])
+        assert response.status_code == 200
+        await client.patch(f"/bookings/{booking.json()['id']}", json={"cancel": True}, headers=test_user["headers"])
+
+        response = await client.get("/admin/analytics/daily?from=2024-05-04&to=2024-05-04", headers=test_admin["headers"])
+        [day] = response.json()
+        assert day["cancelled"] == 1
+        assert day["revenue"] == 0
+
+    async def test_analytics_requires_admin_and_valid_range(self, client: AsyncClient, test_user, test_admin):
+        """Test that users are refused and reversed ranges are rejected."""
+        response = await client.get("/admin/analytics/services", headers=test_user["headers"])
+        assert response.status_code == 403
+
+        response = await client.get("/admin/analytics/services?from=2024-06-01&to=2024-05-01", headers=test_admin["headers"])
+        assert response.status_code == 422
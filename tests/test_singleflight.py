@@ -0,0 +1,31 @@
+import asyncio
+from app.core.singleflight import SharedResponse, SingleFlight
+
+class TestSingleFlight:
+    """Test sharing of in-flight reads between identical requests."""
+
+    async def test_waiters_share_leader_response(self):
+        """Test that requests joining while the leader runs get its response."""
+        group = SingleFlight(timeout=1)
+        future, leader = group.join("k")
+        waiters = [group.join("k") for _ in range(3)]
+        assert leader and not any(is_leader for _, is_leader in waiters)
+        pending = [asyncio.create_task(group.wait(f)) for f, _ in waiters]
+        group.finish("k", future, SharedResponse(200, [], b"{}"))
+        assert [r.body for r in await asyncio.gather(*pending)] == [b"{}"] * 3
+
+    async def test_failed_leader_releases_waiters(self):
+        """Test that waiters get None after a failure and the next request leads again."""
+        group = SingleFlight(timeout=1)
+        future, _ = group.join("k")
+        waiter = asyncio.create_task(group.wait(group.join("k")[0]))
+        group.finish("k", future, None)
+        assert await waiter is None
+        assert group.join("k")[1]
+
+    async def test_waiter_timeout_keeps_future_for_others(self):
+        """Test that a timed-out waiter does not cancel the shared future."""
+        group = SingleFlight(timeout=0.01)
+        future, _ = group.join("k")
+        assert await group.wait(future) is None
+        assert not future.cancelled()
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.slow_queries import SlowQueryLog, normalize_sql, param_shape
+
+class TestSlowQueryLog:
+    """Test slow statement normalization and the ring buffer."""
+
+    def test_normalize_collapses_in_lists_and_literals(self):
+        """Test that statements differing only in list size or literals normalize the same."""
+        a = normalize_sql("SELECT *\n  FROM users WHERE id IN ($1, $2) AND role = 'admin'")
+        b = normalize_sql("SELECT * FROM users WHERE id IN ($1, $2, $3, $4) AND role = 'user'")
+        assert a == b == "SELECT * FROM users WHERE id IN (...) AND role = ?"
+
+    def test_param_shape_hides_values(self):
+        """Test that only parameter types are kept."""
+        assert param_shape((1, "secret", [1, 2])) == ["int", "str", "list[2]"]
+        assert param_shape({"email": "a@x.com"}) == {"email": "str"}
+        assert param_shape([(1, "a"), (2, "b")], executemany=True) == {"rows": 2, "params": ["int", "str"]}
+
+    def test_ring_buffer_is_bounded(self):
+        """Test that only the most recent entries are kept, newest first."""
+        log = SlowQueryLog(threshold_ms=1, explain_sample=0, size=2)
+        engine = type("E", (), {"dialect": type("D", (), {"name": "sqlite"})()})()
+        for i in range(3):
+            log.record(engine, f"SELECT {i}", (), False, 5.0 + i)
+        snap = log.snapshot()
+        assert snap["total"] == 3
+        assert [e["duration_ms"] for e in snap["entries"]] == [7.0, 6.0]
+
+    async def test_explain_runs_on_explain_engine(self):
+        """Test that plans for a writer's statements are captured on the given explain engine."""
+        log = SlowQueryLog(threshold_ms=1, explain_sample=1, size=2)
+        writer = type("E", (), {"dialect": type("D", (), {"name": "sqlite"})()})()  # no connect(): must not be used
+        reader = create_async_engine("sqlite+aiosqlite://")
+        try:
+            log.record(writer, "SELECT 1", (), False, 5.0, explain_engine=reader)
+            await asyncio.gather(*log._tasks)
+            entry = log.snapshot()["entries"][0]
+            assert "plan_error" not in entry and entry["plan"] is not None
+        finally:
+            await reader.dispose()
@@ -0,0 +1,38 @@
+import pytest
+from app.core.timing import RequestTimings, _current, segment
+
+class TestRequestTimings:
+    """Test per-request timing bookkeeping and N+1 detection."""
+
+    def test_repeated_statements_flagged(self):
+        """Test that only statements at or over the threshold are reported."""
+        t = RequestTimings()
+        t.statements["SELECT * FROM reviews WHERE booking_id = ?"] = 5
+        t.statements["SELECT * FROM bookings"] = 1
+        assert t.repeated_statements() == [("SELECT * FROM reviews WHERE booking_id = ?", 5)]
+
+    def test_server_timing_header(self):
+        """Test the Server-Timing header lists db, segments and total."""
+        t = RequestTimings(db_queries=2, db_s=0.003)
+        t.add("hash", 0.25)
+        header = t.server_timing(0.3)
+        assert header == 'db;dur=3.00;desc="2 queries", hash;dur=250.00, total;dur=300.00'
+
+    def test_segment_outside_request_is_noop(self):
+        """Test that segments do nothing without a current request."""
+        with segment("hash"):
+            pass
+        assert _current.get() is None
+
+    def test_segment_accumulates(self):
+        """Test that repeated segments add up."""
+        t = RequestTimings()
+        token = _current.set(t)
+        try:
+            with segment("serialize"):
+                pass
+            with segment("serialize"):
+                pass
+        finally:
+            _current.reset(token)
+        assert "serialize" in t.segments and t.segments["serialize"] >= 0